@@ -1,10 +1,12 @@
 from pandas import DataFrame
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 class BuySpaceCombinedHyperOptLoss(IHyperOptLoss):
     @staticmethod
     def hyperopt_loss_function(results: DataFrame, trade_count: int, *args, **kwargs) -> float:
-        total_profit = results["profit_abs"].sum()
-        trade_duration = results["trade_duration"].mean()
+        metrics = LossMetrics(results, starting_balance=0)
+        total_profit = metrics.total_profit
+        trade_duration = metrics.mean_trade_duration
         duration_loss = 0.4 * min(trade_duration / 300, 1)
         return -1 * total_profit + duration_loss
@@ -7,8 +7,8 @@ Hyperoptimization, combining MaxDrawDownRelativeHyperOptLoss and ProfitDrawDownH
 
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_max_drawdown, calculate_underwater
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 # Smaller numbers penalize drawdowns more severely
 DRAWDOWN_MULT = 0.075
@@ -32,20 +32,17 @@ class CombinedDrawDownProfitHyperOptLoss(IHyperOptLoss):
 
         Combines logic of both max drawdown relative and profit drawdown loss functions.
         """
-        total_profit = results["profit_abs"].sum()
+        metrics = LossMetrics(results, config["dry_run_wallet"])
+        total_profit = metrics.total_profit
 
         try:
             # Calculate drawdowns
-            drawdown_df = calculate_underwater(
-                results, value_col="profit_abs", starting_balance=config["dry_run_wallet"]
-            )
-            max_drawdown = abs(min(drawdown_df["drawdown"]))
-            relative_drawdown = max(drawdown_df["drawdown_relative"])
+            max_drawdown = metrics.max_drawdown
+            relative_drawdown = metrics.max_relative_drawdown
 
-            drawdown = calculate_max_drawdown(
-                results, starting_balance=config["dry_run_wallet"], value_col="profit_abs"
-            )
-            relative_account_drawdown = drawdown.relative_account_drawdown
+            if not metrics.has_drawdown:
+                raise ValueError("No losing trade, therefore no drawdown.")
+            relative_account_drawdown = metrics.relative_account_drawdown
 
             if max_drawdown == 0:
                 max_drawdown_loss = -total_profit
@@ -4,7 +4,7 @@ from math import exp
 from pandas import DataFrame
 from freqtrade.constants import Config
 from freqtrade.optimize.hyperopt import IHyperOptLoss
-from freqtrade.data.metrics import calculate_max_drawdown
+from loss_metrics import LossAccumulator, LossComponents, LossMetrics
 
 # # 5-Minute Timeframe
 # DRAWDOWN_MULT = 0.15
@@ -24,6 +24,17 @@ MAX_ACCEPTED_TRADE_DURATION = 900  # 15 minutes
 # EXPECTED_MAX_PROFIT = 1.5
 # MAX_ACCEPTED_TRADE_DURATION = 3600  # 1 hour
 
+PROFIT_WEIGHT   = 0.3
+DURATION_WEIGHT = 0.25
+TRADE_WEIGHT    = 0.25
+DRAWDOWN_WEIGHT = 0.2
+# TRADE_DISTRIBUTION_WEIGHT = 0.167
+
+
+def trade_count_loss(trade_count: int) -> float:
+    return 1 - 0.25 * exp(-(trade_count - TARGET_TRADES) ** 2 / 10 ** 5.8)
+
+
 class ComprehensiveTradeOptimizationLoss(IHyperOptLoss):
     """
     Combined loss function for optimizing:
@@ -38,52 +49,64 @@ class ComprehensiveTradeOptimizationLoss(IHyperOptLoss):
                                config: Config, processed: Dict[str, DataFrame],
                                backtest_stats: Dict[str, Any],
                                *args, **kwargs) -> float:
-        
-        profit_weight   = 0.3
-        duration_weight = 0.25
-        trade_weight    = 0.25
-        drawdown_weight = 0.2
-        # trade_distribution_weight = 0.167
-    
-        total_profit = results["profit_abs"].sum()
-        trade_duration = results["trade_duration"].mean()
+        components = LossComponents()
+        with components.timed("metrics"):
+            metrics = LossMetrics(results, config["dry_run_wallet"], min_date, max_date)
+        total_profit = metrics.total_profit
+        trade_duration = metrics.mean_trade_duration
 
         # Calculate drawdown
-        try:
-            drawdown = calculate_max_drawdown(
-                results, starting_balance=config["dry_run_wallet"], value_col="profit_abs"
-            )
-            relative_drawdown = drawdown.relative_account_drawdown
-        except ValueError:
-            relative_drawdown = 0
+        relative_drawdown = metrics.relative_account_drawdown
 
         # Profit and Drawdown component
         profit_drawdown_score = -1 * (
             total_profit - (relative_drawdown * total_profit) * (1 - DRAWDOWN_MULT)
         )
+        components.record("profit_drawdown", profit_drawdown_score, DRAWDOWN_WEIGHT)
 
         # Trade Duration component
         duration_penalty = 0.4 * min(trade_duration / MAX_ACCEPTED_TRADE_DURATION, 1)
+        components.record("duration", duration_penalty, DURATION_WEIGHT)
 
         # Trade Count and Profit component
-        trade_loss = 1 - 0.25 * exp(-(trade_count - TARGET_TRADES) ** 2 / 10 ** 5.8)
-        profit_loss = max(0, 1 - (results["profit_ratio"].sum() / EXPECTED_MAX_PROFIT))
+        trade_loss = trade_count_loss(trade_count)
+        components.record("trade_count", trade_loss, TRADE_WEIGHT)
+        profit_loss = max(0, 1 - (metrics.total_profit_ratio / EXPECTED_MAX_PROFIT))
+        components.record("profit", profit_loss, PROFIT_WEIGHT)
 
-        # Penalty for unbalanced trade distribution
-        trade_counts = results['pair'].value_counts()
-        avg_trades = trade_counts.mean()
-        trade_distribution_penalty = sum(abs(trade_count - avg_trades) for trade_count in trade_counts) / len(trade_counts)
+        # Penalty for unbalanced trade distribution (only read by the commented-out weight below)
+        # trade_distribution_penalty = metrics.trade_distribution_penalty
 
         # Combine components
         combined_score = (
-            profit_weight * profit_loss +
-            duration_weight * duration_penalty + 
-            trade_weight * trade_loss +
-            drawdown_weight * profit_drawdown_score
-            # trade_distribution_weight * trade_distribution_penalty
+            PROFIT_WEIGHT * profit_loss +
+            DURATION_WEIGHT * duration_penalty + 
+            TRADE_WEIGHT * trade_loss +
+            DRAWDOWN_WEIGHT * profit_drawdown_score
+            # TRADE_DISTRIBUTION_WEIGHT * trade_distribution_penalty
         )
         #combined_score = profit_drawdown_score + duration_penalty + trade_loss + profit_loss + trade_distribution_penalty
+        components.publish(backtest_stats)
         return combined_score
 
+    @staticmethod
+    def hyperopt_loss_bound(metrics: LossAccumulator, max_profit: float, config: Config) -> float:
+        """
+        Lower bound of the final loss, given the trades closed so far and the
+        largest total profit the epoch can end with. Only the terms that cannot
+        improve on the remaining candles count: the profit and duration losses can
+        still drop to 0, the profit drawdown score not below -max_profit.
+        """
+        # Relative drawdown is in [0, 1], so the drawdown factor is in [DRAWDOWN_MULT, 1]
+        if max_profit > 0:
+            profit_drawdown_score = -max_profit
+        else:
+            profit_drawdown_score = -max_profit * DRAWDOWN_MULT
+
+        # Trades only get more, past the target the trade loss only grows
+        trade_loss = trade_count_loss(max(metrics.trade_count, TARGET_TRADES))
+
+        return TRADE_WEIGHT * trade_loss + DRAWDOWN_WEIGHT * profit_drawdown_score
+
 # Create an alias for this loss function to use in hyperopt
 DefaultHyperOptLoss = ComprehensiveTradeOptimizationLoss
\ No newline at end of file
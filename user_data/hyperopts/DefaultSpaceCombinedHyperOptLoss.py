@@ -1,8 +1,8 @@
 from datetime import datetime
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_max_drawdown, calculate_sharpe, calculate_sortino
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 # Define a drawdown multiplier to penalize drawdown
 DRAWDOWN_MULT = 0.12
@@ -22,23 +22,19 @@ class DefaultSpaceCombinedHyperOptLoss(IHyperOptLoss):
         *args,
         **kwargs,
     ) -> float:
+        metrics = LossMetrics(results, config["dry_run_wallet"], min_date, max_date)
+
         # Calculate total profit
-        total_profit = results["profit_abs"].sum()
+        total_profit = metrics.total_profit
 
         # Calculate maximum drawdown
-        try:
-            drawdown = calculate_max_drawdown(
-                results, starting_balance=config["dry_run_wallet"], value_col="profit_abs"
-            )
-            relative_account_drawdown = drawdown.relative_account_drawdown
-        except ValueError:
-            relative_account_drawdown = 0
+        relative_account_drawdown = metrics.relative_account_drawdown
 
         # Calculate Sharpe ratio
-        sharpe_ratio = calculate_sharpe(results, min_date, max_date, config["dry_run_wallet"])
+        sharpe_ratio = metrics.sharpe
 
         # Calculate Sortino ratio
-        sortino_ratio = calculate_sortino(results, min_date, max_date, config["dry_run_wallet"])
+        sortino_ratio = metrics.sortino
 
         # Combine the loss components
         profit_drawdown_component = total_profit - (relative_account_drawdown * total_profit) * (1 - DRAWDOWN_MULT)
@@ -1,7 +1,7 @@
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_underwater
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 
 class MaxDrawDownRelativeHyperOptLossWithTradePenalty(IHyperOptLoss):
@@ -20,15 +20,13 @@ class MaxDrawDownRelativeHyperOptLossWithTradePenalty(IHyperOptLoss):
         Uses profit ratio weighted max_drawdown when drawdown is available.
         Otherwise directly optimizes profit ratio.
         """
-        total_profit = results["profit_abs"].sum()
+        metrics = LossMetrics(results, config["dry_run_wallet"])
+        total_profit = metrics.total_profit
 
         # Calculate drawdown
         try:
-            drawdown_df = calculate_underwater(
-                results, value_col="profit_abs", starting_balance=config["dry_run_wallet"]
-            )
-            max_drawdown = abs(min(drawdown_df["drawdown"]))
-            relative_drawdown = max(drawdown_df["drawdown_relative"])
+            max_drawdown = metrics.max_drawdown
+            relative_drawdown = metrics.max_relative_drawdown
             if max_drawdown == 0:
                 profit_drawdown_ratio = -total_profit
             else:
@@ -37,9 +35,7 @@ class MaxDrawDownRelativeHyperOptLossWithTradePenalty(IHyperOptLoss):
             profit_drawdown_ratio = -total_profit
 
         # Penalty for unbalanced trade distribution
-        trade_counts = results['pair'].value_counts()
-        avg_trades = trade_counts.mean()
-        trade_distribution_penalty = sum(abs(trade_count - avg_trades) for trade_count in trade_counts) / len(trade_counts)
+        trade_distribution_penalty = metrics.trade_distribution_penalty
 
         # Combine profit/drawdown ratio and trade distribution penalty
         loss_value = profit_drawdown_ratio + trade_distribution_penalty
@@ -10,8 +10,8 @@ individual needs.
 
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_max_drawdown
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 # smaller numbers penalize drawdowns more severely
 DRAWDOWN_MULT = 0.075
@@ -19,20 +19,13 @@ DRAWDOWN_MULT = 0.075
 class ProfitDrawDownHyperOptLossWithTradePenalty(IHyperOptLoss):
     @staticmethod
     def hyperopt_loss_function(results: DataFrame, config: Config, *args, **kwargs) -> float:
-        total_profit = results["profit_abs"].sum()
+        metrics = LossMetrics(results, config["dry_run_wallet"])
+        total_profit = metrics.total_profit
 
-        try:
-            drawdown = calculate_max_drawdown(
-                results, starting_balance=config["dry_run_wallet"], value_col="profit_abs"
-            )
-            relative_account_drawdown = drawdown.relative_account_drawdown
-        except ValueError:
-            relative_account_drawdown = 0
+        relative_account_drawdown = metrics.relative_account_drawdown
 
         # Penalty for unbalanced trade distribution
-        trade_counts = results['pair'].value_counts()
-        avg_trades = trade_counts.mean()
-        trade_distribution_penalty = sum(abs(trade_count - avg_trades) for trade_count in trade_counts) / len(trade_counts)
+        trade_distribution_penalty = metrics.trade_distribution_penalty
 
         return -1 * (
             total_profit - (relative_account_drawdown * total_profit) * (1 - DRAWDOWN_MULT)
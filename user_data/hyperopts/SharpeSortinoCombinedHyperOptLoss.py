@@ -1,8 +1,8 @@
 from datetime import datetime
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_sharpe, calculate_sortino
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossMetrics
 
 class SharpeSortinoCombinedHyperOptLoss(IHyperOptLoss):
     """
@@ -26,13 +26,13 @@ class SharpeSortinoCombinedHyperOptLoss(IHyperOptLoss):
 
         Combines Sharpe Ratio and Sortino Ratio calculations.
         """
-        starting_balance = config["dry_run_wallet"]
+        metrics = LossMetrics(results, config["dry_run_wallet"], min_date, max_date)
         
         # Calculate Sharpe Ratio
-        sharp_ratio = calculate_sharpe(results, min_date, max_date, starting_balance)
+        sharp_ratio = metrics.sharpe
         
         # Calculate Sortino Ratio
-        sortino_ratio = calculate_sortino(results, min_date, max_date, starting_balance)
+        sortino_ratio = metrics.sortino
         
         # Combine the two ratios
         combined_metric = (sharp_ratio + sortino_ratio) / 2
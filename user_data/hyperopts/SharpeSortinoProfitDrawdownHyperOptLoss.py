@@ -1,8 +1,8 @@
 from datetime import datetime
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_sharpe, calculate_sortino, calculate_underwater
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossComponents, LossMetrics
 
 
 class SharpeSortinoProfitDrawdownHyperOptLoss(IHyperOptLoss):
@@ -27,28 +27,30 @@ class SharpeSortinoProfitDrawdownHyperOptLoss(IHyperOptLoss):
         sortino_weight = 0.2
         drawdown_weight = 0.1
 
-        starting_balance = config["dry_run_wallet"]
+        components = LossComponents()
+        with components.timed("metrics"):
+            metrics = LossMetrics(results, config["dry_run_wallet"], min_date, max_date)
 
         # Calculate profit
-        total_profit = results["profit_abs"].sum()
-        profit_loss = -total_profit
+        total_profit = metrics.total_profit
+        profit_loss = components.record("profit", -total_profit, profit_weight)
 
         # Calculate Sharpe ratio
-        sharpe_ratio = calculate_sharpe(results, min_date, max_date, starting_balance)
-        sharpe_loss = -sharpe_ratio
+        sharpe_ratio = metrics.sharpe
+        sharpe_loss = components.record("sharpe", -sharpe_ratio, sharpe_weight)
 
         # Calculate Sortino ratio
-        sortino_ratio = calculate_sortino(results, min_date, max_date, starting_balance)
-        sortino_loss = -sortino_ratio
+        sortino_ratio = metrics.sortino
+        sortino_loss = components.record("sortino", -sortino_ratio, sortino_weight)
 
         # Calculate drawdown
         try:
-            drawdown_df = calculate_underwater(results, value_col="profit_abs", starting_balance=starting_balance)
-            max_drawdown = abs(min(drawdown_df["drawdown"]))
-            relative_drawdown = max(drawdown_df["drawdown_relative"])
+            max_drawdown = metrics.max_drawdown
+            relative_drawdown = metrics.max_relative_drawdown
             drawdown_loss = -total_profit / max_drawdown / relative_drawdown if max_drawdown != 0 else profit_loss
         except (Exception, ValueError):
             drawdown_loss = profit_loss
+        components.record("drawdown", drawdown_loss, drawdown_weight)
 
         # Combine losses with weights
         combined_loss = (
@@ -58,4 +60,5 @@ class SharpeSortinoProfitDrawdownHyperOptLoss(IHyperOptLoss):
             drawdown_weight * drawdown_loss
         )
 
+        components.publish(kwargs.get("backtest_stats"))
         return combined_loss
@@ -1,8 +1,8 @@
 from datetime import datetime
 from pandas import DataFrame
 from freqtrade.constants import Config
-from freqtrade.data.metrics import calculate_max_drawdown, calculate_calmar
 from freqtrade.optimize.hyperopt import IHyperOptLoss
+from loss_metrics import LossComponents, LossMetrics
 
 # Define constants for trade duration and drawdown control
 TARGET_TRADES = 1500
@@ -25,30 +25,33 @@ class TradeDurDrawDownCombinedHyperOptLoss(IHyperOptLoss):
         *args,
         **kwargs,
     ) -> float:
+        components = LossComponents()
+        with components.timed("metrics"):
+            metrics = LossMetrics(results, config["dry_run_wallet"], min_date, max_date)
+
         # Calculate total profit
-        total_profit = results["profit_abs"].sum()
+        total_profit = metrics.total_profit
 
         # Calculate maximum drawdown
-        try:
-            max_drawdown = calculate_max_drawdown(
-                results, starting_balance=config["dry_run_wallet"], value_col="profit_abs"
-            ).drawdown_abs
-        except ValueError:
+        if metrics.has_drawdown:
+            max_drawdown = metrics.drawdown_abs
+        else:
             max_drawdown = 1  # Avoid division by zero
 
         # Calculate Calmar Ratio
-        starting_balance = config["dry_run_wallet"]
-        calmar_ratio = calculate_calmar(results, min_date, max_date, starting_balance)
+        calmar_ratio = metrics.calmar
 
         # Define constants for weighting
         CALMAR_WEIGHT = 0.5
         DRAWDOWN_WEIGHT = 0.5
         
         # Penalize based on Calmar Ratio and Drawdown
-        calmar_loss = -calmar_ratio  # More negative is worse
+        calmar_loss = components.record("calmar", -calmar_ratio, CALMAR_WEIGHT)  # More negative is worse
         drawdown_loss = -total_profit / max_drawdown if max_drawdown != 0 else -total_profit
+        components.record("drawdown", drawdown_loss, DRAWDOWN_WEIGHT)
         
         # Combine losses
         result = (CALMAR_WEIGHT * calmar_loss) + (DRAWDOWN_WEIGHT * drawdown_loss)
         
+        components.publish(kwargs.get("backtest_stats"))
         return result
@@ -0,0 +1,25 @@
+"""
+Shared building blocks for the hyperopt losses in this directory.
+
+The hyperopts directory is only on sys.path while freqtrade imports the loss
+module, so this package is registered to be pickled by value to keep hyperopt
+workers working without the directory on their path.
+"""
+
+import sys
+
+from joblib.externals import cloudpickle
+
+from .components import COMPONENTS_KEY, LossComponents
+from .kernel import LossAccumulator, LossMetrics
+
+
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+
+__all__ = [
+    "COMPONENTS_KEY",
+    "LossAccumulator",
+    "LossComponents",
+    "LossMetrics",
+]
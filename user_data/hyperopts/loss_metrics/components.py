@@ -0,0 +1,53 @@
+"""
+Component breakdown of the hyperopt losses.
+
+Hyperopt only keeps the scalar a loss returns. A loss records the components it
+combines in a LossComponents (value and weight), times the metrics pass they are
+all read from, and publishes them into the backtest_stats dict hyperopt passes
+it. Hyperopt saves that dict as the epoch's results_metrics, so the breakdown
+ends up in the results file under results_metrics["loss_components"].
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+COMPONENTS_KEY = "loss_components"
+
+
+class LossComponents:
+    def __init__(self) -> None:
+        self.values: Dict[str, float] = {}
+        self.weights: Dict[str, float] = {}
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to component (or step) ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def record(self, name: str, value: float, weight: float = 1.0) -> float:
+        """Record the unweighted ``value`` of component ``name``, and return it."""
+        self.values[name] = float(value)
+        self.weights[name] = weight
+        return value
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Per component or timed step: value, weight and weighted value if recorded, seconds if timed."""
+        breakdown: Dict[str, Dict[str, float]] = {}
+        for name, value in self.values.items():
+            weight = self.weights[name]
+            breakdown[name] = {"value": value, "weight": weight, "weighted": weight * value}
+        for name, seconds in self.seconds.items():
+            breakdown.setdefault(name, {})["seconds"] = seconds
+        return breakdown
+
+    def publish(self, backtest_stats: Optional[Dict[str, Any]]) -> None:
+        """Store the breakdown in hyperopt's backtest_stats, if the loss got them."""
+        if backtest_stats is not None:
+            backtest_stats[COMPONENTS_KEY] = self.as_dict()
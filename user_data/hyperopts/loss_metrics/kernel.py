@@ -0,0 +1,292 @@
+"""
+Shared metrics kernel for the hyperopt losses.
+
+Computes the freqtrade.data.metrics values the losses combine (underwater curve,
+max drawdown, sharpe, sortino, calmar) plus the trade distribution penalty.
+LossMetrics reduces a complete results frame the way freqtrade does, so the
+losses see exactly the values of the functions they replace. LossAccumulator
+keeps running state updated one batch of trades at a time instead: nothing per
+trade is kept beyond the current batch, so memory stays flat however many
+trades an epoch produces, and the partial values can be checked to stop early.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+
+def _running_sum(carry: float, values: np.ndarray) -> float:
+    """
+    Sequential sum continuing from ``carry``. Unlike ndarray.sum()'s pairwise
+    summation, the result does not depend on how the values are split into batches.
+    """
+    return np.cumsum(np.r_[carry, values])[-1] if values.size else carry
+
+
+class _RunningStd:
+    """Population std of a stream, from sums shifted by the first value."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._shift: Optional[float] = None
+        self._sum = 0.0
+        self._squares = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        if not values.size:
+            return
+        if self._shift is None:
+            # Shifting keeps the sums small, and identical values give exactly 0.
+            self._shift = values[0]
+        deviations = values - self._shift
+        self.count += values.size
+        self._sum = _running_sum(self._sum, deviations)
+        self._squares = _running_sum(self._squares, deviations * deviations)
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return np.nan
+        variance = (self._squares - self._sum * self._sum / self.count) / self.count
+        return np.sqrt(variance) if variance > 0 or np.isnan(variance) else 0.0
+
+
+class LossAccumulator:
+    """
+    Metrics of one epoch's backtest results, updated from batches of trades.
+
+    Batches must arrive in close date order. Within a batch, trades are sorted like
+    freqtrade.data.metrics sorts them, so the values match the functions they
+    replace up to summation rounding, also with trades closing on the same date
+    (whose order changes the drawdowns), and including the ValueError cases:
+    ``has_drawdown`` is False where calculate_max_drawdown() raises ("No losing
+    trade, therefore no drawdown"). Split batches give the same values unless
+    trades closing on the same date straddle two batches. Only meant for partial
+    results, use LossMetrics for the final values of an epoch.
+    """
+
+    def __init__(
+        self,
+        starting_balance: float,
+        min_date: Optional[datetime] = None,
+        max_date: Optional[datetime] = None,
+    ) -> None:
+        self.starting_balance = starting_balance
+        self.trade_count = 0
+        if min_date is None or max_date is None or min_date == max_date:
+            self._period = None
+        else:
+            self._period = max(1, (max_date - min_date).days)
+
+        self.total_profit = 0.0
+        self.total_profit_ratio = 0.0
+        self._total_duration = 0
+        self._last_close = None
+        # Underwater curve: cumulative profit, its peak and the deepest drawdown so far
+        self._peak = -np.inf
+        self._min_drawdown = np.inf
+        self._max_drawdown_index = 0
+        self._max_drawdown_relative = 0.0
+        self._max_relative_drawdown = -np.inf
+        self._returns = _RunningStd()
+        self._returns_sum = 0.0
+        self._loss_returns = _RunningStd()
+        self.pair_counts: Dict[str, int] = {}
+
+    def update(self, trades: DataFrame) -> "LossAccumulator":
+        """Add a batch of trades closing no earlier than the previous batch."""
+        if trades.empty:
+            return self
+        # The order calculate_underwater()'s sort_values() gives, also among trades
+        # closing on the same date, which the drawdowns depend on.
+        order = trades["close_date"].reset_index(drop=True).sort_values().index.to_numpy()
+        close_dates = np.asarray(trades["close_date"].values, dtype="datetime64[ns]")[order]
+        if self._last_close is not None and close_dates[0] < self._last_close:
+            raise ValueError("Trade batches must be fed in close date order.")
+        self._last_close = close_dates[-1]
+
+        profit_abs = trades["profit_abs"].to_numpy(dtype=float)[order]
+        self._update_drawdown(profit_abs)
+        self.total_profit_ratio = _running_sum(
+            self.total_profit_ratio, trades["profit_ratio"].to_numpy(dtype=float)[order]
+        )
+        self._total_duration += int(trades["trade_duration"].to_numpy(dtype="int64").sum())
+
+        # A zero starting balance gives infinite returns, only read by sharpe / sortino.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = profit_abs / self.starting_balance
+            self._returns.update(returns)
+            self._returns_sum = _running_sum(self._returns_sum, returns)
+            self._loss_returns.update(returns[profit_abs < 0])
+
+        for pair, count in trades["pair"].value_counts(sort=False).items():
+            self.pair_counts[pair] = self.pair_counts.get(pair, 0) + int(count)
+        self.trade_count += len(trades)
+        return self
+
+    def _update_drawdown(self, profit_abs: np.ndarray) -> None:
+        cumulative = np.cumsum(np.r_[self.total_profit, profit_abs])[1:]
+        high_value = np.maximum.accumulate(np.r_[self._peak, cumulative])[1:]
+        drawdown = cumulative - high_value
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.starting_balance:
+                max_balance = self.starting_balance + high_value
+                relative = (max_balance - (self.starting_balance + cumulative)) / max_balance
+            else:
+                relative = (high_value - cumulative) / high_value
+
+        # First occurrence of the deepest drawdown, like np.argmin over all trades
+        deepest = int(np.argmin(drawdown))
+        if drawdown[deepest] < self._min_drawdown:
+            self._min_drawdown = drawdown[deepest]
+            self._max_drawdown_index = self.trade_count + deepest
+            self._max_drawdown_relative = relative[deepest]
+        self._max_relative_drawdown = np.max(np.r_[self._max_relative_drawdown, relative])
+        self.total_profit = cumulative[-1]
+        self._peak = high_value[-1]
+
+    @property
+    def mean_trade_duration(self) -> float:
+        return self._total_duration / self.trade_count if self.trade_count else np.nan
+
+    @property
+    def max_drawdown(self) -> float:
+        """abs(min(calculate_underwater()["drawdown"]))"""
+        if not self.trade_count:
+            raise ValueError("No trades, therefore no drawdown.")
+        return abs(self._min_drawdown)
+
+    @property
+    def max_relative_drawdown(self) -> float:
+        """max(calculate_underwater()["drawdown_relative"])"""
+        if not self.trade_count:
+            raise ValueError("No trades, therefore no drawdown.")
+        return self._max_relative_drawdown
+
+    @property
+    def has_drawdown(self) -> bool:
+        return self._max_drawdown_index != 0
+
+    @property
+    def drawdown_abs(self) -> float:
+        """calculate_max_drawdown().drawdown_abs, 0 without drawdown."""
+        return abs(self._min_drawdown) if self.has_drawdown else 0.0
+
+    @property
+    def relative_account_drawdown(self) -> float:
+        """calculate_max_drawdown().relative_account_drawdown, 0 without drawdown."""
+        return self._max_drawdown_relative if self.has_drawdown else 0.0
+
+    @property
+    def _up_stdev(self) -> float:
+        return self._returns.std
+
+    @property
+    def _down_stdev(self) -> float:
+        return self._loss_returns.std
+
+    @property
+    def _days_period(self) -> Optional[int]:
+        return self._period if self.trade_count else None
+
+    @property
+    def sharpe(self) -> float:
+        if self._days_period is None:
+            return 0
+        up_stdev = self._up_stdev
+        if up_stdev != 0:
+            return self._returns_sum / self._days_period / up_stdev * np.sqrt(365)
+        return -100
+
+    @property
+    def sortino(self) -> float:
+        if self._days_period is None:
+            return 0
+        down_stdev = self._down_stdev
+        if down_stdev != 0 and not np.isnan(down_stdev):
+            return self._returns_sum / self._days_period / down_stdev * np.sqrt(365)
+        return -100
+
+    @property
+    def calmar(self) -> float:
+        if self._days_period is None:
+            return 0
+        expected_returns_mean = self.total_profit / self.starting_balance / self._days_period * 100
+        if self.relative_account_drawdown != 0:
+            return expected_returns_mean / self.relative_account_drawdown * np.sqrt(365)
+        return -100
+
+    @property
+    def trade_distribution_penalty(self) -> float:
+        """Mean absolute deviation of the per-pair trade counts."""
+        trade_counts = np.fromiter(self.pair_counts.values(), dtype=float)
+        return np.abs(trade_counts - trade_counts.mean()).mean()
+
+
+class LossMetrics(LossAccumulator):
+    """
+    Metrics of a complete results frame.
+
+    Totals, drawdowns and standard deviations come from the same pandas / numpy
+    reductions freqtrade.data.metrics applies to the frame, so they are equal to
+    what those functions return rather than close to it. Not updated further,
+    feed batches to a LossAccumulator instead.
+    """
+
+    def __init__(
+        self,
+        results: DataFrame,
+        starting_balance: float,
+        min_date: Optional[datetime] = None,
+        max_date: Optional[datetime] = None,
+    ) -> None:
+        super().__init__(starting_balance, min_date, max_date)
+        profit_abs = results["profit_abs"]
+        self._mean_trade_duration = results["trade_duration"].mean()
+        # A zero starting balance gives infinite returns, only read by sharpe / sortino.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = profit_abs / starting_balance
+            self._returns_sum = returns.sum()
+            self._returns_std = np.std(returns)
+            self._loss_returns_std = np.std(returns[profit_abs < 0])
+        if results.empty:
+            return
+
+        self.trade_count = len(results)
+        self.total_profit = profit_abs.sum()
+        self.total_profit_ratio = results["profit_ratio"].sum()
+        self.pair_counts = {
+            pair: int(count) for pair, count in results["pair"].value_counts(sort=False).items()
+        }
+
+        # calculate_underwater() / calculate_max_drawdown()
+        profit_results = results.sort_values("close_date").reset_index(drop=True)
+        cumulative = profit_results["profit_abs"].cumsum()
+        high_value = cumulative.cummax()
+        drawdown = cumulative - high_value
+        if starting_balance:
+            max_balance = starting_balance + high_value
+            relative = (max_balance - (starting_balance + cumulative)) / max_balance
+        else:
+            relative = (high_value - cumulative) / high_value
+        self._max_drawdown_index = drawdown.idxmin()
+        self._min_drawdown = drawdown[self._max_drawdown_index]
+        self._max_drawdown_relative = relative[self._max_drawdown_index]
+        self._max_relative_drawdown = relative.max()
+
+    @property
+    def mean_trade_duration(self) -> float:
+        return self._mean_trade_duration
+
+    @property
+    def _up_stdev(self) -> float:
+        return self._returns_std
+
+    @property
+    def _down_stdev(self) -> float:
+        return self._loss_returns_std
+
+    def update(self, trades: DataFrame) -> "LossAccumulator":
+        raise TypeError("LossMetrics holds a complete results frame, use LossAccumulator for batches.")
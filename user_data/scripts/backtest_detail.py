@@ -0,0 +1,46 @@
+"""
+Run freqtrade backtesting with the detail candles served by detail_store.py.
+
+Takes the usual backtesting arguments. The --timeframe-detail candles are
+written once per pair and timerange to user_data/detail_cache and memory-mapped
+from there, instead of being loaded into one dataframe per pair. The candles are
+loaded from the memory-mapped store of ohlcv_store.py. ROI exits are priced
+from the pair's own ROI table (see pair_roi.py).
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/backtest_detail.py --config user_data/config.json \
+        --strategy AwesomeCombinationStrategy --timeframe-detail 5m --timerange 20240101-
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.optimize.backtesting import Backtesting
+
+from detail_store import install_lazy_detail
+from ohlcv_store import install_ohlcv_store
+from pair_roi import install_pair_roi
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detail-cache", type=Path, help="Detail candle store, user_data/detail_cache by default.")
+    args, backtesting_args = parser.parse_known_args(argv)
+
+    config = setup_optimize_configuration(
+        Arguments(["backtesting", *backtesting_args]).get_parsed_arg(), RunMode.BACKTEST
+    )
+    backtesting = Backtesting(config)
+    install_lazy_detail(backtesting, args.detail_cache)
+    install_ohlcv_store(backtesting)
+    install_pair_roi(backtesting)
+    backtesting.start()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+"""
+Benchmark the ema_macd helper (TA-Lib's function API on the close array)
+against the per-call abstract TA-Lib path.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/benchmark_indicators.py [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import talib.abstract as ta
+from pandas import DataFrame
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "strategies"))
+
+from AwesomeCombinationStrategy import AwesomeCombinationStrategy  # noqa: E402
+from awesome_combination import ema_macd  # noqa: E402
+
+
+def synthetic_ohlcv(rows: int, seed: int = 0) -> DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, rows)))
+    open_ = np.r_[close[0], close[:-1]]
+    return DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, rows)),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, rows)),
+        "close": close,
+        "volume": rng.uniform(10, 1000, rows),
+    })
+
+
+def talib_path(dataframe: DataFrame, ema_periods, macd_periods) -> DataFrame:
+    fast, slow, signal = macd_periods
+    for period in ema_periods:
+        dataframe[f"ema{period}"] = ta.EMA(dataframe, timeperiod=period)
+    macd = ta.MACD(dataframe, fastperiod=fast, slowperiod=slow, signalperiod=signal)
+    dataframe["macd"] = macd["macd"]
+    dataframe["macdsignal"] = macd["macdsignal"]
+    dataframe["macdhist"] = macd["macdhist"]
+    return dataframe
+
+
+def helper_path(dataframe: DataFrame, ema_periods, macd_periods) -> DataFrame:
+    emas, macd = ema_macd(dataframe["close"].to_numpy(), ema_periods, macd_periods)
+    for i, period in enumerate(ema_periods):
+        dataframe[f"ema{period}"] = emas[:, i]
+    dataframe["macd"] = macd[:, 0]
+    dataframe["macdsignal"] = macd[:, 1]
+    dataframe["macdhist"] = macd[:, 2]
+    return dataframe
+
+
+def best_time(func, dataframe: DataFrame, repeat: int, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        frame = dataframe.copy()
+        start = time.perf_counter()
+        func(frame, *args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ema_periods = AwesomeCombinationStrategy.ema_periods
+    macd_periods = AwesomeCombinationStrategy.macd_periods
+    dataframe = synthetic_ohlcv(args.rows)
+
+    talib_time = best_time(talib_path, dataframe, args.repeat, ema_periods, macd_periods)
+    helper_time = best_time(helper_path, dataframe, args.repeat, ema_periods, macd_periods)
+
+    reference = talib_path(dataframe.copy(), ema_periods, macd_periods)
+    result = helper_path(dataframe.copy(), ema_periods, macd_periods)
+    columns = [f"ema{period}" for period in ema_periods] + ["macd", "macdsignal", "macdhist"]
+    divergence = max(
+        np.nanmax(np.abs(result[c] - reference[c])) / np.nanmax(np.abs(reference[c])) for c in columns
+    )
+
+    print(f"rows:             {args.rows}")
+    print(f"ta-lib abstract:  {talib_time * 1000:.1f} ms")
+    print(f"ema_macd helper:  {helper_time * 1000:.1f} ms ({talib_time / helper_time:.2f}x)")
+    print(f"max divergence:   {divergence:.2e} (relative to column magnitude)")
+
+
+if __name__ == "__main__":
+    main()
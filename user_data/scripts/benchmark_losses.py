@@ -0,0 +1,188 @@
+"""
+Benchmark the hyperopt losses on synthetic backtest results.
+
+Times every loss under user_data/hyperopts (including archive/) at several trade
+counts, reports calls per second and peak memory per call, and compares the loss
+values with a stored reference, so a change meant to make an epoch cheaper
+cannot silently change what hyperopt optimizes. The reference holds the values
+of the original loss implementations; --hyperopts takes the losses from another
+checkout, e.g. to regenerate it.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/benchmark_losses.py [--trades 1000 10000 100000] [--repeat 5]
+        [--losses NAME ...] [--hyperopts DIR] [--save-reference]
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame, to_datetime
+
+from freqtrade.optimize.hyperopt import IHyperOptLoss
+
+
+HYPEROPTS_DIR = Path(__file__).resolve().parents[1] / "hyperopts"
+REFERENCE_FILE = Path(__file__).resolve().with_name("loss_benchmark_reference.json")
+
+STARTING_BALANCE = 1000
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAYS = 180
+
+
+def synthetic_results(trades: int, seed: int = 0, pairs: int = 40, stake: float = 100.0) -> DataFrame:
+    """
+    Backtest results with the columns the losses read, closing in date order like
+    freqtrade's. Trades open on 15m candles and run for whole 5m candles, so close
+    dates tie as they do with --timeframe-detail 5m.
+    """
+    rng = np.random.default_rng(seed)
+    open_minutes = rng.integers(0, DAYS * 24 * 4, trades) * 15
+    duration = np.maximum(5, np.round(rng.lognormal(np.log(240), 1.0, trades) / 5) * 5).astype(int)
+    profit_ratio = np.clip(rng.normal(0.001, 0.015, trades), -0.2, 0.3)
+    # Some pairs trade a lot more often than others
+    weights = 1 / np.arange(1, pairs + 1)
+    pair = rng.choice([f"PAIR{i}/USDT" for i in range(pairs)], trades, p=weights / weights.sum())
+
+    start = np.datetime64(START_DATE.replace(tzinfo=None), "m")
+    results = DataFrame({
+        "pair": pair,
+        "open_date": to_datetime(start + open_minutes, utc=True),
+        "close_date": to_datetime(start + open_minutes + duration, utc=True),
+        "trade_duration": duration,
+        "profit_ratio": profit_ratio,
+        "profit_abs": profit_ratio * stake,
+    })
+    return results.sort_values("close_date", kind="stable").reset_index(drop=True)
+
+
+def load_losses(
+    names: Optional[List[str]] = None, directory: Path = HYPEROPTS_DIR
+) -> Dict[str, Callable[..., float]]:
+    """hyperopt_loss_function of every IHyperOptLoss class defined in the hyperopts ``directory``."""
+    # For the helper packages the losses import, like freqtrade's loss resolver
+    sys.path.insert(0, str(directory))
+    losses = {}
+    for path in sorted([*directory.glob("*.py"), *directory.glob("archive/*.py")]):
+        spec = importlib.util.spec_from_file_location(f"benchmark_{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, obj in vars(module).items():
+            if (
+                isinstance(obj, type)
+                and issubclass(obj, IHyperOptLoss)
+                and obj.__module__ == module.__name__
+                and obj.__name__ == name
+                and (not names or name in names)
+            ):
+                losses[name] = obj.hyperopt_loss_function
+    return losses
+
+
+def loss_kwargs(results: DataFrame) -> Dict[str, Any]:
+    return {
+        "results": results,
+        "trade_count": len(results),
+        "min_date": START_DATE,
+        "max_date": START_DATE + timedelta(days=DAYS),
+        "config": {"dry_run_wallet": STARTING_BALANCE, "stake_currency": "USDT"},
+        "processed": {},
+        "backtest_stats": {},
+        "starting_balance": STARTING_BALANCE,
+    }
+
+
+def calls_per_second(func: Callable[[], Any], repeat: int) -> float:
+    # Enough calls per timing to measure something, at least one
+    start = time.perf_counter()
+    func()
+    number = max(1, int(0.2 / max(time.perf_counter() - start, 1e-6)))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return number / min(timings)
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def same_value(value: float, reference: float, rtol: float) -> bool:
+    if math.isnan(value) or math.isnan(reference):
+        return math.isnan(value) and math.isnan(reference)
+    return math.isclose(value, reference, rel_tol=rtol, abs_tol=rtol)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trades", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--losses", nargs="+", help="Only these loss classes.")
+    parser.add_argument(
+        "--hyperopts", type=Path, default=HYPEROPTS_DIR, help="Load the losses from this directory."
+    )
+    parser.add_argument("--rtol", type=float, default=1e-9, help="Tolerance of the value check.")
+    parser.add_argument(
+        "--save-reference", action="store_true", help=f"Store the values in {REFERENCE_FILE.name}."
+    )
+    args = parser.parse_args()
+
+    losses = load_losses(args.losses, args.hyperopts)
+    reference = json.loads(REFERENCE_FILE.read_text()) if REFERENCE_FILE.exists() else {}
+    values: Dict[str, Dict[str, float]] = {}
+    mismatches = 0
+
+    print(f"{'loss':<48} {'trades':>7} {'calls/s':>10} {'ms/call':>9} {'peak MiB':>9}  value")
+    for trades in args.trades:
+        kwargs = loss_kwargs(synthetic_results(trades))
+        for name, loss in losses.items():
+            def call():
+                return loss(**kwargs)
+
+            try:
+                value = float(call())
+            except Exception as e:
+                print(f"{name:<48} {trades:>7} failed: {e!r}")
+                continue
+            rate = calls_per_second(call, args.repeat)
+            peak = peak_memory(call) / 2**20
+
+            expected = reference.get(name, {}).get(str(trades))
+            if expected is None:
+                check = "(no reference)"
+            elif same_value(value, expected, args.rtol):
+                check = "ok"
+            else:
+                check = f"CHANGED, reference {expected!r}"
+                mismatches += 1
+            values.setdefault(name, {})[str(trades)] = value
+            print(f"{name:<48} {trades:>7} {rate:>10.1f} {1000 / rate:>9.2f} {peak:>9.2f}  {value!r} {check}")
+
+    if args.save_reference:
+        for name, by_trades in values.items():
+            reference.setdefault(name, {}).update(by_trades)
+        REFERENCE_FILE.write_text(json.dumps(reference, indent=2, sort_keys=True) + "\n")
+        print(f"Reference values saved to {REFERENCE_FILE}")
+    elif mismatches:
+        print(f"{mismatches} loss values differ from the reference.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Lazily loaded --timeframe-detail candles for backtesting and hyperopt.
+
+Backtesting loads the detail candles of every pair into one dataframe each,
+and filters the whole dataframe for the detail candles of every main candle
+it needs them for: those with an entry signal or an open trade. Hyperopt
+also pickles all of them with every batch of epochs.
+
+install_lazy_detail() writes the detail candles of every pair and timerange
+once to columnar .npy files instead (DetailStore) and serves them from
+memory-mapped arrays (LazyDetailData). A main candle's detail candles are found
+by binary search and sliced from a block of rows, and the blocks in use are
+kept in an LRU. Memory then follows the pairs with open trades instead of the
+total history of all pairs. The candles come from the store of ohlcv_store.py,
+which returns what freqtrade's load_pair_history() returns, so backtests do
+not change.
+"""
+
+import hashlib
+import logging
+import os
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from joblib.externals import cloudpickle
+from pandas import DataFrame, Timestamp, concat, to_datetime
+
+from freqtrade.configuration import TimeRange
+from freqtrade.enums import CandleType, TradingMode
+from freqtrade.exceptions import OperationalException
+from freqtrade.misc import pair_to_filename
+from freqtrade.optimize.backtesting import Backtesting
+
+from ohlcv_store import OHLCVStore
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt pickles its backtesting, and the detail data with it, for its workers.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+# Detail candles per LRU block, 1024 5m candles are about 3.5 days
+BLOCK_ROWS = 1024
+BLOCKS = 64
+
+
+class DetailStore:
+    """
+    Columnar .npy files of the detail candles of one (pair, timeframe,
+    timerange) each: the dates in ns and the prices as one float array. They are
+    keyed by the size and modification time of the pair's dates in the
+    OHLCVStore, so a new or incremental download rebuilds them. Files are written
+    atomically, so concurrent runs sharing the directory never read a partial file.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    def path(self, source: Path, pair: str, timeframe: str, timerange: TimeRange) -> Path:
+        stat = source.stat()
+        source_key = hashlib.sha1(repr((str(source), stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()
+        name = "-".join([
+            pair_to_filename(pair),
+            timeframe,
+            f"{timerange.startts}_{timerange.stopts}",
+            source_key[:16],
+        ])
+        return self.directory / name
+
+    def build(self, path: Path, candles: DataFrame) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "dates": candles["date"].astype("datetime64[ns, UTC]").astype(np.int64).to_numpy(),
+            "prices": candles[PRICE_COLUMNS].to_numpy(dtype=float),
+        }
+        for kind, values in arrays.items():
+            tmp_path = path.with_name(f"{path.name}.{kind}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, values)
+            os.replace(tmp_path, path.with_name(f"{path.name}.{kind}.npy"))
+
+    def load(self, backtesting: Backtesting, pairs) -> "LazyDetailData":
+        """The detail candles Backtesting.load_bt_data_detail() loads for ``pairs``, as LazyDetailData."""
+        config = backtesting.config
+        candle_type = config.get("candle_type_def", CandleType.SPOT)
+        ohlcv_store = OHLCVStore.from_config(config)
+        timerange = backtesting.timerange
+        files: Dict[str, Path] = {}
+        built = 0
+        for pair in pairs:
+            stored = ohlcv_store.build(pair, backtesting.timeframe_detail, candle_type)
+            if stored is None:
+                continue
+            # Keyed by the stored dates, which grow with incremental downloads
+            source = stored.with_name(f"{stored.name}.dates.npy")
+            path = self.path(source, pair, backtesting.timeframe_detail, timerange)
+            if not path.with_name(f"{path.name}.dates.npy").exists():
+                # One pair at a time, so loading holds a single pair's dataframe
+                candles = ohlcv_store.load(
+                    pair,
+                    backtesting.timeframe_detail,
+                    timerange=timerange,
+                    fill_up_missing=True,
+                    startup_candles=0,
+                    candle_type=candle_type,
+                )
+                if candles.empty:
+                    continue
+                self.build(path, candles)
+                built += 1
+            files[pair] = path
+        if not files:
+            raise OperationalException("No data found. Terminating.")
+        logger.info(
+            f"Serving {backtesting.timeframe_detail} detail candles of {len(files)} pairs from "
+            f"{self.directory} ({built} built)."
+        )
+        return LazyDetailData(files)
+
+
+class _DateBound:
+    """``detail["date"] >= start``, ``detail["date"] < end`` and their ``&``."""
+
+    def __init__(self, start: Optional[int] = None, end: Optional[int] = None) -> None:
+        self.start, self.end = start, end
+
+    def __and__(self, other: "_DateBound") -> "_DateBound":
+        return _DateBound(
+            self.start if other.start is None else other.start,
+            self.end if other.end is None else other.end,
+        )
+
+
+class _DateColumn:
+    @staticmethod
+    def _ns(time: datetime) -> int:
+        return Timestamp(time).value
+
+    def __ge__(self, time: datetime) -> _DateBound:
+        return _DateBound(start=self._ns(time))
+
+    def __lt__(self, time: datetime) -> _DateBound:
+        return _DateBound(end=self._ns(time))
+
+
+class _Locator:
+    def __init__(self, frame: "DetailFrame") -> None:
+        self.frame = frame
+
+    def __getitem__(self, bound: _DateBound) -> DataFrame:
+        return self.frame.window(bound.start, bound.end)
+
+
+class DetailFrame:
+    """
+    The detail candles of one pair, for the filter Backtesting.backtest()
+    applies to them:
+    ``frame.loc[(frame["date"] >= start) & (frame["date"] < end)]``.
+    """
+
+    def __init__(self, data: "LazyDetailData", pair: str) -> None:
+        self.data = data
+        self.pair = pair
+        self.loc = _Locator(self)
+
+    def __getitem__(self, column: str) -> _DateColumn:
+        if column != "date":
+            raise KeyError(f"Only the date column of {self.pair}'s detail candles can be filtered on, not {column}.")
+        return _DateColumn()
+
+    def __len__(self) -> int:
+        return len(self.arrays()[0])
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-mapped dates in ns and prices (PRICE_COLUMNS) of all detail candles."""
+        return self.data.arrays(self.pair)
+
+    def window(self, start: Optional[int], end: Optional[int]) -> DataFrame:
+        """Detail candles from ``start`` (ns, inclusive) to ``end`` (exclusive)."""
+        dates = self.arrays()[0]
+        first = 0 if start is None else int(np.searchsorted(dates, start, side="left"))
+        last = len(dates) if end is None else int(np.searchsorted(dates, end, side="left"))
+        if last <= first:
+            return self.data.block(self.pair, 0).iloc[0:0]
+        parts = []
+        for block in range(first // BLOCK_ROWS, (last - 1) // BLOCK_ROWS + 1):
+            offset = block * BLOCK_ROWS
+            parts.append(self.data.block(self.pair, block).iloc[max(first - offset, 0):last - offset])
+        return parts[0] if len(parts) == 1 else concat(parts)
+
+
+class LazyDetailData(Mapping):
+    """
+    Pair: DetailFrame mapping in place of Backtesting.detail_data. Opens the
+    files of a pair when first used, and keeps the last ``blocks`` blocks of
+    BLOCK_ROWS candles used as dataframes. Only the file names are pickled.
+    """
+
+    def __init__(self, files: Dict[str, Path], blocks: int = BLOCKS) -> None:
+        self.files = files
+        self.blocks = blocks
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._frames: Dict[str, DetailFrame] = {}
+        self._blocks: "OrderedDict[Tuple[str, int], DataFrame]" = OrderedDict()
+
+    def __getstate__(self) -> dict:
+        return {"files": self.files, "blocks": self.blocks}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["files"], state["blocks"])
+
+    def __getitem__(self, pair: str) -> DetailFrame:
+        if pair not in self.files:
+            raise KeyError(pair)
+        if pair not in self._frames:
+            self._frames[pair] = DetailFrame(self, pair)
+        return self._frames[pair]
+
+    def __contains__(self, pair) -> bool:
+        return pair in self.files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def arrays(self, pair: str) -> Tuple[np.ndarray, np.ndarray]:
+        if pair not in self._arrays:
+            path = self.files[pair]
+            self._arrays[pair] = (
+                np.load(path.with_name(f"{path.name}.dates.npy"), mmap_mode="r"),
+                np.load(path.with_name(f"{path.name}.prices.npy"), mmap_mode="r"),
+            )
+        return self._arrays[pair]
+
+    def block(self, pair: str, block: int) -> DataFrame:
+        """Block ``block`` of BLOCK_ROWS detail candles of ``pair`` as a dataframe."""
+        key = (pair, block)
+        if key in self._blocks:
+            self._blocks.move_to_end(key)
+            return self._blocks[key]
+        dates, prices = self.arrays(pair)
+        rows = slice(block * BLOCK_ROWS, (block + 1) * BLOCK_ROWS)
+        frame = DataFrame(np.array(prices[rows]), columns=PRICE_COLUMNS)
+        frame.insert(0, "date", to_datetime(np.array(dates[rows]), utc=True))
+        self._blocks[key] = frame
+        if len(self._blocks) > self.blocks:
+            self._blocks.popitem(last=False)
+        return frame
+
+
+def install_lazy_detail(backtesting: Backtesting, directory: Optional[Path] = None) -> None:
+    """Serve the detail candles of ``backtesting`` from a DetailStore (spot only)."""
+    load_bt_data_detail = backtesting.load_bt_data_detail
+    store = DetailStore(directory or Path(backtesting.config["user_data_dir"]) / "detail_cache")
+
+    def load_lazy_detail() -> None:
+        if not backtesting.timeframe_detail or backtesting.trading_mode != TradingMode.SPOT:
+            # Futures load funding and mark rates in the same step
+            load_bt_data_detail()
+            return
+        backtesting.detail_data = store.load(backtesting, backtesting.pairlists.whitelist)
+
+    backtesting.load_bt_data_detail = load_lazy_detail
@@ -0,0 +1,167 @@
+"""
+Download the candles since the last stored one into the store of ohlcv_store.py.
+
+`freqtrade download-data` loads the whole data file of every pair and timeframe
+to find its last candle, and writes the whole file again after downloading. This
+reads the last stored candle from the memory-mapped dates of the store instead,
+fetches the candles since, and appends them to the store files in place (see
+OHLCVStore.append()), so a daily refresh reads and writes a few KB per pair.
+The seam is checked: new candles must continue the stored ones on the
+timeframe's grid, and missing candles are logged. Pairs without stored data, a
+timerange starting before it, or new candles failing the check are downloaded
+in full by freqtrade's download-data instead, into its data files, from which
+the store is rebuilt.
+
+Runs that read the store (ohlcv_store.py: hyperopt_pruned.py --ohlcv-store,
+optimize_spaces.py, backtest_detail.py, and detail_store.py) see the new
+candles. Plain freqtrade commands read the data files, which only `make
+download-data` updates.
+
+Takes the usual download-data arguments. Other trading modes, --dl-trades,
+--erase and --prepend run download-data itself.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/download_incremental.py --config user_data/config.json \
+        --timeframes 5m 15m --timerange 20240101- [--store user_data/ohlcv_store]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from freqtrade.commands import Arguments
+from freqtrade.configuration import TimeRange, setup_utils_configuration
+from freqtrade.constants import DL_DATA_TIMEFRAMES
+from freqtrade.data.history import download_data_main, refresh_backtest_ohlcv_data
+from freqtrade.enums import CandleType, RunMode, TradingMode
+from freqtrade.exceptions import OperationalException
+from freqtrade.exchange import Exchange
+from freqtrade.plugins.pairlist.pairlist_helpers import dynamic_expand_pairlist
+from freqtrade.resolvers import ExchangeResolver
+
+from ohlcv_store import OHLCVStore
+
+
+logger = logging.getLogger("download_incremental")
+
+
+def update_pair(
+    store: OHLCVStore,
+    exchange: Exchange,
+    pair: str,
+    timeframe: str,
+    timerange: TimeRange,
+    candle_type: CandleType = CandleType.SPOT,
+) -> Optional[int]:
+    """
+    Append the candles of ``pair`` since its last stored one and return how
+    many there were, or None if the pair needs a full download.
+    """
+    path = store.build(pair, timeframe, candle_type)
+    if path is None:
+        return None
+    dates, _ = store.arrays(path)
+    if not len(dates) or (timerange.starttype == "date" and timerange.startts * 10**9 < dates[0]):
+        return None
+    # From the last stored candle on, which the store skips, so the seam is checked
+    candles = exchange.get_historic_ohlcv(
+        pair=pair,
+        timeframe=timeframe,
+        since_ms=int(dates[-1]) // 10**6,
+        candle_type=candle_type,
+        until_ms=timerange.stopts * 1000 if timerange.stoptype == "date" else None,
+    )
+    try:
+        return store.append(path, candles, timeframe)
+    except OperationalException as e:
+        logger.warning(f"{e} Downloading {pair} {timeframe} in full.")
+        return None
+
+
+def update_data(
+    store: OHLCVStore,
+    exchange: Exchange,
+    pairs: List[str],
+    timeframes: List[str],
+    timerange: TimeRange,
+    new_pairs_days: int = 30,
+) -> Dict[str, int]:
+    """Update the spot candles of ``pairs`` in ``store``, appending where possible."""
+    counts = {"pairs": 0, "candles": 0, "full": 0}
+    for timeframe in timeframes:
+        full = []
+        for pair in pairs:
+            if pair not in exchange.markets:
+                logger.info(f"Skipping pair {pair}...")
+                continue
+            appended = update_pair(store, exchange, pair, timeframe, timerange)
+            if appended is None:
+                full.append(pair)
+            else:
+                counts["pairs"] += 1
+                counts["candles"] += appended
+        if full:
+            refresh_backtest_ohlcv_data(
+                exchange,
+                pairs=full,
+                timeframes=[timeframe],
+                datadir=store.datadir,
+                trading_mode=TradingMode.SPOT,
+                timerange=timerange,
+                new_pairs_days=new_pairs_days,
+                data_format=store.data_format,
+            )
+            for pair in full:
+                store.build(pair, timeframe)
+            counts["full"] += len(full)
+    return counts
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", type=Path, help="Store directory, user_data/ohlcv_store/<exchange> by default.")
+    args, download_args = parser.parse_known_args(argv)
+
+    config = setup_utils_configuration(
+        Arguments(["download-data", *download_args]).get_parsed_arg(), RunMode.UTIL_EXCHANGE
+    )
+    if (
+        config.get("trading_mode", TradingMode.SPOT) != TradingMode.SPOT
+        or config.get("download_trades")
+        or config.get("erase")
+        or config.get("prepend_data")
+    ):
+        download_data_main(config)
+        return
+
+    timerange = TimeRange()
+    if "days" in config:
+        timerange = TimeRange.parse_timerange(f"{datetime.now() - timedelta(days=config['days']):%Y%m%d}-")
+    if "timerange" in config:
+        timerange = TimeRange.parse_timerange(config["timerange"])
+    # Same as download-data: no stake currency checks
+    config["stake_currency"] = ""
+    exchange = ExchangeResolver.load_exchange(config, validate=False)
+    pairs = dynamic_expand_pairlist(
+        config, list(exchange.get_markets(tradable_only=True, active_only=not config.get("include_inactive")))
+    )
+    timeframes = config.get("timeframes", DL_DATA_TIMEFRAMES)
+    for timeframe in timeframes:
+        exchange.validate_timeframes(timeframe)
+
+    start = time.perf_counter()
+    counts = update_data(
+        OHLCVStore.from_config(config, args.store), exchange, pairs, timeframes, timerange, config["new_pairs_days"]
+    )
+    print(
+        f"Appended {counts['candles']} candles to {counts['pairs']} pair files, "
+        f"downloaded {counts['full']} in full, in {time.perf_counter() - start:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,230 @@
+"""
+Indexed store of hyperopt epochs.
+
+freqtrade writes every epoch as one JSON line of its .fthypt results file, so
+listing or comparing epochs reads and parses the whole file. EpochStore appends
+every epoch to an SQLite database as well: the loss, the metrics the losses are
+built from (profit, drawdown, sharpe, sortino, calmar, holding time, trade
+count) as indexed columns, the epoch's time breakdown (see epoch_timing.py),
+and the parameters and loss components as JSON. A query such as the best
+20 epochs with less than 10% drawdown and more than 1000 trades then reads a
+few index pages instead of the results file.
+"""
+
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from joblib.externals import cloudpickle
+
+from freqtrade.optimize.hyperopt import Hyperopt
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt pickles itself with the hook below for its workers.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+# Column: key in the epoch's results_metrics
+METRICS = {
+    "profit_total": "profit_total",
+    "profit_total_abs": "profit_total_abs",
+    "max_drawdown": "max_drawdown_account",
+    "max_drawdown_abs": "max_drawdown_abs",
+    "sharpe": "sharpe",
+    "sortino": "sortino",
+    "calmar": "calmar",
+    "profit_factor": "profit_factor",
+    "expectancy": "expectancy",
+    "winrate": "winrate",
+    "holding_avg_s": "holding_avg_s",
+    "trades": "total_trades",
+}
+# Keys of the epoch's epoch_timing
+TIMINGS = ("epoch_s", "backtest_s", "stats_s", "loss_s")
+INDEXED = ("loss", "profit_total", "max_drawdown", "sharpe", "sortino", "trades")
+# Added after the first version of the table
+ADDED_COLUMNS = {**{column: "REAL" for column in TIMINGS}, "components": "TEXT"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    strategy TEXT,
+    hyperopt_loss TEXT,
+    spaces TEXT,
+    timerange TEXT,
+    created TEXT
+);
+CREATE TABLE IF NOT EXISTS epochs (
+    run TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    loss REAL,
+    is_best INTEGER,
+    pruned INTEGER,
+    {", ".join(f"{column} {'INTEGER' if column == 'trades' else 'REAL'}" for column in METRICS)},
+    params TEXT,
+    {", ".join(f"{column} {kind}" for column, kind in ADDED_COLUMNS.items())},
+    PRIMARY KEY (run, epoch)
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS epochs_{column} ON epochs ({column});" for column in INDEXED)}
+"""
+
+COLUMNS = ("run", "epoch", "loss", "is_best", "pruned", *METRICS, "params", *TIMINGS, "components")
+OPERATORS = ("<", "<=", "=", ">=", ">", "!=")
+
+
+def epoch_row(run: str, epoch: Dict[str, Any]) -> Tuple:
+    """The epochs table row of one hyperopt result dict."""
+    metrics = epoch.get("results_metrics", {})
+    timing = epoch.get("epoch_timing", {})
+    return (
+        run,
+        epoch["current_epoch"],
+        epoch["loss"],
+        bool(epoch.get("is_best")),
+        bool(epoch.get("pruned")),
+        *(metrics.get(key) for key in METRICS.values()),
+        json.dumps(epoch.get("params_dict", {}), default=str),
+        *(timing.get(key) for key in TIMINGS),
+        json.dumps(metrics.get("loss_components", {})),
+    )
+
+
+class EpochStore:
+    """SQLite epoch store. The connection is opened on first use, so a store can be forked or pickled."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._read_only_connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "_connection": None, "_read_only_connection": None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Parallel space hyperopts write from several processes
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            existing = {row["name"] for row in self._connection.execute("PRAGMA table_info(epochs)")}
+            for column, kind in ADDED_COLUMNS.items():
+                if column not in existing:
+                    self._connection.execute(f"ALTER TABLE epochs ADD COLUMN {column} {kind}")
+        return self._connection
+
+    @property
+    def read_only_connection(self) -> sqlite3.Connection:
+        """Connection for queries, which may contain SQL from the command line."""
+        if self._read_only_connection is None:
+            self.connection  # Creates or upgrades the tables
+            self._read_only_connection = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=30
+            )
+            self._read_only_connection.row_factory = sqlite3.Row
+        return self._read_only_connection
+
+    def close(self) -> None:
+        if self._read_only_connection is not None:
+            self._read_only_connection.close()
+            self._read_only_connection = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def add_run(self, run: str, config: Dict[str, Any]) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run,
+                    config.get("strategy"),
+                    config.get("hyperopt_loss"),
+                    " ".join(config.get("spaces", [])),
+                    config.get("timerange"),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def append(self, run: str, epochs: Iterable[Dict[str, Any]]) -> int:
+        """Add epochs of ``run``, replacing stored ones with the same number."""
+        rows = [epoch_row(run, epoch) for epoch in epochs]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO epochs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+        return len(rows)
+
+    def query(
+        self,
+        conditions: Sequence[Tuple[str, Any]] = (),
+        runs: Sequence[str] = (),
+        where: Optional[str] = None,
+        order_by: str = "loss",
+        descending: bool = False,
+        limit: Optional[int] = 20,
+    ) -> List[sqlite3.Row]:
+        """
+        Epochs of ``runs`` (all by default) matching all ``conditions``, e.g.
+        [("max_drawdown <", 0.1), ("trades >", 1000)], and the SQL expression
+        ``where``, best ``order_by`` first. Runs on a read-only connection.
+        """
+        if order_by not in COLUMNS:
+            raise ValueError(f"Cannot order by {order_by!r}, use one of {', '.join(COLUMNS)}.")
+        clauses = []
+        for condition, _ in conditions:
+            column, _, operator = condition.partition(" ")
+            if column not in COLUMNS or operator not in OPERATORS:
+                raise ValueError(
+                    f"Cannot filter on {condition!r}, use '<column> <operator>' with one of "
+                    f"{', '.join(COLUMNS)} and one of {' '.join(OPERATORS)}."
+                )
+            clauses.append(f"{column} {operator} ?")
+        parameters = [value for _, value in conditions]
+        if runs:
+            clauses.append(f"run IN ({', '.join('?' * len(runs))})")
+            parameters += runs
+        if where:
+            clauses.append(f"({where})")
+        sql = "SELECT epochs.*, runs.hyperopt_loss, runs.spaces FROM epochs LEFT JOIN runs USING (run)"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.read_only_connection.execute(sql, parameters).fetchall()
+
+    def epoch_count(self, run: str) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM epochs WHERE run = ?", (run,)).fetchone()[0]
+
+    def list_runs(self) -> List[sqlite3.Row]:
+        return self.connection.execute(
+            "SELECT runs.*, COUNT(epoch) AS epochs, MIN(loss) AS best_loss "
+            "FROM runs LEFT JOIN epochs USING (run) GROUP BY run ORDER BY created"
+        ).fetchall()
+
+
+def install_epoch_store(hyperopt: Hyperopt, store: EpochStore) -> None:
+    """Append every epoch ``hyperopt`` saves to its results file to ``store`` as well."""
+    save_result = hyperopt._save_result
+    runs = set()
+
+    def _save_result(epoch: Dict[str, Any]) -> None:
+        save_result(epoch)
+        # Named after the results file, which is only final once the run started
+        run = hyperopt.results_file.stem
+        if run not in runs:
+            store.add_run(run, hyperopt.config)
+            runs.add(run)
+        store.append(run, [epoch])
+
+    hyperopt._save_result = _save_result
@@ -0,0 +1,75 @@
+"""
+Per-epoch time breakdown of hyperopt.
+
+Wraps one Hyperopt instance to time every epoch: the backtest, the strategy
+stats freqtrade generates for the results, the loss function and the rest
+(parameter assignment, loading the preprocessed data). The times are added to
+the epoch's result as "epoch_timing" in seconds, so they are saved in the
+results file next to the loss components the losses record (see
+loss_metrics.LossComponents).
+"""
+
+import sys
+import time
+from typing import Any, Dict, List
+
+from joblib.externals import cloudpickle
+
+from freqtrade.optimize.hyperopt import Hyperopt
+
+
+# Hyperopt workers unpickle the hooks below without this directory on their path.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+TIMING_KEY = "epoch_timing"
+
+
+class EpochTimer:
+    def __init__(self, hyperopt: Hyperopt) -> None:
+        self._seconds: Dict[str, float] = {}
+        self._generate_optimizer = hyperopt.generate_optimizer
+        self._backtest = hyperopt.backtesting.backtest
+        self._get_results_dict = hyperopt._get_results_dict
+        self._calculate_loss = hyperopt.calculate_loss
+        hyperopt.generate_optimizer = self.generate_optimizer
+        hyperopt.backtesting.backtest = self.backtest
+        hyperopt._get_results_dict = self.get_results_dict
+        hyperopt.calculate_loss = self.calculate_loss
+
+    def _timed(self, name: str, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self._seconds[name] = self._seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def backtest(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._timed("backtest", self._backtest, *args, **kwargs)
+
+    def get_results_dict(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._timed("results", self._get_results_dict, *args, **kwargs)
+
+    def calculate_loss(self, *args, **kwargs) -> float:
+        return self._timed("loss", self._calculate_loss, *args, **kwargs)
+
+    def generate_optimizer(self, raw_params: List[Any]) -> Dict[str, Any]:
+        """Worker process: one epoch, with its time breakdown."""
+        self._seconds = {}
+        result = self._timed("epoch", self._generate_optimizer, raw_params)
+        seconds = self._seconds
+        epoch, backtest = seconds["epoch"], seconds.get("backtest", 0.0)
+        results, loss = seconds.get("results", 0.0), seconds.get("loss", 0.0)
+        result[TIMING_KEY] = {
+            "epoch_s": epoch,
+            "backtest_s": backtest,
+            # generate_strategy_stats() and the results explanation
+            "stats_s": results - loss,
+            "loss_s": loss,
+            "other_s": epoch - backtest - results,
+        }
+        return result
+
+
+def install_epoch_timing(hyperopt: Hyperopt) -> None:
+    """Add the time breakdown of every epoch of ``hyperopt`` to its result."""
+    EpochTimer(hyperopt)
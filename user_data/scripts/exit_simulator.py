@@ -0,0 +1,618 @@
+"""
+Vectorized exit simulation for the roi, stoploss and trailing hyperopt spaces.
+
+These spaces only change minimal_roi, stoploss and the trailing_stop_* values.
+The entry and exit signals, and the candles a trade can run over, are the same
+in every epoch, yet each epoch replays the whole candle-by-candle backtest.
+build_paths() runs the signals once before hyperopt starts and stores every
+pair's candles as the backtest walks them: its (detail) candles, signals and
+entry candidates. ExitSimulator then replaces the backtest of every epoch by
+an event loop over the entry candidates.
+
+A trade's exit is found by a vectorized first-hit search over its forward
+candles. The search covers the stoploss (custom and trailing included), the ROI
+table and the exit signal. Only the candles it cannot rule out are evaluated
+by freqtrade's own should_exit(). Entries, stakes, the wallet, exit orders and
+protections still go through Backtesting's own methods, called in the order
+backtest() calls them, so an epoch produces the same trades as the regular
+backtest.
+
+Configurations the event loop cannot reproduce keep the regular backtest:
+ - other hyperopt spaces (they change the signals)
+ - shorts, futures and position adjustment
+ - bot_loop_start() or custom_exit()
+ - a custom_stoploss() without custom_stoploss_vectorized()
+
+The first epochs run both ways (``verify``). If their trades differ, the
+simulator is switched off for the rest of the run.
+"""
+
+import atexit
+import heapq
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from ccxt import DECIMAL_PLACES, TICK_SIZE
+from joblib import dump, load
+from joblib.externals import cloudpickle
+from pandas import DataFrame, Timestamp
+
+from freqtrade.data.btanalysis import trade_list_to_dataframe
+from freqtrade.data.converter import trim_dataframe
+from freqtrade.enums import TradingMode
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.optimize.backtesting import (
+    DATE_IDX,
+    ELONG_IDX,
+    HEADERS,
+    HIGH_IDX,
+    LONG_IDX,
+    LOW_IDX,
+    OPEN_IDX,
+    Backtesting,
+)
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+from freqtrade.persistence import LocalTrade, PairLocks
+from freqtrade.resolvers.strategy_resolver import check_override
+from freqtrade.strategy import IStrategy
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt workers unpickle the hooks below without this directory on their path.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+# Spaces the simulation covers
+EXIT_SPACES = ("roi", "stoploss", "trailing")
+# Spaces that change the signals, or trades the event loop does not model
+SIGNAL_SPACES = ("buy", "sell", "protection", "trades")
+# Called on every candle, which the event loop skips
+CANDLE_CALLBACKS = ("bot_loop_start", "custom_exit")
+VERIFY_KEY = "exit_simulator"
+NANOSECONDS = 1_000_000_000
+# Forward candles searched at once
+MAX_CHUNK = 2048
+# Profits are compared within this margin, the exact comparison is left to should_exit()
+PROFIT_TOLERANCE = 1e-9
+
+
+class UnsupportedData(Exception):
+    """The candles do not follow the backtest's time grid."""
+
+
+class UnsupportedEpoch(Exception):
+    """The epoch does something the event loop does not reproduce, such as an unfilled order."""
+
+
+def unsupported(hyperopt: Hyperopt) -> Optional[str]:
+    """Why the exit simulator cannot replace the backtest of ``hyperopt``, if it cannot."""
+    config, backtesting = hyperopt.config, hyperopt.backtesting
+    strategy = backtesting.strategy
+    spaces = [space for space in SIGNAL_SPACES if HyperoptTools.has_space(config, space)]
+    if spaces:
+        return f"the {', '.join(spaces)} space(s) change the signals of every epoch"
+    if hyperopt.analyze_per_epoch:
+        return "--analyze-per-epoch recomputes the indicators of every epoch"
+    if backtesting.trading_mode != TradingMode.SPOT or backtesting._can_short:
+        return f"only long spot trades are simulated, not {backtesting.trading_mode.value}"
+    if backtesting._position_stacking or strategy.position_adjustment_enable:
+        return "position stacking and adjustment open several entries per pair"
+    for callback in CANDLE_CALLBACKS:
+        if check_override(strategy, IStrategy, callback):
+            return f"{callback}() is called on every candle"
+    if strategy.use_custom_stoploss and not hasattr(strategy, "custom_stoploss_vectorized"):
+        return "custom_stoploss() has no custom_stoploss_vectorized() to search the stoploss with"
+    if strategy.order_types.get("stoploss_on_exchange") and not config["dry_run"]:
+        return "stoploss on exchange outside dry-run"
+    return None
+
+
+def _nanoseconds(dates) -> np.ndarray:
+    return np.asarray(dates.values).astype("datetime64[ns]").astype(np.int64)
+
+
+def _detail_arrays(candles) -> Tuple[np.ndarray, np.ndarray]:
+    """Dates in ns and open, high, low, close of detail candles, also served by detail_store.py."""
+    if hasattr(candles, "arrays"):
+        dates, prices = candles.arrays()
+        return np.asarray(dates), np.asarray(prices[:, :4], dtype=float)
+    return _nanoseconds(candles["date"]), candles[["open", "high", "low", "close"]].to_numpy(dtype=float)
+
+
+def build_paths(backtesting: Backtesting, processed: Dict[str, DataFrame], start_date, end_date) -> Dict[str, Any]:
+    """
+    The candles of every pair as Backtesting.backtest() walks them, with the
+    signals shifted as in Backtesting._get_ohlcv_as_lists(), and the entry
+    candidates of all pairs in time order.
+
+    A pair's main candles carry the signals. Its path holds the candles exits
+    are checked on: the detail candles of every main candle, or the main candle
+    itself if it has none.
+    """
+    strategy = backtesting.strategy
+    step = int(backtesting.timeframe_td.total_seconds()) * NANOSECONDS
+    first = int(start_date.timestamp()) * NANOSECONDS + step
+    last = int(end_date.timestamp()) * NANOSECONDS
+    detail = backtesting.detail_data if backtesting.timeframe_detail else {}
+    detail_step = timeframe_to_seconds(backtesting.timeframe_detail) * NANOSECONDS if detail else 0
+
+    pairs: Dict[str, Dict[str, Any]] = {}
+    entries = []
+    for pair, candles in processed.items():
+        analyzed = strategy.ft_advise_signals(candles, {"pair": pair})
+        analyzed = trim_dataframe(analyzed, backtesting.timerange, startup_candles=backtesting.required_startup)
+        signals = np.zeros((max(len(analyzed) - 1, 0), 4))
+        tags: Dict[str, Dict[int, Any]] = {}
+        for column in HEADERS[5:]:
+            if column not in analyzed.columns:
+                continue
+            if column in ("enter_tag", "exit_tag"):
+                values = analyzed[column].replace([np.nan], [None]).shift(1).iloc[1:].tolist()
+                tags[column] = {row: value for row, value in enumerate(values) if value is not None}
+            else:
+                shifted = analyzed[column].replace([np.nan], [0]).shift(1).iloc[1:]
+                signals[:, HEADERS.index(column) - 5] = shifted.to_numpy(dtype=float)
+        analyzed = analyzed.iloc[1:]
+        if analyzed.empty:
+            continue
+
+        dates = _nanoseconds(analyzed["date"])
+        ohlc = analyzed[["open", "high", "low", "close"]].to_numpy(dtype=float)
+        processed_rows = int(np.searchsorted(dates, last, side="right"))
+        walked = dates[:processed_rows]
+        if walked.size and (walked[0] < first or np.any((walked - first) % step) or np.any(np.diff(walked) <= 0)):
+            raise UnsupportedData(f"{pair} has candles off the {backtesting.timeframe} grid of the timerange")
+
+        sizes = np.ones(len(dates), dtype=np.int64)
+        path_dates, path_ohlc = dates, ohlc
+        if pair in detail and not detail[pair].empty:
+            detail_dates, detail_ohlc = _detail_arrays(detail[pair])
+            low = np.searchsorted(detail_dates, dates, side="left")
+            counts = np.searchsorted(detail_dates, dates + step, side="left") - low
+            sizes = np.where(counts > 0, counts, 1)
+            path_row = np.repeat(np.arange(len(dates)), sizes)
+            offset = np.arange(path_row.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            from_detail = (counts > 0)[path_row]
+            position = np.minimum(low[path_row] + offset, detail_dates.size - 1)
+            path_dates = np.where(from_detail, detail_dates[position], dates[path_row])
+            path_ohlc = np.where(from_detail[:, None], detail_ohlc[position], ohlc[path_row])
+            # Detail candles are processed at the main candle's time plus one detail step per candle
+            if np.any(from_detail & (path_dates != dates[path_row] + offset * detail_step)):
+                raise UnsupportedData(f"{pair} has gaps in its {backtesting.timeframe_detail} detail candles")
+        path_start = np.concatenate(([0], np.cumsum(sizes)))
+        path_row = np.repeat(np.arange(len(dates)), sizes)
+
+        exit_signal = (signals[:, 1] != 0) & (signals[:, 0] == 0)
+        if not strategy.use_exit_signal:
+            exit_signal[:] = False
+        path_exit = exit_signal[path_row]
+        exit_rows = np.flatnonzero(path_exit)
+        next_exit = np.append(exit_rows, path_row.size)[np.searchsorted(exit_rows, np.arange(path_row.size))]
+
+        # Backtesting.check_for_trade_entry(), never on the last candle
+        entry = (signals[:, 0] == 1) & (signals[:, 1] != 1)
+        entry[processed_rows:] = False
+        entry &= dates != last
+        rows = np.flatnonzero(entry)
+        entries.append((dates[rows], np.full(rows.size, len(pairs)), rows))
+
+        pairs[pair] = {
+            "dates": dates,
+            "ohlc": ohlc,
+            "signals": signals,
+            "enter_tags": tags.get("enter_tag", {}),
+            "exit_tags": tags.get("exit_tag", {}),
+            "processed_rows": processed_rows,
+            "path_start": path_start,
+            "path_row": path_row,
+            "path_dates": path_dates,
+            "path_ohlc": path_ohlc,
+            "path_exit": path_exit,
+            "path_next_exit": next_exit,
+        }
+
+    names = list(pairs)
+    times, indexes, rows = (np.concatenate(parts) for parts in zip(*entries)) if entries else ([], [], [])
+    order = np.lexsort((indexes, times))
+    walked = [index for index, pair in enumerate(names) if pairs[pair]["processed_rows"]]
+    return {
+        "names": names,
+        "pairs": [pairs[pair] for pair in names],
+        # Backtesting keys its open trades per pair in the order it first walks the pairs
+        "first_walked": sorted(walked, key=lambda index: (pairs[names[index]]["dates"][0], index)),
+        "entry_time": np.asarray(times, dtype=np.int64)[order],
+        "entry_pair": np.asarray(indexes, dtype=np.int64)[order],
+        "entry_row": np.asarray(rows, dtype=np.int64)[order],
+    }
+
+
+def _row(dates: np.ndarray, ohlc: np.ndarray, row: int, path: Dict[str, Any], main: int) -> tuple:
+    """A Backtesting row tuple (see HEADERS) of candle ``row`` of main candle ``main``."""
+    return (
+        Timestamp(int(dates[row]), tz="UTC"),
+        *ohlc[row].tolist(),
+        *path["signals"][main].tolist(),
+        path["enter_tags"].get(main),
+        path["exit_tags"].get(main),
+    )
+
+
+def _round_up_bound(trade: LocalTrade, prices: np.ndarray) -> np.ndarray:
+    """An upper bound of price_to_precision(ROUND_UP), which adjust_stop_loss() rounds stops with."""
+    finite = np.isfinite(prices)
+    magnitude = np.abs(np.where(finite, prices, 0.0))
+    precision, mode = trade.price_precision, trade.precision_mode_price
+    step: Any = 0.0
+    if precision is not None and mode is not None:
+        if mode == TICK_SIZE:
+            step = precision
+        elif mode == DECIMAL_PLACES:
+            step = 10.0 ** -precision
+        else:
+            step = magnitude * 10.0 ** (1 - precision)
+    return np.where(finite, prices + step + magnitude * 1e-9 + 1e-12, prices)
+
+
+@dataclass
+class OpenTrade:
+    trade: LocalTrade
+    # Path candle of the next exit should_exit() returned, and the exits it returned
+    exit_row: Optional[int]
+    exits: Optional[list]
+
+
+class EpochSimulation:
+    """The event loop of one epoch, see the module docstring."""
+
+    def __init__(self, backtesting: Backtesting, paths: Dict[str, Any]) -> None:
+        self.backtesting = backtesting
+        self.strategy = backtesting.strategy
+        self.paths = paths
+        self.names: List[str] = paths["names"]
+        self.open: Dict[int, OpenTrade] = {}
+        # (main candle time, pair) of the scheduled exits
+        self.due: List[Tuple[int, int]] = []
+        # Per-pair ROI of strategies with their own tables, minimal_roi otherwise
+        self.roi_thresholds = getattr(self.strategy, "roi_thresholds", None)
+        roi = sorted(self.strategy.minimal_roi.items())
+        self.roi_minutes = np.array([minutes for minutes, _ in roi], dtype=float)
+        self.roi_values = np.array([value for _, value in roi], dtype=float)
+
+    def run(self) -> Dict[str, Any]:
+        backtesting = self.backtesting
+        backtesting.prepare_backtest(backtesting.enable_protections)
+        backtesting.wallets.update()
+        for index in self.paths["first_walked"]:
+            LocalTrade.bt_trades_open_pp[self.names[index]]
+
+        times, pairs, rows = self.paths["entry_time"], self.paths["entry_pair"], self.paths["entry_row"]
+        next_entry, count = 0, len(times)
+        while next_entry < count or self.due:
+            now = min(
+                int(times[next_entry]) if next_entry < count else sys.maxsize,
+                self.due[0][0] if self.due else sys.maxsize,
+            )
+            due = set()
+            while self.due and self.due[0][0] == now:
+                due.add(heapq.heappop(self.due)[1])
+            entering = {}
+            while next_entry < count and times[next_entry] == now:
+                entering[int(pairs[next_entry])] = int(rows[next_entry])
+                next_entry += 1
+            # Backtesting walks the pairs with open trades first, in the order the trades opened
+            for index in sorted(
+                due | entering.keys(),
+                key=lambda index: (0, self.open[index].trade.id) if index in self.open else (1, index),
+            ):
+                if index in due:
+                    self._advance(index, now)
+                elif index not in self.open:
+                    self._enter(index, entering[index], now)
+
+        last_rows = {}
+        for index in self.open:
+            path = self.paths["pairs"][index]
+            last = len(path["dates"]) - 1
+            last_rows[self.names[index]] = [_row(path["dates"], path["ohlc"], last, path, last)]
+        backtesting.handle_left_open(LocalTrade.bt_trades_open_pp, data=last_rows)
+        backtesting.wallets.update()
+
+        return {
+            "results": trade_list_to_dataframe(LocalTrade.bt_trades),
+            "config": self.strategy.config,
+            "locks": PairLocks.get_all_locks(),
+            "rejected_signals": backtesting.rejected_trades,
+            "timedout_entry_orders": backtesting.timedout_entry_orders,
+            "timedout_exit_orders": backtesting.timedout_exit_orders,
+            "canceled_trade_entries": backtesting.canceled_trade_entries,
+            "canceled_entry_orders": backtesting.canceled_entry_orders,
+            "replaced_entry_orders": backtesting.replaced_entry_orders,
+            "final_balance": backtesting.wallets.get_total(self.strategy.config["stake_currency"]),
+        }
+
+    def _path_row(self, path: Dict[str, Any], row: int) -> tuple:
+        return _row(path["path_dates"], path["path_ohlc"], row, path, int(path["path_row"][row]))
+
+    def _enter(self, index: int, main: int, now: int) -> None:
+        """Backtesting.backtest_loop() steps 2 and 3 on the first candle of main candle ``main``."""
+        backtesting, pair, path = self.backtesting, self.names[index], self.paths["pairs"][index]
+        start = int(path["path_start"][main])
+        row = self._path_row(path, start)
+        if PairLocks.is_pair_locked(pair, row[DATE_IDX], "long"):
+            return
+        if not backtesting.trade_slot_available(LocalTrade.bt_open_open_trade_count):
+            backtesting._collate_rejected(pair, row)
+            return
+        trade = backtesting._enter_trade(pair, row, "long")
+        if not trade:
+            return
+        backtesting.wallets.update()
+        order = trade.select_order(trade.entry_side, is_open=True)
+        if backtesting._try_close_open_order(order, trade, row[DATE_IDX].to_pydatetime(), row):
+            backtesting.wallets.update()
+        if trade.has_open_orders:
+            raise UnsupportedEpoch(f"{pair} entry order at {row[DATE_IDX]} did not fill")
+        self.open[index] = OpenTrade(trade, *(self._find_exit(path, trade, start) or (None, None)))
+        self._advance(index, now)
+
+    def _advance(self, index: int, now: int) -> None:
+        """Exit the trade of pair ``index`` if it exits in main candle ``now``, else schedule its exit."""
+        state, path = self.open[index], self.paths["pairs"][index]
+        while state.exit_row is not None and path["dates"][path["path_row"][state.exit_row]] == now:
+            if self._close(index, state):
+                del self.open[index]
+                return
+            state.exit_row, state.exits = self._find_exit(path, state.trade, state.exit_row + 1) or (None, None)
+        if state.exit_row is not None:
+            heapq.heappush(self.due, (int(path["dates"][path["path_row"][state.exit_row]]), index))
+
+    def _close(self, index: int, state: OpenTrade) -> bool:
+        """Backtesting.backtest_loop() steps 4 and 5 after should_exit() returned ``state.exits``."""
+        backtesting, pair, trade = self.backtesting, self.names[index], state.trade
+        row = self._path_row(self.paths["pairs"][index], state.exit_row)
+        current_time = row[DATE_IDX].to_pydatetime()
+        for exit_ in state.exits:
+            if backtesting._get_exit_for_signal(trade, row, exit_, current_time):
+                break
+        order = trade.select_order(trade.exit_side, is_open=True)
+        if order:
+            backtesting._process_exit_order(order, trade, current_time, row, pair)
+            if trade.is_open:
+                raise UnsupportedEpoch(f"{pair} exit order at {current_time} did not fill")
+        return not trade.is_open
+
+    def _find_exit(self, path: Dict[str, Any], trade: LocalTrade, start: int) -> Optional[Tuple[int, list]]:
+        """
+        First path candle from ``start`` on where should_exit() returns exits,
+        and the exits. Leaves ``trade`` as should_exit() left it on that candle.
+        """
+        end = int(path["path_start"][path["processed_rows"]])
+        while start < end:
+            stop = min(end, int(path["path_next_exit"][start]) + 1, start + MAX_CHUNK)
+            candidates, lowest, highest = self._screen(path, trade, start, stop)
+            hits = np.flatnonzero(candidates)
+            row = start + int(hits[0]) if hits.size else stop
+            self._fast_forward(path, trade, start, row, lowest, highest)
+            if not hits.size:
+                start = stop
+                continue
+            candle = self._path_row(path, row)
+            exits = self.strategy.should_exit(
+                trade,
+                candle[OPEN_IDX],
+                candle[DATE_IDX].to_pydatetime(),
+                enter=candle[LONG_IDX],
+                exit_=candle[ELONG_IDX],
+                low=candle[LOW_IDX],
+                high=candle[HIGH_IDX],
+            )
+            if exits:
+                return row, exits
+            start = row + 1
+        return None
+
+    def _screen(
+        self, path: Dict[str, Any], trade: LocalTrade, start: int, stop: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Candles from ``start`` to ``stop`` where the trade may exit: its stop may
+        reach the low, the profit at the high may beat the ROI, or the exit signal
+        is set. Also returns the lowest and highest stop every candle can move to.
+        """
+        ohlc = path["path_ohlc"][start:stop]
+        dates = path["path_dates"][start:stop]
+        high, low = ohlc[:, 1], ohlc[:, 2]
+        profit = high * (1 - trade.fee_close) / (trade.open_rate * (1 + trade.fee_open)) - 1
+        lowest, highest = self._stop_moves(trade, dates, high, profit)
+
+        stoploss = np.maximum(trade.stop_loss, _round_up_bound(trade, np.maximum.accumulate(highest)))
+        minutes = (dates - int(trade.open_date_utc.timestamp()) * NANOSECONDS) // (60 * NANOSECONDS)
+        if self.roi_thresholds is not None:
+            roi = self.roi_thresholds(trade.pair, minutes)
+        else:
+            entry = np.searchsorted(self.roi_minutes, minutes, side="right") - 1
+            roi = np.where(entry >= 0, self.roi_values[np.maximum(entry, 0)], np.nan)
+        return (
+            (stoploss >= low) | (profit > roi - PROFIT_TOLERANCE) | path["path_exit"][start:stop],
+            lowest,
+            highest,
+        )
+
+    def _stop_moves(
+        self, trade: LocalTrade, dates: np.ndarray, high: np.ndarray, profit: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lowest and highest unrounded stop IStrategy.ft_stoploss_adjust() can move
+        the stop to on every candle. They only differ where the profit at the high
+        is too close to the trailing offset to tell which side it is on.
+        """
+        strategy = self.strategy
+        lowest = highest = np.full(high.size, -np.inf)
+        distance = np.full(high.size, abs(strategy.stoploss))
+        if strategy.use_custom_stoploss:
+            values = strategy.custom_stoploss_vectorized(trade.pair, trade, dates, high, profit)
+            if values is None:
+                raise UnsupportedEpoch(f"custom_stoploss_vectorized() cannot evaluate {trade.pair}")
+            valid = np.isfinite(values) & (values != 0)
+            lowest = highest = np.where(valid, high * (1 - np.abs(np.where(valid, values, 0))), -np.inf)
+            distance = np.where(valid, np.abs(np.where(valid, values, 0)), distance)
+        if strategy.trailing_stop:
+            offset = strategy.trailing_stop_positive_offset
+            positive = strategy.trailing_stop_positive
+            regular = high * (1 - distance)
+            above = high * (1 - abs(positive)) if positive is not None else regular
+            below = np.full(high.size, -np.inf) if strategy.trailing_only_offset_is_reached else regular
+            # At the offset itself the trailing stop keeps the regular distance.
+            is_above = profit > offset + PROFIT_TOLERANCE
+            is_below = profit < offset - PROFIT_TOLERANCE
+            trailing_low = np.where(is_above, above, np.where(is_below, below, np.minimum(np.minimum(above, below), regular)))
+            trailing_high = np.where(is_above, above, np.where(is_below, below, np.maximum(above, regular)))
+            lowest = np.maximum(lowest, trailing_low)
+            highest = np.maximum(highest, trailing_high)
+        return lowest, highest
+
+    def _fast_forward(
+        self, path: Dict[str, Any], trade: LocalTrade, start: int, stop: int, lowest: np.ndarray, highest: np.ndarray
+    ) -> None:
+        """
+        Bring ``trade`` to the state should_exit() leaves it in after the exitless
+        candles from ``start`` to ``stop``: its min / max rate, and the stop of the
+        candles whose move can be the final one, replayed in order.
+        """
+        if stop <= start:
+            return
+        count = stop - start
+        ohlc = path["path_ohlc"][start:stop]
+        trade.adjust_min_max_rates(float(ohlc[:, 1].max()), float(ohlc[:, 2].min()))
+        floor = max(trade.stop_loss, float(lowest[:count].max()))
+        for offset in np.flatnonzero(_round_up_bound(trade, highest[:count]) >= floor):
+            open_, high, low, _ = ohlc[offset].tolist()
+            self.strategy.ft_stoploss_adjust(
+                open_,
+                trade,
+                Timestamp(int(path["path_dates"][start + offset]), tz="UTC").to_pydatetime(),
+                trade.calc_profit_ratio(open_),
+                0,
+                low=low,
+                high=high,
+            )
+
+
+def compare(simulated: Dict[str, Any], regular: Dict[str, Any]) -> Optional[str]:
+    """The first difference between two backtest results, if any."""
+    for key in ("rejected_signals", "final_balance"):
+        if simulated[key] != regular[key]:
+            return f"{key} {simulated[key]} instead of {regular[key]}"
+    ours, theirs = simulated["results"], regular["results"]
+    if len(ours) != len(theirs):
+        return f"{len(ours)} trades instead of {len(theirs)}"
+    for column in theirs.columns:
+        for number, (value, expected) in enumerate(zip(ours[column], theirs[column])):
+            if value != expected and not (value != value and expected != expected):
+                return f"trade {number} {column} {value!r} instead of {expected!r}"
+    locks = [lock.to_json() for lock in simulated["locks"]]
+    if locks != [lock.to_json() for lock in regular["locks"]]:
+        return f"{len(locks)} locks differ from the regular backtest's"
+    return None
+
+
+class ExitSimulator:
+    """
+    Hooks the exit simulation into one Hyperopt instance. The parent process
+    builds the paths and tracks verification; workers receive the current state
+    with every pickled task.
+    """
+
+    def __init__(self, hyperopt: Hyperopt, verify: int = 1) -> None:
+        """:param verify: Epochs to also backtest regularly and compare"""
+        self.hyperopt = hyperopt
+        self.verify = verify
+        self.enabled = False
+        self.paths_file: Optional[Path] = None
+
+        self._prepare_hyperopt_data = hyperopt.prepare_hyperopt_data
+        self._generate_optimizer = hyperopt.generate_optimizer
+        self._evaluate_result = hyperopt.evaluate_result
+        self._backtest = hyperopt.backtesting.backtest
+        self._verification: Optional[Dict[str, Any]] = None
+        # Loaded once per worker and batch of epochs
+        self._paths: Optional[Dict[str, Any]] = None
+        hyperopt.prepare_hyperopt_data = self.prepare_hyperopt_data
+        hyperopt.generate_optimizer = self.generate_optimizer
+        hyperopt.evaluate_result = self.evaluate_result
+        hyperopt.backtesting.backtest = self.backtest
+
+    def __getstate__(self) -> dict:
+        return {**self.__dict__, "_paths": None}
+
+    def prepare_hyperopt_data(self) -> None:
+        """Parent process: build the paths once the data is prepared."""
+        self._prepare_hyperopt_data()
+        hyperopt = self.hyperopt
+        self.paths_file = hyperopt.data_pickle_file.with_name(f"hyperopt_exit_paths_{os.getpid()}.pkl")
+        with hyperopt.data_pickle_file.open("rb") as f:
+            processed = load(f)
+        try:
+            paths = build_paths(hyperopt.backtesting, processed, hyperopt.min_date, hyperopt.max_date)
+        except UnsupportedData as reason:
+            logger.warning(f"Not simulating exits: {reason}.")
+            return
+        dump(paths, self.paths_file)
+        atexit.register(self.paths_file.unlink, missing_ok=True)
+        self.enabled = True
+        logger.info(f"Simulating exits from {len(paths['entry_time'])} entry candidates.")
+
+    def evaluate_result(self, val: Dict[str, Any], current: int, is_random: bool) -> None:
+        """Parent process: stop verifying once enough epochs matched, stop simulating on a mismatch."""
+        self._evaluate_result(val, current, is_random)
+        verification = val.get(VERIFY_KEY)
+        if verification and verification.get("verified"):
+            self.verify -= 1
+            if verification["mismatch"] and self.enabled:
+                self.enabled = False
+                logger.warning(
+                    f"Epoch {current}: simulated exits differ from the backtest "
+                    f"({verification['mismatch']}), backtesting the remaining epochs."
+                )
+
+    def generate_optimizer(self, raw_params: List[Any]) -> Dict[str, Any]:
+        """Worker process: one epoch, with the verification result if it was verified."""
+        self._verification = None
+        result = self._generate_optimizer(raw_params)
+        if self._verification is not None:
+            result[VERIFY_KEY] = self._verification
+        return result
+
+    def backtest(self, processed: Dict, start_date, end_date) -> Dict[str, Any]:
+        """Worker process: the simulated backtest, or the regular one."""
+        if not self.enabled:
+            return self._backtest(processed=processed, start_date=start_date, end_date=end_date)
+        if self._paths is None:
+            with self.paths_file.open("rb") as f:
+                self._paths = load(f, mmap_mode="r")
+        try:
+            simulated = EpochSimulation(self.hyperopt.backtesting, self._paths).run()
+        except UnsupportedEpoch as reason:
+            self._verification = {"verified": False, "fallback": str(reason)}
+            return self._backtest(processed=processed, start_date=start_date, end_date=end_date)
+        if self.verify <= 0:
+            return simulated
+        regular = self._backtest(processed=processed, start_date=start_date, end_date=end_date)
+        self._verification = {"verified": True, "mismatch": compare(simulated, regular)}
+        return regular
+
+
+def install_exit_simulator(hyperopt: Hyperopt, verify: int = 1) -> bool:
+    """Simulate the exits of ``hyperopt``'s epochs if its configuration allows it."""
+    reason = unsupported(hyperopt)
+    if reason:
+        logger.warning(f"Not simulating exits: {reason}.")
+        return False
+    ExitSimulator(hyperopt, verify)
+    return True
@@ -0,0 +1,103 @@
+"""
+Run freqtrade hyperopt with early abort of hopeless epochs.
+
+Takes the usual hyperopt arguments. Epochs whose loss bound (see pruning.py)
+cannot beat the --prune-top best losses so far stop backtesting early and are
+recorded as pruned; --no-prune runs every epoch to the end, for losses without
+a bound. Protections are evaluated by the indexed protections of
+indexed_protections.py unless --freqtrade-protections is given. Every epoch is
+also added to the epoch store (see epoch_store.py, query_epochs.py) with its
+time breakdown (see epoch_timing.py). With --exit-simulator, roi, stoploss and
+trailing runs replace the backtest of every epoch by the exit simulation of
+exit_simulator.py, comparing the first --exit-simulator-verify epochs with the
+regular backtest. --lazy-detail serves the --timeframe-detail candles from the
+memory-mapped store of detail_store.py, --ohlcv-store the candles from the
+memory-mapped store of ohlcv_store.py. ROI exits are priced from the pair's own
+ROI table (see pair_roi.py).
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/hyperopt_pruned.py --config user_data/config.json \
+        --strategy AwesomeCombinationStrategy --hyperopt-loss ComprehensiveTradeOptimizationLoss \
+        -e 4500 --spaces all [--prune-top 10 | --no-prune] [--prune-every 96] [--freqtrade-protections] \
+        [--exit-simulator] [--exit-simulator-verify 1] [--lazy-detail] [--ohlcv-store]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List
+
+from filelock import FileLock, Timeout
+
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.optimize.hyperopt import Hyperopt
+
+from detail_store import install_lazy_detail
+from epoch_store import EpochStore, install_epoch_store
+from epoch_timing import install_epoch_timing
+from exit_simulator import install_exit_simulator
+from indexed_protections import install_indexed_protections
+from ohlcv_store import install_ohlcv_store
+from pair_roi import install_pair_roi
+from pruning import install_pruning
+
+
+logger = logging.getLogger("hyperopt_pruned")
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prune-top", type=int, default=1, help="Best losses an epoch must be able to beat.")
+    parser.add_argument("--prune-every", type=int, default=96, help="Candles between two bound checks.")
+    parser.add_argument("--no-prune", action="store_true", help="Do not prune epochs.")
+    parser.add_argument(
+        "--freqtrade-protections", action="store_true", help="Evaluate protections with freqtrade's own plugins."
+    )
+    parser.add_argument(
+        "--exit-simulator", action="store_true", help="Simulate the exits of roi, stoploss and trailing epochs."
+    )
+    parser.add_argument(
+        "--exit-simulator-verify", type=int, default=1, help="Epochs to also backtest and compare the trades of."
+    )
+    parser.add_argument(
+        "--lazy-detail", action="store_true", help="Memory-map the detail candles instead of loading them."
+    )
+    parser.add_argument(
+        "--ohlcv-store", action="store_true", help="Memory-map the candles instead of parsing the downloaded files."
+    )
+    parser.add_argument("--epoch-store", type=Path, help="Epoch store, hyperopt_results/epochs.sqlite by default.")
+    args, hyperopt_args = parser.parse_known_args(argv)
+
+    config = setup_optimize_configuration(
+        Arguments(["hyperopt", *hyperopt_args]).get_parsed_arg(), RunMode.HYPEROPT
+    )
+    try:
+        with FileLock(Hyperopt.get_lock_filename(config)).acquire(timeout=1):
+            logging.getLogger("hyperopt.tpe").setLevel(logging.WARNING)
+            logging.getLogger("filelock").setLevel(logging.WARNING)
+            hyperopt = Hyperopt(config)
+            if args.lazy_detail:
+                install_lazy_detail(hyperopt.backtesting)
+            if args.ohlcv_store:
+                install_ohlcv_store(hyperopt.backtesting)
+            if not args.no_prune:
+                install_pruning(hyperopt, args.prune_top, args.prune_every)
+            if args.exit_simulator:
+                install_exit_simulator(hyperopt, args.exit_simulator_verify)
+            install_epoch_timing(hyperopt)
+            install_pair_roi(hyperopt.backtesting)
+            if not args.freqtrade_protections:
+                install_indexed_protections(hyperopt.backtesting)
+            install_epoch_store(hyperopt, EpochStore(
+                args.epoch_store or Path(config["user_data_dir"]) / "hyperopt_results" / "epochs.sqlite"
+            ))
+            hyperopt.start()
+    except Timeout:
+        logger.info("Another running instance of freqtrade Hyperopt detected. Quitting now.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,290 @@
+"""
+Indexed evaluation of the strategy protections in backtesting and hyperopt.
+
+freqtrade runs the protections after every closed trade, and every protection
+filters all closed trades of the backtest again (Trade.get_trades_proxy) to find
+the ones in its lookback window. MaxDrawdown also builds a dataframe of them.
+With many trades that makes protection space hyperopts slow.
+
+The protections below answer the same questions from a ClosedTrades index
+instead. It keeps the closed trades per pair / side / stoploss filter in
+close-date order and takes only the newly closed trades on every call, so a
+lookback window is one bisection away. Loading them does not scan the
+protection plugin directory for every epoch either.
+"""
+
+import logging
+import sys
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib.externals import cloudpickle
+
+from freqtrade.constants import Config, LongShort
+from freqtrade.enums import ExitType
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.persistence import LocalTrade
+from freqtrade.plugins.protectionmanager import ProtectionManager
+from freqtrade.plugins.protections import IProtection, ProtectionReturn
+from freqtrade.plugins.protections.cooldown_period import CooldownPeriod
+from freqtrade.plugins.protections.low_profit_pairs import LowProfitPairs
+from freqtrade.plugins.protections.max_drawdown_protection import MaxDrawdown
+from freqtrade.plugins.protections.stoploss_guard import StoplossGuard
+from freqtrade.resolvers import ProtectionResolver
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt workers unpickle the protections below without this directory on their path.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+STOPLOSS_EXITS = (
+    ExitType.TRAILING_STOP_LOSS.value,
+    ExitType.STOP_LOSS.value,
+    ExitType.STOPLOSS_ON_EXCHANGE.value,
+    ExitType.LIQUIDATION.value,
+)
+
+# (pair or None for all pairs, side or None for both, stoploss profit limit or None for all exits)
+SeriesKey = Tuple[Optional[str], Optional[str], Optional[float]]
+
+
+class TradeSeries:
+    """Closed trades in close-date order, trades closed at the same time in closing order."""
+
+    def __init__(self) -> None:
+        self.close_dates: List[datetime] = []
+        self.profits: List[float] = []
+        self.trades: List[LocalTrade] = []
+        # Positions in LocalTrade.bt_trades
+        self.sequences: List[int] = []
+
+    def add(self, trade: LocalTrade, sequence: int) -> None:
+        close_date = trade.close_date
+        if not self.close_dates or close_date >= self.close_dates[-1]:
+            index = len(self.close_dates)
+        else:
+            # Trades closed on a detail candle can close before earlier appended ones
+            index = bisect_right(self.close_dates, close_date)
+        self.close_dates.insert(index, close_date)
+        self.profits.insert(index, trade.close_profit or 0.0)
+        self.trades.insert(index, trade)
+        self.sequences.insert(index, sequence)
+
+    def window_start(self, look_back_until: datetime) -> int:
+        """Index of the first trade closed after ``look_back_until``."""
+        return bisect_right(self.close_dates, look_back_until)
+
+
+class ClosedTrades:
+    """
+    Index of LocalTrade.bt_trades. Series are built on first use and then
+    extended with the trades closed since the previous call. A new backtest
+    (a new bt_trades list) starts a new index.
+    """
+
+    def __init__(self) -> None:
+        self._source: Optional[List[LocalTrade]] = None
+        self._seen = 0
+        self._trades: List[LocalTrade] = []
+        self._series: Dict[SeriesKey, TradeSeries] = {}
+
+    @staticmethod
+    def _matches(key: SeriesKey, trade: LocalTrade) -> bool:
+        pair, side, profit_limit = key
+        return (
+            (pair is None or trade.pair == pair)
+            and (side is None or trade.trade_direction == side)
+            and (
+                profit_limit is None
+                or (
+                    str(trade.exit_reason) in STOPLOSS_EXITS
+                    and bool(trade.close_profit)
+                    and trade.close_profit < profit_limit
+                )
+            )
+        )
+
+    def _sync(self) -> None:
+        trades = LocalTrade.bt_trades
+        if trades is not self._source or len(trades) < self._seen:
+            self._source, self._seen, self._trades, self._series = trades, 0, [], {}
+        for sequence, trade in enumerate(trades[self._seen:], start=self._seen):
+            self._trades.append(trade)
+            for key, series in self._series.items():
+                if self._matches(key, trade):
+                    series.add(trade, sequence)
+        self._seen = len(trades)
+
+    def series(
+        self, pair: Optional[str] = None, side: Optional[str] = None, profit_limit: Optional[float] = None
+    ) -> TradeSeries:
+        self._sync()
+        key = (pair, side, profit_limit)
+        if key not in self._series:
+            series = self._series[key] = TradeSeries()
+            for sequence, trade in enumerate(self._trades):
+                if self._matches(key, trade):
+                    series.add(trade, sequence)
+        return self._series[key]
+
+
+class IndexedProtection(IProtection):
+    """Reads the closed trades from the index of its protection manager."""
+
+    def __init__(self, config: Config, protection_config: Dict[str, Any], closed_trades: ClosedTrades) -> None:
+        super().__init__(config, protection_config)
+        self.closed_trades = closed_trades
+
+    @property
+    def name(self) -> str:
+        # The freqtrade protection this one stands in for
+        return next(base.__name__ for base in type(self).__mro__ if base.__module__ != __name__)
+
+    def _look_back_until(self, date_now: datetime) -> datetime:
+        return date_now - timedelta(minutes=self._lookback_period)
+
+
+class IndexedCooldownPeriod(IndexedProtection, CooldownPeriod):
+    def _cooldown_period(self, pair: str, date_now: datetime) -> Optional[ProtectionReturn]:
+        series = self.closed_trades.series(pair)
+        if not series.trades or series.close_dates[-1] <= self._look_back_until(date_now):
+            return None
+        self.log_once(f"Cooldown for {pair} {self.unlock_reason_time_element}.", logger.info)
+        return ProtectionReturn(
+            lock=True,
+            until=self.calculate_lock_end(series.trades[-1:]),
+            reason=self._reason(),
+        )
+
+
+class IndexedStoplossGuard(IndexedProtection, StoplossGuard):
+    def _stoploss_guard(
+        self, date_now: datetime, pair: Optional[str], side: LongShort
+    ) -> Optional[ProtectionReturn]:
+        series = self.closed_trades.series(pair, side if self._only_per_side else None, self._profit_limit)
+        stoplosses = len(series.trades) - series.window_start(self._look_back_until(date_now))
+        if stoplosses < self._trade_limit:
+            return None
+        self.log_once(
+            f"Trading stopped due to {self._trade_limit} "
+            f"stoplosses within {self._lookback_period} minutes.",
+            logger.info,
+        )
+        return ProtectionReturn(
+            lock=True,
+            until=self.calculate_lock_end(series.trades[-1:]),
+            reason=self._reason(),
+            lock_side=(side if self._only_per_side else "*"),
+        )
+
+
+class IndexedMaxDrawdown(IndexedProtection, MaxDrawdown):
+    def _max_drawdown(self, date_now: datetime) -> Optional[ProtectionReturn]:
+        series = self.closed_trades.series()
+        start = series.window_start(self._look_back_until(date_now))
+        if len(series.trades) - start < self._trade_limit or start == len(series.trades):
+            return None
+        # calculate_max_drawdown(value_col="close_profit") on the window's trades
+        cumulative = np.cumsum(self._drawdown_order(series, start))
+        drawdowns = cumulative - np.maximum.accumulate(cumulative)
+        low = int(np.argmin(drawdowns))
+        if low == 0:
+            # No losing trade, therefore no drawdown
+            return None
+        drawdown = abs(drawdowns[low])
+        if drawdown <= self._max_allowed_drawdown:
+            return None
+        self.log_once(
+            f"Trading stopped due to Max Drawdown {drawdown:.2f} > {self._max_allowed_drawdown}"
+            f" within {self.lookback_period_str}.",
+            logger.info,
+        )
+        return ProtectionReturn(
+            lock=True,
+            until=self.calculate_lock_end(series.trades[-1:]),
+            reason=self._reason(drawdown),
+        )
+
+    @staticmethod
+    def _drawdown_order(series: TradeSeries, start: int) -> np.ndarray:
+        """
+        Profits of the trades from ``start`` in the order calculate_max_drawdown()
+        sees them. It sorts the bt_trades order by the printed close dates with an
+        unstable sort; the same sort of the same order with the same comparisons
+        (close dates to the second) puts trades closed in the same second in the
+        same order.
+        """
+        profits = np.array(series.profits[start:])
+        close_dates = series.close_dates[start:]
+        if all(later - earlier >= timedelta(seconds=1) for earlier, later in zip(close_dates, close_dates[1:])):
+            return profits
+        order = np.argsort(series.sequences[start:])
+        printed = np.array([close_dates[index].replace(microsecond=0) for index in order], dtype=object)
+        return profits[order[printed.argsort(kind="quicksort")]]
+
+
+class IndexedLowProfitPairs(IndexedProtection, LowProfitPairs):
+    def _low_profit(
+        self, date_now: datetime, pair: str, side: LongShort
+    ) -> Optional[ProtectionReturn]:
+        look_back_until = self._look_back_until(date_now)
+        series = self.closed_trades.series(pair)
+        start = series.window_start(look_back_until)
+        if len(series.trades) - start < self._trade_limit or start == len(series.trades):
+            return None
+        profits = series.profits[start:]
+        if self._only_per_side:
+            side_series = self.closed_trades.series(pair, side)
+            profits = side_series.profits[side_series.window_start(look_back_until):]
+        # Skipping zero profits like LowProfitPairs, so the lock reason prints the same sum
+        profit = sum(profit for profit in profits if profit)
+        if profit >= self._required_profit:
+            return None
+        self.log_once(
+            f"Trading for {pair} stopped due to {profit:.2f} < {self._required_profit} "
+            f"within {self._lookback_period} minutes.",
+            logger.info,
+        )
+        return ProtectionReturn(
+            lock=True,
+            until=self.calculate_lock_end(series.trades[-1:]),
+            reason=self._reason(profit),
+            lock_side=(side if self._only_per_side else "*"),
+        )
+
+
+INDEXED_PROTECTIONS = {
+    protection.__mro__[2].__name__: protection
+    for protection in (IndexedCooldownPeriod, IndexedStoplossGuard, IndexedMaxDrawdown, IndexedLowProfitPairs)
+}
+
+
+class IndexedProtectionManager(ProtectionManager):
+    """ProtectionManager whose built-in protections share one ClosedTrades index."""
+
+    def __init__(self, config: Config, protections: List) -> None:
+        self._config = config
+        self.closed_trades = ClosedTrades()
+        self._protection_handlers: List[IProtection] = []
+        for protection_config in protections:
+            method = protection_config["method"]
+            if method in INDEXED_PROTECTIONS:
+                handler = INDEXED_PROTECTIONS[method](config, protection_config, self.closed_trades)
+            else:
+                handler = ProtectionResolver.load_protection(
+                    method, config=config, protection_config=protection_config
+                )
+            self._protection_handlers.append(handler)
+
+
+def install_indexed_protections(backtesting: Backtesting) -> None:
+    """Load the protections of every backtest of ``backtesting`` as indexed protections."""
+
+    def load_protections(strategy) -> None:
+        if backtesting.config.get("enable_protections", False):
+            backtesting.protections = IndexedProtectionManager(backtesting.config, strategy.protections)
+
+    backtesting._load_protections = load_protections
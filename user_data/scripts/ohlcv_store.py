@@ -0,0 +1,373 @@
+"""
+Memory-mapped columnar store of the downloaded candles.
+
+freqtrade parses the whole downloaded file of every pair into a dataframe on
+every load, and trims it to the timerange afterwards. Every backtest, hyperopt
+and notebook session, and each of the parallel hyperopt containers, holds its
+own copy of the candles.
+
+OHLCVStore converts the file of every pair and timeframe once, with
+freqtrade's own loading, to one .npy file per column: the candle dates in ns and
+each price column (PRICE_COLUMNS) as a float array. A load finds the timerange
+in the dates by binary search and returns a dataframe whose price columns are
+views of the memory-mapped columns, so processes loading the same candles share
+the pages of the OS cache. The files are mapped copy-on-write: a strategy writing
+to a price column gets private pages and never changes the files. Loads return
+what freqtrade's load_pair_history() / load_data() return.
+download_incremental.py appends new candles to the column files in place.
+
+Run as a script after downloading to build the store of all downloaded data:
+
+    python user_data/scripts/ohlcv_store.py --config user_data/config.json [--timeframes 15m 5m] \
+        [--pairs BTC/USDT ...] [--store user_data/ohlcv_store]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib.externals import cloudpickle
+from numpy.lib import format as npy_format
+from pandas import DataFrame, to_datetime
+
+from freqtrade.configuration import TimeRange
+from freqtrade.constants import DATETIME_PRINT_FORMAT
+from freqtrade.data.converter import ohlcv_fill_up_missing_data
+from freqtrade.data.history import get_timerange
+from freqtrade.data.history.datahandlers import get_datahandler
+from freqtrade.enums import BacktestState, CandleType
+from freqtrade.exceptions import OperationalException
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.misc import pair_to_filename
+from freqtrade.optimize.backtesting import Backtesting
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt pickles its backtesting, and the patched loader with it, for its workers.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+KEY_LENGTH = 16
+# Part of the file keys, so stores of an earlier file layout are rebuilt
+LAYOUT = 2
+
+
+class OHLCVStore:
+    """
+    Columnar .npy files of the full downloaded history of one (pair, timeframe,
+    candle type) each, in ``directory``. They are keyed by the size and
+    modification time of the downloaded file, so a new download rebuilds them
+    on the next load. Files are written atomically, so concurrent runs sharing
+    the directory never read a partial file, and candles fetched since are
+    appended in place (see download_incremental.py).
+    """
+
+    def __init__(self, directory: Path, datadir: Path, data_format: Optional[str] = None) -> None:
+        self.directory = Path(directory)
+        self.datadir = Path(datadir)
+        self.data_format = data_format
+        self.data_handler = get_datahandler(self.datadir, data_format)
+
+    @classmethod
+    def from_config(cls, config: Dict, directory: Optional[Path] = None) -> "OHLCVStore":
+        """The store of ``config``'s data, user_data/ohlcv_store/<exchange> by default."""
+        datadir = Path(config["datadir"])
+        return cls(
+            directory or Path(config["user_data_dir"]) / "ohlcv_store" / datadir.name,
+            datadir,
+            config.get("dataformat_ohlcv"),
+        )
+
+    def source(self, pair: str, timeframe: str, candle_type: CandleType) -> Optional[Path]:
+        """The downloaded file freqtrade loads ``pair`` from, if any."""
+        for no_timeframe_modify in (False, True):
+            source = self.data_handler._pair_data_filename(
+                self.datadir, pair, timeframe, candle_type=candle_type, no_timeframe_modify=no_timeframe_modify
+            )
+            if source.exists():
+                return source
+        return None
+
+    def path(self, source: Path, pair: str, timeframe: str, candle_type: CandleType) -> Path:
+        stat = source.stat()
+        source_key = hashlib.sha1(repr((LAYOUT, str(source), stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()
+        return self.directory / f"{self._prefix(pair, timeframe, candle_type)}-{source_key[:KEY_LENGTH]}"
+
+    @staticmethod
+    def _prefix(pair: str, timeframe: str, candle_type: CandleType) -> str:
+        return f"{pair_to_filename(pair)}-{timeframe}-{CandleType.from_string(candle_type).value}"
+
+    def build(self, pair: str, timeframe: str, candle_type: CandleType = CandleType.SPOT) -> Optional[Path]:
+        """
+        Path of the store files of ``pair``, converting the downloaded file
+        first if they are missing or out of date. None without downloaded data.
+        """
+        source = self.source(pair, timeframe, candle_type)
+        if source is None:
+            return None
+        path = self.path(source, pair, timeframe, candle_type)
+        if path.with_name(f"{path.name}.dates.npy").exists():
+            return path
+        # Sorted, without duplicate candles and not filled up: filling and dropping
+        # the incomplete candle depend on the timerange and happen when loading.
+        candles = self.data_handler.ohlcv_load(
+            pair, timeframe, candle_type, timerange=None, fill_missing=False, warn_no_data=False
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        columns = {column: candles[column].to_numpy(dtype=float) for column in PRICE_COLUMNS}
+        columns["dates"] = candles["date"].astype("datetime64[ns, UTC]").astype(np.int64).to_numpy()
+        # Dates last, as the dates file marks the pair as built
+        for column, values in columns.items():
+            tmp_path = path.with_name(f"{path.name}.{column}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, values)
+            os.replace(tmp_path, path.with_name(f"{path.name}.{column}.npy"))
+        # Files of earlier downloads; processes still mapping them keep their pages
+        for stale in self.directory.glob(f"{self._prefix(pair, timeframe, candle_type)}-{'?' * KEY_LENGTH}.*.npy"):
+            if not stale.name.startswith(path.name):
+                stale.unlink(missing_ok=True)
+        logger.info(f"Stored {len(candles)} {timeframe} candles of {pair} in {self.directory}.")
+        return path
+
+    @staticmethod
+    def arrays(path: Path) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        The dates in ns and the price columns of ``path``, mapped copy-on-write.
+        Every call maps the files anew, so writes to one load never show in another.
+        """
+        dates = np.load(path.with_name(f"{path.name}.dates.npy"), mmap_mode="c")
+        prices = {}
+        for column in PRICE_COLUMNS:
+            values = np.load(path.with_name(f"{path.name}.{column}.npy"), mmap_mode="c")
+            if len(values) < len(dates):
+                raise OperationalException(f"{path.name} has fewer {column} prices than dates, remove it to rebuild.")
+            # Prices of an append in progress (or an interrupted one) are not committed yet
+            prices[column] = values[:len(dates)]
+        return dates, prices
+
+    def append(self, path: Path, candles: DataFrame, timeframe: str) -> int:
+        """
+        Append the ``candles`` after the last stored one to the store files of
+        ``path`` in place, and return how many there were. Gaps to the stored
+        candles are logged, candles off the timeframe's grid or out of order raise
+        an OperationalException. The prices are written before the dates, and the
+        rows of a file before its header, so readers see either the old or all
+        new candles.
+        """
+        dates, _ = self.arrays(path)
+        rows, last = len(dates), int(dates[-1]) if len(dates) else None
+        new_dates = candles["date"].astype("datetime64[ns, UTC]").astype(np.int64).to_numpy()
+        new = new_dates > last if last is not None else np.ones(len(new_dates), dtype=bool)
+        if not new.any():
+            return 0
+        new_dates = new_dates[new]
+
+        timeframe_ns = timeframe_to_seconds(timeframe) * 10**9
+        steps = np.diff(new_dates if last is None else np.r_[last, new_dates])
+        if (steps <= 0).any() or (steps % timeframe_ns).any():
+            raise OperationalException(f"{path.name}: new candles out of order or off the {timeframe} grid.")
+        missing = int((steps // timeframe_ns - 1).sum())
+        if missing:
+            logger.warning(
+                f"{path.name}: {missing} candles missing up to the new last candle, filled up when loading."
+            )
+        for column in PRICE_COLUMNS:
+            prices = candles[column].to_numpy(dtype=float)[new]
+            self._append_rows(path.with_name(f"{path.name}.{column}.npy"), prices, rows)
+        self._append_rows(path.with_name(f"{path.name}.dates.npy"), new_dates, rows)
+        return len(new_dates)
+
+    @staticmethod
+    def _append_rows(file: Path, values: np.ndarray, rows: int) -> None:
+        """Write ``values`` after the first ``rows`` rows of the .npy ``file``, then its new shape."""
+        with file.open("r+b") as f:
+            version = npy_format.read_magic(f)
+            if version == (1, 0):
+                read_header, write_header = npy_format.read_array_header_1_0, npy_format.write_array_header_1_0
+            else:
+                read_header, write_header = npy_format.read_array_header_2_0, npy_format.write_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+            offset = f.tell()
+            if dtype != values.dtype or fortran_order or shape[1:] != values.shape[1:]:
+                raise OperationalException(f"{file.name} does not hold {values.dtype} rows of {values.shape[1:]}.")
+            header = BytesIO()
+            write_header(header, {
+                "descr": npy_format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": (rows + len(values), *shape[1:]),
+            })
+            # np.save() leaves room in the header for the row count to grow
+            if len(header.getvalue()) != offset:
+                raise OperationalException(f"The header of {file.name} has no room for {rows + len(values)} rows.")
+            f.seek(offset + rows * dtype.itemsize * int(np.prod(shape[1:], dtype=int)))
+            f.write(np.ascontiguousarray(values).tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(header.getvalue())
+
+    def load(
+        self,
+        pair: str,
+        timeframe: str,
+        *,
+        timerange: Optional[TimeRange] = None,
+        fill_up_missing: bool = True,
+        drop_incomplete: bool = False,
+        startup_candles: int = 0,
+        candle_type: CandleType = CandleType.SPOT,
+        warn_no_data: bool = True,
+    ) -> DataFrame:
+        """
+        The candles load_pair_history() returns for the same arguments. The
+        price columns are a view of the store unless missing candles are filled up.
+        """
+        path = self.build(pair, timeframe, candle_type)
+        dates, prices = self.arrays(path) if path else (np.empty(0, dtype=np.int64), {})
+        if not len(dates):
+            return self._empty(pair, timeframe, candle_type, warn_no_data)
+
+        first, last = 0, len(dates)
+        timerange_startup = deepcopy(timerange)
+        if timerange_startup:
+            if startup_candles > 0:
+                timerange_startup.subtract_start(timeframe_to_seconds(timeframe) * startup_candles)
+            self._validate(pair, dates, timeframe, candle_type, timerange_startup)
+            if timerange_startup.starttype == "date":
+                first = int(np.searchsorted(dates, timerange_startup.startts * 10**9, side="left"))
+            if timerange_startup.stoptype == "date":
+                last = int(np.searchsorted(dates, timerange_startup.stopts * 10**9, side="right"))
+            if last <= first:
+                return self._empty(pair, timeframe, candle_type, warn_no_data)
+        # Only the last downloaded candle can be incomplete
+        if drop_incomplete and last == len(dates):
+            last -= 1
+
+        candles = DataFrame({column: prices[column][first:last] for column in PRICE_COLUMNS}, copy=False)
+        candles.insert(0, "date", to_datetime(dates[first:last], utc=True))
+        if fill_up_missing and (np.diff(dates[first:last]) != timeframe_to_seconds(timeframe) * 10**9).any():
+            candles = ohlcv_fill_up_missing_data(candles, timeframe, pair)
+        if candles.empty:
+            return self._empty(pair, timeframe, candle_type, warn_no_data)
+        return candles
+
+    def load_data(
+        self,
+        timeframe: str,
+        pairs: List[str],
+        *,
+        timerange: Optional[TimeRange] = None,
+        fill_up_missing: bool = True,
+        startup_candles: int = 0,
+        fail_without_data: bool = False,
+        candle_type: CandleType = CandleType.SPOT,
+    ) -> Dict[str, DataFrame]:
+        """The candles of ``pairs`` load_data() returns for the same arguments (spot and futures candles)."""
+        if startup_candles > 0 and timerange:
+            logger.info(f"Using indicator startup period: {startup_candles} ...")
+        result: Dict[str, DataFrame] = {}
+        for pair in pairs:
+            candles = self.load(
+                pair,
+                timeframe,
+                timerange=timerange,
+                fill_up_missing=fill_up_missing,
+                startup_candles=startup_candles,
+                candle_type=candle_type,
+            )
+            if not candles.empty:
+                result[pair] = candles
+        if fail_without_data and not result:
+            raise OperationalException("No data found. Terminating.")
+        return result
+
+    @staticmethod
+    def _validate(pair, dates: np.ndarray, timeframe: str, candle_type: CandleType, timerange: TimeRange) -> None:
+        """The warnings of IDataHandler._validate_pairdata() for data missing at either end."""
+        if timerange.starttype == "date" and dates[0] > timerange.startts * 10**9:
+            logger.warning(
+                f"{pair}, {candle_type}, {timeframe}, "
+                f"data starts at {to_datetime(dates[0], utc=True):%Y-%m-%d %H:%M:%S}"
+            )
+        if timerange.stoptype == "date" and dates[-1] < timerange.stopts * 10**9:
+            logger.warning(
+                f"{pair}, {candle_type}, {timeframe}, "
+                f"data ends at {to_datetime(dates[-1], utc=True):%Y-%m-%d %H:%M:%S}"
+            )
+
+    @staticmethod
+    def _empty(pair: str, timeframe: str, candle_type: CandleType, warn_no_data: bool) -> DataFrame:
+        if warn_no_data:
+            logger.warning(
+                f"No history for {pair}, {candle_type}, {timeframe} found. "
+                "Use `freqtrade download-data` to download the data"
+            )
+        return DataFrame(columns=["date", *PRICE_COLUMNS])
+
+
+def install_ohlcv_store(backtesting: Backtesting, store: Optional[OHLCVStore] = None) -> None:
+    """Load the candles of ``backtesting`` from ``store`` (the config's store by default)."""
+    store = store or OHLCVStore.from_config(backtesting.config)
+
+    def load_bt_data() -> Tuple[Dict[str, DataFrame], TimeRange]:
+        # Backtesting.load_bt_data() with the store in place of history.load_data()
+        backtesting.progress.init_step(BacktestState.DATALOAD, 1)
+        data = store.load_data(
+            backtesting.timeframe,
+            backtesting.pairlists.whitelist,
+            timerange=backtesting.timerange,
+            startup_candles=backtesting.required_startup,
+            fail_without_data=True,
+            candle_type=backtesting.config.get("candle_type_def", CandleType.SPOT),
+        )
+        min_date, max_date = get_timerange(data)
+        logger.info(
+            f"Loading data from {min_date.strftime(DATETIME_PRINT_FORMAT)} "
+            f"up to {max_date.strftime(DATETIME_PRINT_FORMAT)} "
+            f"({(max_date - min_date).days} days)."
+        )
+        backtesting.timerange.adjust_start_if_necessary(
+            timeframe_to_seconds(backtesting.timeframe), backtesting.required_startup, min_date
+        )
+        backtesting.progress.set_new_value(1)
+        return data, backtesting.timerange
+
+    backtesting.load_bt_data = load_bt_data
+
+
+def main(argv: List[str]) -> None:
+    from freqtrade.commands import Arguments
+    from freqtrade.configuration import setup_utils_configuration
+    from freqtrade.enums import RunMode
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timeframes", nargs="+", help="Only these timeframes.")
+    parser.add_argument("--store", type=Path, help="Store directory, user_data/ohlcv_store/<exchange> by default.")
+    args, list_data_args = parser.parse_known_args(argv)
+
+    config = setup_utils_configuration(
+        Arguments(["list-data", *list_data_args]).get_parsed_arg(), RunMode.UTIL_NO_EXCHANGE
+    )
+    store = OHLCVStore.from_config(config, args.store)
+    available = store.data_handler.ohlcv_get_available_data(store.datadir, config.get("trading_mode", "spot"))
+    built = 0
+    for pair, timeframe, candle_type in available:
+        if args.timeframes and timeframe not in args.timeframes:
+            continue
+        if config.get("pairs") and pair not in config["pairs"]:
+            continue
+        store.build(pair, timeframe, candle_type)
+        built += 1
+    print(f"{built} pair files in {store.directory}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,260 @@
+"""
+Run the per-space hyperopts of AwesomeCombinationStrategy in parallel.
+
+Candles (and detail candles) are loaded and indicators are computed once, then
+one forked process per space runs its hyperopt on a share of the cores. All
+spaces read the same memory-mapped data file, so the data is held about once
+instead of once per space. The best parameters of every space are merged into
+the strategy's parameter file. The roi, stoploss and trailing spaces simulate
+their exits instead of backtesting every epoch (see exit_simulator.py). Candles
+and detail candles are memory-mapped from the stores of ohlcv_store.py and
+detail_store.py. ROI exits are priced from the pair's own ROI table (see
+pair_roi.py).
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/optimize_spaces.py --config user_data/config.json \
+        --strategy AwesomeCombinationStrategy --timerange 20240101-20240601 \
+        [--spaces buy sell ...] [--jobs buy=4 ...] [--cores 16]
+"""
+
+import argparse
+import logging
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import cpu_count, get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from filelock import FileLock, Timeout
+
+from freqtrade.commands import Arguments
+from freqtrade.commands.optimize_commands import setup_optimize_configuration
+from freqtrade.enums import RunMode
+from freqtrade.misc import deep_merge_dicts
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+
+from detail_store import install_lazy_detail
+from epoch_store import EpochStore, install_epoch_store
+from epoch_timing import install_epoch_timing
+from exit_simulator import EXIT_SPACES, install_exit_simulator
+from indexed_protections import install_indexed_protections
+from ohlcv_store import install_ohlcv_store
+from pair_roi import install_pair_roi
+
+
+logger = logging.getLogger("optimize_spaces")
+
+
+@dataclass(frozen=True)
+class SpaceRun:
+    loss: str
+    epochs: int
+    timeframe_detail: Optional[str] = None
+
+
+# Same losses / epochs / detail timeframe as the single space Makefile targets.
+SPACES: Dict[str, SpaceRun] = {
+    "buy": SpaceRun("SharpeHyperOptLoss", 500, "5m"),
+    "sell": SpaceRun("SortinoHyperOptLoss", 500, "5m"),
+    "roi": SpaceRun("ProfitDrawDownHyperOptLoss", 500, "5m"),
+    "stoploss": SpaceRun("MaxDrawDownRelativeHyperOptLoss", 300),
+    "trailing": SpaceRun("CalmarHyperOptLoss", 300),
+    "trades": SpaceRun("ShortTradeDurHyperOptLoss", 100),
+    "protection": SpaceRun("SortinoHyperOptLoss", 300),
+}
+
+
+@dataclass
+class SharedData:
+    """Everything Hyperopt.prepare_hyperopt_data() produces, computed once."""
+
+    data_pickle_file: Any
+    timerange: Any
+    min_date: Optional[datetime]
+    max_date: Optional[datetime]
+    market_change: float
+    detail_data: Dict
+
+
+# Set before the space processes are forked, so they inherit it without pickling.
+_shared: Optional[SharedData] = None
+
+
+def space_config(config: Dict[str, Any], space: str, jobs: int) -> Dict[str, Any]:
+    run = SPACES[space]
+    config = deepcopy(config)
+    config.update({
+        "spaces": [space],
+        "hyperopt_loss": run.loss,
+        "epochs": run.epochs,
+        "hyperopt_jobs": jobs,
+        # Every space would export all parameters to the same file, the merged
+        # result is exported once all spaces are done.
+        "disableparamexport": True,
+    })
+    if run.timeframe_detail:
+        config["timeframe_detail"] = run.timeframe_detail
+    else:
+        config.pop("timeframe_detail", None)
+    return config
+
+
+def prepare_shared_data(config: Dict[str, Any], spaces: List[str]) -> SharedData:
+    config = space_config(config, spaces[0], 1)
+    # The analyzed data serves every space's parameters
+    config["spaces"] = list(spaces)
+    # Load the detail candles if any space needs them, the others ignore them.
+    detail = next((SPACES[s].timeframe_detail for s in spaces if SPACES[s].timeframe_detail), None)
+    if detail:
+        config["timeframe_detail"] = detail
+    hyperopt = Hyperopt(config)
+    install_lazy_detail(hyperopt.backtesting)
+    install_ohlcv_store(hyperopt.backtesting)
+    hyperopt.data_pickle_file = hyperopt.data_pickle_file.with_name("optimize_spaces_tickerdata.pkl")
+    hyperopt.prepare_hyperopt_data()
+    # Same as Hyperopt.start(): no exchange needed anymore, and nothing to carry into the forks.
+    hyperopt.backtesting.exchange.close()
+    return SharedData(
+        data_pickle_file=hyperopt.data_pickle_file,
+        timerange=hyperopt.timerange,
+        min_date=getattr(hyperopt, "min_date", None),
+        max_date=getattr(hyperopt, "max_date", None),
+        market_change=hyperopt.market_change,
+        detail_data=hyperopt.backtesting.detail_data,
+    )
+
+
+def run_space(config: Dict[str, Any], space: str, time_now: str) -> Optional[Dict[str, Any]]:
+    """Hyperopt one space on the shared data. Runs in a forked process."""
+    hyperopt = Hyperopt(config)
+
+    def prepare_hyperopt_data() -> None:
+        hyperopt.timerange = _shared.timerange
+        if _shared.min_date is not None:
+            hyperopt.min_date, hyperopt.max_date = _shared.min_date, _shared.max_date
+        hyperopt.market_change = _shared.market_change
+        hyperopt.backtesting.detail_data = (
+            _shared.detail_data if hyperopt.backtesting.timeframe_detail else {}
+        )
+
+    hyperopt.prepare_hyperopt_data = prepare_hyperopt_data
+    hyperopt.data_pickle_file = _shared.data_pickle_file
+    if space in EXIT_SPACES:
+        install_exit_simulator(hyperopt)
+    install_indexed_protections(hyperopt.backtesting)
+    install_pair_roi(hyperopt.backtesting)
+    install_epoch_timing(hyperopt)
+    install_epoch_store(hyperopt, EpochStore(Path(config["user_data_dir"]) / "hyperopt_results" / "epochs.sqlite"))
+    # Default names only differ by the second the run started.
+    hyperopt.results_file = hyperopt.results_file.with_name(
+        f"strategy_{config['strategy']}_{space}_{time_now}.fthypt"
+    )
+    hyperopt.start()
+
+    if not hyperopt.current_best_epoch:
+        return None
+    return {
+        "loss": hyperopt.current_best_epoch["loss"],
+        "results_file": str(hyperopt.results_file),
+        "params_details": hyperopt.current_best_epoch["params_details"],
+        "params_not_optimized": hyperopt.current_best_epoch["params_not_optimized"],
+    }
+
+
+def core_budget(spaces: List[str], cores: int, jobs: List[str]) -> Dict[str, int]:
+    """Explicit ``space=n`` jobs, the remaining cores split evenly over the other spaces."""
+    budget = {}
+    for item in jobs:
+        space, _, count = item.partition("=")
+        if space not in spaces or not count.isdigit():
+            raise ValueError(f"Invalid --jobs entry '{item}', expected <space>=<n> for one of {spaces}.")
+        budget[space] = int(count)
+    rest = [s for s in spaces if s not in budget]
+    if rest:
+        share = max(1, (cores - sum(budget.values())) // len(rest))
+        budget.update({s: share for s in rest})
+    return budget
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spaces", nargs="+", choices=list(SPACES), default=list(SPACES))
+    parser.add_argument("--cores", type=int, default=cpu_count(), help="Total core budget.")
+    parser.add_argument(
+        "--jobs", nargs="+", default=[], metavar="SPACE=N", help="Parallel jobs of single spaces."
+    )
+    args, hyperopt_args = parser.parse_known_args(argv)
+
+    config = setup_optimize_configuration(
+        Arguments(["hyperopt", *hyperopt_args]).get_parsed_arg(), RunMode.HYPEROPT
+    )
+    budget = core_budget(args.spaces, args.cores, args.jobs)
+    time_now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    global _shared
+    try:
+        with FileLock(Hyperopt.get_lock_filename(config)).acquire(timeout=1):
+            logging.getLogger("hyperopt.tpe").setLevel(logging.WARNING)
+            logging.getLogger("filelock").setLevel(logging.WARNING)
+
+            _shared = prepare_shared_data(config, args.spaces)
+            with ProcessPoolExecutor(len(args.spaces), mp_context=get_context("fork")) as pool:
+                results = collect_results({
+                    pool.submit(run_space, space_config(config, space, budget[space]), space, time_now): space
+                    for space in args.spaces
+                })
+            _shared.data_pickle_file.unlink(missing_ok=True)
+    except Timeout:
+        logger.info("Another running instance of freqtrade Hyperopt detected. Quitting now.")
+        return
+
+    export_merged_params(config, results)
+
+
+def collect_results(futures: Dict[Future, str]) -> Dict[str, Dict[str, Any]]:
+    """Best result per space as the space hyperopts finish, failed and empty spaces logged and left out."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for future in as_completed(futures):
+        space = futures[future]
+        try:
+            result = future.result()
+        except Exception:
+            logger.exception(f"Hyperopt of space '{space}' failed.")
+            continue
+        if result is None:
+            logger.warning(f"Hyperopt of space '{space}' found no result.")
+            continue
+        logger.info(f"Best '{space}' loss {result['loss']:.5f} in {result['results_file']}")
+        results[space] = result
+    return results
+
+
+def export_merged_params(config: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> None:
+    if not results:
+        logger.warning("No space found a result, not exporting parameters.")
+        return
+    merged: Dict[str, Any] = {"params_details": {}, "params_not_optimized": {}}
+    for result in results.values():
+        merged["params_not_optimized"] = deep_merge_dicts(
+            result["params_not_optimized"], merged["params_not_optimized"]
+        )
+        merged["params_details"].update(result["params_details"])
+    # The other spaces report the starting ROI table as not optimized. export_params()
+    # merges dicts key by key, which would mix its minutes into the optimized table.
+    if "roi" in merged["params_details"]:
+        merged["params_not_optimized"].pop("roi", None)
+
+    strategy_name = config["strategy"]
+    filename = HyperoptTools.get_strategy_filename(config, strategy_name)
+    if filename:
+        HyperoptTools.export_params(merged, strategy_name, filename.with_suffix(".json"))
+    else:
+        logger.warning("Strategy not found, not exporting parameter file.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
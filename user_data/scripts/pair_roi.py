@@ -0,0 +1,38 @@
+"""
+Per-pair ROI exit prices in backtesting and hyperopt.
+
+AwesomeCombinationStrategy's custom_pair_params can give a pair its own
+minimal_roi, which min_roi_reached() exits by. freqtrade prices ROI exits in
+Backtesting._get_close_rate_for_roi() through strategy.min_roi_reached_entry(),
+without the pair, so from minimal_roi: the exit would happen at the pair's
+threshold but be priced at another. install_pair_roi() sets the trade's pair as
+the strategy's roi_pricing_pair while the exit is priced.
+"""
+
+import sys
+from typing import Tuple
+
+from joblib.externals import cloudpickle
+
+from freqtrade.optimize.backtesting import Backtesting
+from freqtrade.persistence import LocalTrade
+from freqtrade.strategy.interface import ExitCheckTuple
+
+
+# Hyperopt workers unpickle the hook below without this directory on their path.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+
+def install_pair_roi(backtesting: Backtesting) -> None:
+    """Price the ROI exits of every backtest of ``backtesting`` from the pair's ROI table."""
+    get_close_rate_for_roi = backtesting._get_close_rate_for_roi
+
+    def _get_close_rate_for_roi(row: Tuple, trade: LocalTrade, exit_: ExitCheckTuple, trade_dur: int) -> float:
+        strategy = backtesting.strategy
+        strategy.roi_pricing_pair = trade.pair
+        try:
+            return get_close_rate_for_roi(row, trade, exit_, trade_dur)
+        finally:
+            strategy.roi_pricing_pair = None
+
+    backtesting._get_close_rate_for_roi = _get_close_rate_for_roi
@@ -0,0 +1,130 @@
+"""
+Profile the AwesomeCombinationStrategy analysis of the configured pairlist.
+
+Loads the stored candles of every whitelisted pair, runs populate_indicators,
+populate_entry_trend and populate_exit_trend like one live analysis round, and
+reports wall time, allocations and peak RSS per step and per indicator block
+(STOCHRSI, ATR, RSI, EMA+MACD, BB, VWAP, TTM). Timing and memory tracing run
+as separate passes, so tracemalloc's overhead does not show up in the wall times.
+The report is written as JSON to compare runs.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/profile_analysis.py --config user_data/config.json \
+        [--strategy AwesomeCombinationStrategy] [--pairs BTC/USDT ...] [--candles 1000] [--output report.json]
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from pandas import DataFrame
+
+from freqtrade.configuration import Configuration
+from freqtrade.data.dataprovider import DataProvider
+from freqtrade.data.history import load_data
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.resolvers import StrategyResolver
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "strategies"))
+
+from awesome_combination import StepProfiler, profile_step  # noqa: E402
+
+
+STEPS = ("populate_indicators", "populate_entry_trend", "populate_exit_trend")
+
+
+def analysis_round(strategy, data: Dict[str, DataFrame], profiler: StepProfiler) -> None:
+    """One analysis of every pair, as the bot runs it for a new candle."""
+    strategy.profiler = profiler
+    profiler.start()
+    try:
+        for pair, candles in data.items():
+            metadata = {"pair": pair}
+            dataframe = candles.copy()
+            with profile_step(profiler, "analysis"):
+                for step in STEPS:
+                    with profile_step(profiler, step):
+                        dataframe = getattr(strategy, step)(dataframe, metadata)
+    finally:
+        profiler.stop()
+        strategy.profiler = None
+
+
+def report(
+    config: Dict[str, Any], pairs: List[str], candles: int, timing: StepProfiler, memory: StepProfiler
+) -> Dict[str, Any]:
+    steps = {}
+    for name, record in timing.steps.items():
+        steps[name] = {
+            "calls": record["calls"],
+            "wall_s": record["wall_s"],
+            "wall_ms_per_call": record["wall_s"] / record["calls"] * 1000,
+            **{key: value for key, value in memory.steps.get(name, {}).items() if key.endswith("_mib")},
+        }
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "strategy": config["strategy"],
+        "timeframe": config["timeframe"],
+        "pairs": pairs,
+        "candles": candles,
+        "steps": steps,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-c", "--config", nargs="+", default=["user_data/config.json"])
+    parser.add_argument("-s", "--strategy", default="AwesomeCombinationStrategy")
+    parser.add_argument("--datadir", help="Candle data directory, the configured one by default.")
+    parser.add_argument("-p", "--pairs", nargs="+", help="Pairs to analyze, the pair whitelist by default.")
+    parser.add_argument("--candles", type=int, default=1000, help="Candles per pair, like a live analysis.")
+    parser.add_argument("--output", type=Path, help="JSON report, user_data/profiling/ by default.")
+    args = parser.parse_args()
+
+    config = Configuration(
+        {"config": args.config, "strategy": args.strategy, "datadir": args.datadir},
+        RunMode.UTIL_NO_EXCHANGE,
+    ).get_config()
+    strategy = StrategyResolver.load_strategy(config)
+    strategy.dp = DataProvider(config, None)
+    strategy.ft_bot_start()
+
+    pairs = args.pairs or config["exchange"]["pair_whitelist"]
+    data = load_data(
+        config["datadir"],
+        config["timeframe"],
+        pairs,
+        data_format=config.get("dataformat_ohlcv", "feather"),
+        candle_type=config.get("candle_type_def", CandleType.SPOT),
+    )
+    data = {pair: candles.tail(args.candles).reset_index(drop=True) for pair, candles in data.items()}
+    if not data:
+        sys.exit(f"No candles found for {pairs} in {config['datadir']}.")
+
+    timing, memory = StepProfiler(), StepProfiler(trace_memory=True)
+    analysis_round(strategy, data, timing)
+    analysis_round(strategy, data, memory)
+
+    result = report(config, list(data), args.candles, timing, memory)
+    output = args.output or (
+        Path(config["user_data_dir"]) / "profiling"
+        / f"analysis_{config['strategy']}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+
+    print(f"{'step':<50} {'calls':>6} {'total ms':>10} {'ms/call':>9} {'alloc MiB':>10} {'peak MiB':>9} {'RSS MiB':>8}")
+    for name, record in sorted(result["steps"].items(), key=lambda item: -item[1]["wall_s"]):
+        print(
+            f"{name:<50} {record['calls']:>6} {record['wall_s'] * 1000:>10.1f} {record['wall_ms_per_call']:>9.2f} "
+            f"{record.get('allocated_mib', 0):>10.2f} {record.get('peak_mib', 0):>9.2f} {record.get('rss_peak_mib', 0):>8.0f}"
+        )
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
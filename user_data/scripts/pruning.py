@@ -0,0 +1,227 @@
+"""
+Early abort of hopeless hyperopt epochs.
+
+A loss class opts in by defining
+
+    @staticmethod
+    def hyperopt_loss_bound(metrics: LossAccumulator, max_profit: float, config: Config) -> float
+
+returning a lower bound of its final loss, given the trades closed so far and
+``max_profit``, the largest total profit (in stake currency) the epoch can still
+end with. While an epoch backtests, the closed trades are fed to a
+LossAccumulator every few candles. Once the bound cannot beat the n-th best loss
+so far, the backtest is stopped and the epoch is recorded with the bound as its
+loss and ``"pruned": true`` in the results file.
+
+max_profit follows from the candles: entries and exits are priced within the
+candle's low and high, so a trade entered at candle s and exited at candle e
+grows its stake by at most high_e / low_s. Chaining the trades a unit of
+capital can take, it grows by at most exp(v) per candle, where v is the sum of
+log(high / low) over the pairs (one entry per pair and candle) plus the largest
+move of a pair's high or low from the previous candle. The bound is therefore a
+true lower bound, but a loose one until late in the timerange. Pruning is only
+supported for spot backtests without position stacking or position adjustment,
+where these assumptions hold.
+"""
+
+import heapq
+import logging
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from joblib.externals import cloudpickle
+from pandas import DataFrame
+
+from freqtrade.data.btanalysis import trade_list_to_dataframe
+from freqtrade.optimize.hyperopt import Hyperopt
+from freqtrade.persistence import LocalTrade, PairLocks
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "hyperopts"))
+
+from loss_metrics import LossAccumulator  # noqa: E402
+
+
+logger = logging.getLogger(__name__)
+
+# Hyperopt workers unpickle the hooks below without this directory on their path.
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+
+class EpochPruned(Exception):
+    def __init__(self, bound: float, progress: float) -> None:
+        super().__init__(f"Loss bound {bound:.5f} after {progress:.0%} of the timerange.")
+        self.bound = bound
+        self.progress = progress
+
+
+class EpochPruner:
+    """
+    Hooks pruning into one Hyperopt instance. The parent process tracks the best
+    losses; workers receive the current threshold with every pickled task.
+    """
+
+    def __init__(self, hyperopt: Hyperopt, top: int = 1, check_every: int = 96) -> None:
+        """
+        :param top: Prune epochs that cannot beat the ``top`` best losses so far
+        :param check_every: Candles between two bound checks
+        """
+        self.hyperopt = hyperopt
+        self.bound = hyperopt.custom_hyperoptloss.hyperopt_loss_bound
+        self.top = top
+        self.check_every = check_every
+        self.threshold = float("inf")
+        self._best: List[float] = []
+        self._preparing = False
+        self._variation = np.zeros(1)
+        self._candles: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        self._generate_optimizer = hyperopt.generate_optimizer
+        self._evaluate_result = hyperopt.evaluate_result
+        self._get_ohlcv_as_lists = hyperopt.backtesting._get_ohlcv_as_lists
+        hyperopt.generate_optimizer = self.generate_optimizer
+        hyperopt.evaluate_result = self.evaluate_result
+        hyperopt.backtesting.check_abort = self.check
+        hyperopt.backtesting._get_ohlcv_as_lists = self.get_ohlcv_as_lists
+
+    @staticmethod
+    def supported(hyperopt: Hyperopt) -> bool:
+        return hasattr(hyperopt.custom_hyperoptloss, "hyperopt_loss_bound")
+
+    @staticmethod
+    def bounded(hyperopt: Hyperopt) -> bool:
+        """Whether the growth bound of max_profit() holds for the backtest."""
+        backtesting = hyperopt.backtesting
+        return (
+            hyperopt.config.get("trading_mode", "spot") == "spot"
+            and not backtesting._position_stacking
+            and not backtesting.strategy.position_adjustment_enable
+        )
+
+    def evaluate_result(self, val: Dict[str, Any], current: int, is_random: bool) -> None:
+        """Parent process: record the loss and move the threshold."""
+        self._evaluate_result(val, current, is_random)
+        if not val.get("pruned"):
+            self._best = heapq.nsmallest(self.top, [*self._best, val["loss"]])
+            if len(self._best) == self.top:
+                self.threshold = self._best[-1]
+
+    def generate_optimizer(self, raw_params: List[Any]) -> Dict[str, Any]:
+        """Worker process: one epoch, aborted by check() once it is hopeless."""
+        hyperopt = self.hyperopt
+        self._started = datetime.now(timezone.utc)
+        self._steps = 0
+        self._seen = 0
+        self._metrics = LossAccumulator(hyperopt.config["dry_run_wallet"], hyperopt.min_date, hyperopt.max_date)
+        self._total_steps = max(1, (hyperopt.max_date - hyperopt.min_date) // hyperopt.backtesting.timeframe_td)
+        try:
+            return self._generate_optimizer(raw_params)
+        except EpochPruned as pruned:
+            return self._pruned_result(raw_params, pruned)
+
+    def get_ohlcv_as_lists(self, processed: Dict[str, DataFrame]) -> Dict[str, Tuple]:
+        """Backtesting.backtest()'s data preparation, which calls check_abort() once per pair."""
+        self._preparing = True
+        self._variation = self.price_variation(processed)
+        try:
+            return self._get_ohlcv_as_lists(processed)
+        finally:
+            self._preparing = False
+
+    def check(self) -> None:
+        """Called by Backtesting.backtest() once per candle, and per pair while preparing."""
+        if self._preparing:
+            return
+        self._steps += 1
+        if self.threshold == float("inf") or self._steps % self.check_every:
+            return
+        closed = LocalTrade.bt_trades[self._seen:]
+        if closed:
+            self._metrics.update(trade_list_to_dataframe(closed))
+            self._seen += len(closed)
+        bound = self.bound(self._metrics, self.max_profit(), self.hyperopt.config)
+        if bound >= self.threshold:
+            raise EpochPruned(bound, min(1.0, self._steps / self._total_steps))
+
+    def price_variation(self, processed: Dict[str, DataFrame]) -> np.ndarray:
+        """
+        Cumulative log growth bound of capital per candle of the timerange:
+        element i bounds the growth over the candles before candle i.
+        """
+        hyperopt = self.hyperopt
+        candles = self._total_steps + 1
+        ranges, moves = np.zeros(candles), np.zeros(candles)
+        self._candles = {}
+        for pair, pair_data in processed.items():
+            if pair_data.empty:
+                continue
+            index = ((pair_data["date"] - hyperopt.min_date) // hyperopt.backtesting.timeframe_td).to_numpy()
+            self._candles[pair] = index, pair_data["high"].to_numpy(dtype=float), pair_data["low"].to_numpy(dtype=float)
+            high, low = np.log(self._candles[pair][1:])
+            move = np.maximum(np.abs(np.diff(high, prepend=high[0])), np.abs(np.diff(low, prepend=low[0])))
+            inside = (index >= 0) & (index < candles)
+            np.add.at(ranges, index[inside], (high - low)[inside])
+            np.maximum.at(moves, index[inside], move[inside])
+        return np.r_[0.0, np.cumsum(ranges + moves)]
+
+    def max_profit(self) -> float:
+        """Largest total profit the epoch can end with, from the closed and open trades so far."""
+        variation = self._variation
+        # The current candle is not backtested yet
+        now = min(self._steps - 1, len(variation) - 1)
+        wallet = self.hyperopt.config["dry_run_wallet"]
+        wealth = wallet + self._metrics.total_profit
+        for trade in LocalTrade.bt_trades_open:
+            # Exited at most at the last high (short: low) before now, grown by the candles from now on
+            index, high, low = self._candles[trade.pair]
+            last = max(0, np.searchsorted(index, now) - 1)
+            growth = trade.open_rate / low[last] if trade.is_short else high[last] / trade.open_rate
+            wealth += trade.stake_amount * (growth - 1)
+        return wealth * np.exp(variation[-1] - variation[now]) - wallet
+
+    def _pruned_result(self, raw_params: List[Any], pruned: EpochPruned) -> Dict[str, Any]:
+        """Result of the trades closed before the abort, with the bound as its loss."""
+        hyperopt = self.hyperopt
+        backtesting = hyperopt.backtesting
+        backtesting.wallets.update()
+        pruned_at = hyperopt.min_date + self._steps * backtesting.timeframe_td
+        bt_results = {
+            "results": trade_list_to_dataframe(LocalTrade.bt_trades),
+            "config": backtesting.strategy.config,
+            "locks": PairLocks.get_all_locks(),
+            "rejected_signals": backtesting.rejected_trades,
+            "timedout_entry_orders": backtesting.timedout_entry_orders,
+            "timedout_exit_orders": backtesting.timedout_exit_orders,
+            "canceled_trade_entries": backtesting.canceled_trade_entries,
+            "canceled_entry_orders": backtesting.canceled_entry_orders,
+            "replaced_entry_orders": backtesting.replaced_entry_orders,
+            "final_balance": backtesting.wallets.get_total(backtesting.strategy.config["stake_currency"]),
+            "backtest_start_time": int(self._started.timestamp()),
+            "backtest_end_time": int(datetime.now(timezone.utc).timestamp()),
+        }
+        params_dict = hyperopt._get_params_dict(hyperopt.dimensions, raw_params)
+        result = hyperopt._get_results_dict(bt_results, hyperopt.min_date, pruned_at, params_dict, processed={})
+        result.update({
+            "loss": pruned.bound,
+            "pruned": True,
+            "results_explanation": f"Pruned: {pruned} {result['results_explanation']}",
+        })
+        return result
+
+
+def install_pruning(hyperopt: Hyperopt, top: int = 1, check_every: int = 96) -> bool:
+    """Prune epochs of ``hyperopt`` if its loss declares a bound."""
+    if not EpochPruner.supported(hyperopt):
+        logger.warning(
+            f"{type(hyperopt.custom_hyperoptloss).__name__} has no hyperopt_loss_bound, not pruning."
+        )
+        return False
+    if not EpochPruner.bounded(hyperopt):
+        logger.warning("Profits are only bounded for spot backtests without position stacking or adjustment, "
+                       "not pruning.")
+        return False
+    EpochPruner(hyperopt, top, check_every)
+    return True
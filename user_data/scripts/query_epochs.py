@@ -0,0 +1,165 @@
+"""
+Query the hyperopt epochs of the epoch store (see epoch_store.py).
+
+Lists the best epochs over all runs, or the runs given with --run, that pass the
+filters, e.g. the best 20 with less than 10% drawdown and more than 1000 trades:
+
+    python user_data/scripts/query_epochs.py --max-drawdown 0.1 --min-trades 1000
+
+--where takes any SQL condition on the epochs columns, parameters included via
+json_extract(params, '$.buy_rsi'). --breakdown adds the loss components of every
+listed epoch and where the listed epochs spent their time, on average (--top 0
+lists all). --import adds the epochs of .fthypt results
+files written by plain `freqtrade hyperopt` runs or before the store existed,
+--import-latest those of the latest one.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/query_epochs.py [--store user_data/hyperopt_results/epochs.sqlite] \
+        [--import results.fthypt ...] [--import-latest] [--runs] [--run RUN ...] [--top 20] [--sort loss] [--desc] \
+        [--max-drawdown 0.1] [--min-trades 1000] [--max-trades N] [--min-profit 0.5] \
+        [--where SQL] [--params] [--breakdown] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from freqtrade.data.btanalysis import get_latest_hyperopt_file
+
+from epoch_store import COLUMNS, TIMINGS, EpochStore
+
+
+DEFAULT_STORE = Path("user_data/hyperopt_results/epochs.sqlite")
+BATCH = 500
+
+
+def read_epochs(results_file: Path, skip: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    """Epochs of a .fthypt results file after the first ``skip``, in batches."""
+    batch = []
+    with results_file.open() as f:
+        for line in islice(f, skip, None):
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= BATCH:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def import_results(store: EpochStore, results_file: Path) -> int:
+    """Add the epochs of ``results_file`` the store does not have yet (epochs are only appended)."""
+    run, imported = results_file.stem, 0
+    for batch in read_epochs(results_file, skip=store.epoch_count(run)):
+        store.add_run(run, {"strategy": batch[0].get("results_metrics", {}).get("strategy_name")})
+        imported += store.append(run, batch)
+    return imported
+
+
+def conditions(args: argparse.Namespace) -> List[Tuple[str, Any]]:
+    result = []
+    for option, condition in (
+        ("max_drawdown", "max_drawdown <"),
+        ("min_trades", "trades >"),
+        ("max_trades", "trades <"),
+        ("min_profit", "profit_total >"),
+    ):
+        if getattr(args, option) is not None:
+            result.append((condition, getattr(args, option)))
+    return result
+
+
+def print_breakdown(epochs: Sequence[Any]) -> None:
+    """Average time per epoch step and per loss component over ``epochs``."""
+    timed = [epoch for epoch in epochs if epoch["epoch_s"] is not None]
+    if timed:
+        means = {key: sum(epoch[key] or 0 for epoch in timed) / len(timed) for key in TIMINGS}
+        means["other_s"] = means["epoch_s"] - means["backtest_s"] - means["stats_s"] - means["loss_s"]
+        print(f"Mean epoch time over {len(timed)} epochs: {means['epoch_s'] * 1000:.1f} ms")
+        for key in ("backtest_s", "stats_s", "loss_s", "other_s"):
+            print(f"  {key[:-2]:<26} {means[key] * 1000:>10.2f} ms {means[key] / means['epoch_s']:>7.1%}")
+
+    components: Dict[str, List[Dict[str, float]]] = {}
+    for epoch in epochs:
+        for name, component in json.loads(epoch["components"] or "{}").items():
+            components.setdefault(name, []).append(component)
+    if components:
+        print(f"Loss components over {len(epochs)} epochs:")
+        print(f"  {'component':<26} {'mean weighted':>14} {'mean ms':>10}")
+        for name, records in components.items():
+            weighted = [record["weighted"] for record in records if "weighted" in record]
+            seconds = [record["seconds"] for record in records if "seconds" in record]
+            mean_weighted = f"{sum(weighted) / len(weighted):.5f}" if weighted else "-"
+            mean_ms = f"{sum(seconds) / len(seconds) * 1000:.3f}" if seconds else "-"
+            print(f"  {name:<26} {mean_weighted:>14} {mean_ms:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    parser.add_argument("--import", dest="results_files", type=Path, nargs="+", default=[],
+                        help="Add the epochs of .fthypt results files to the store.")
+    parser.add_argument("--import-latest", action="store_true",
+                        help="Add the epochs of the latest results file next to the store.")
+    parser.add_argument("--runs", action="store_true", help="List the stored runs.")
+    parser.add_argument("--run", nargs="+", help="Only epochs of these runs (results file names without .fthypt).")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", default="loss", choices=COLUMNS)
+    parser.add_argument("--desc", action="store_true", help="Sort descending, e.g. for --sort sharpe.")
+    parser.add_argument("--max-drawdown", type=float, help="Account drawdown below this ratio.")
+    parser.add_argument("--min-trades", type=int, help="More trades than this.")
+    parser.add_argument("--max-trades", type=int, help="Fewer trades than this.")
+    parser.add_argument("--min-profit", type=float, help="Total profit ratio above this.")
+    parser.add_argument("--where", help="Additional SQL condition, run on a read-only connection.")
+    parser.add_argument("--params", action="store_true", help="Also print the parameters of every epoch.")
+    parser.add_argument("--breakdown", action="store_true", help="Also print loss components and epoch times.")
+    parser.add_argument("--json", action="store_true", help="Print the epochs as JSON lines.")
+    args = parser.parse_args()
+
+    store = EpochStore(args.store)
+    if args.import_latest:
+        args.results_files.append(get_latest_hyperopt_file(args.store.parent))
+    for results_file in args.results_files:
+        print(f"Imported {import_results(store, results_file)} epochs of {results_file}")
+    if args.runs:
+        for run in store.list_runs():
+            print(f"{run['run']:<60} {run['epochs']:>6} epochs  best loss {run['best_loss']}  "
+                  f"{run['hyperopt_loss'] or ''} {run['spaces'] or ''}")
+        return
+
+    start = time.perf_counter()
+    epochs = store.query(conditions(args), args.run or (), args.where, args.sort, args.desc, args.top)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        for epoch in epochs:
+            print(json.dumps({
+                **dict(epoch),
+                "params": json.loads(epoch["params"]),
+                "components": json.loads(epoch["components"] or "{}"),
+            }))
+        return
+    print(f"{'run':<40} {'epoch':>6} {'loss':>10} {'profit':>8} {'drawdown':>9} {'sharpe':>7} "
+          f"{'sortino':>8} {'trades':>7} {'avg hold':>9}")
+    for epoch in epochs:
+        print(
+            f"{epoch['run'][-40:]:<40} {epoch['epoch']:>6} {epoch['loss']:>10.5f} "
+            f"{epoch['profit_total'] or 0:>8.2%} {epoch['max_drawdown'] or 0:>9.2%} {epoch['sharpe'] or 0:>7.2f} "
+            f"{epoch['sortino'] or 0:>8.2f} {epoch['trades'] or 0:>7} {(epoch['holding_avg_s'] or 0) / 3600:>8.1f}h"
+            + ("  pruned" if epoch["pruned"] else "")
+        )
+        if args.params:
+            print(f"    {epoch['params']}")
+        if args.breakdown and epoch["components"]:
+            print(f"    {epoch['components']}")
+    print(f"{len(epochs)} epochs in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    if args.breakdown:
+        print_breakdown(epochs)
+
+
+if __name__ == "__main__":
+    main()
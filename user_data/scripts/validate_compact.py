@@ -0,0 +1,170 @@
+"""
+Validate the compact indicator storage of AwesomeCombinationStrategy.
+
+Analyzes the stored candles of every whitelisted pair with compact_storage off
+and on, and reports the largest divergence of the kept indicator columns, the
+entry / exit signals that differ for any buy_rsi / sell_rsi and additional
+indicator combination, and the memory of both dataframes. Exits with status 1
+if a signal differs.
+
+Usage (inside the freqtrade container):
+    python user_data/scripts/validate_compact.py --config user_data/config.json \
+        [--strategy AwesomeCombinationStrategy] [--pairs BTC/USDT ...] [--timerange 20240101-] [--output report.json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.configuration import Configuration, TimeRange
+from freqtrade.data.dataprovider import DataProvider
+from freqtrade.data.history import load_data
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.resolvers import StrategyResolver
+
+
+MIB = 2**20
+# (side, rsi parameter, additional indicator parameter, populate step, signal column)
+SIDES = (
+    ("entry", "buy_rsi", "buy_additional_indicator", "populate_entry_trend", "enter_long"),
+    ("exit", "sell_rsi", "sell_additional_indicator", "populate_exit_trend", "exit_long"),
+)
+
+
+def analyze(strategy, candles: DataFrame, pair: str, compact: bool) -> DataFrame:
+    strategy.compact_storage = compact
+    return strategy.populate_indicators(candles.copy(), {"pair": pair})
+
+
+def column_divergence(full: DataFrame, compact: DataFrame) -> Dict[str, Dict[str, float]]:
+    """Largest absolute and relative difference of every column stored in a smaller dtype."""
+    divergence = {}
+    for column in compact.columns:
+        if column not in full or compact[column].dtype == full[column].dtype:
+            continue
+        expected = full[column].to_numpy(dtype=float)
+        actual = compact[column].to_numpy(dtype=float)
+        difference = np.abs(actual - expected)
+        difference[np.isnan(actual) != np.isnan(expected)] = np.inf
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = difference / np.abs(expected)
+        divergence[column] = {
+            "max_abs": float(np.nanmax(difference, initial=0.0)),
+            "max_rel": float(np.nanmax(np.where(difference == 0, 0.0, relative), initial=0.0)),
+        }
+    return divergence
+
+
+def parameter_grid(strategy, rsi: str, additional: str) -> Iterator[Tuple[int, str]]:
+    rsi_parameter = getattr(strategy, rsi)
+    for value in range(rsi_parameter.low, rsi_parameter.high + 1):
+        for profile in sorted(getattr(strategy, additional).opt_range):
+            yield value, profile
+
+
+def signal_divergence(strategy, pair: str, full: DataFrame, compact: DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Candles whose signal differs, per side: the total over all combinations and the worst one."""
+    result = {}
+    for side, rsi, additional, step, column in SIDES:
+        saved = getattr(strategy, rsi).value, getattr(strategy, additional).value
+        total, worst = 0, {"candles": 0}
+        try:
+            for value, profile in parameter_grid(strategy, rsi, additional):
+                getattr(strategy, rsi).value, getattr(strategy, additional).value = value, profile
+                signals = [
+                    getattr(strategy, step)(dataframe.copy(), {"pair": pair}).get(column)
+                    for dataframe in (full, compact)
+                ]
+                expected, actual = (
+                    np.zeros(len(full), dtype=bool) if values is None else values.to_numpy() == 1
+                    for values in signals
+                )
+                differing = int(np.count_nonzero(expected != actual))
+                total += differing
+                if differing > worst["candles"]:
+                    worst = {"candles": differing, rsi: value, additional: profile}
+        finally:
+            getattr(strategy, rsi).value, getattr(strategy, additional).value = saved
+        result[side] = {"differing_candles": total, "worst": worst}
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-c", "--config", nargs="+", default=["user_data/config.json"])
+    parser.add_argument("-s", "--strategy", default="AwesomeCombinationStrategy")
+    parser.add_argument("--datadir", help="Candle data directory, the configured one by default.")
+    parser.add_argument("-p", "--pairs", nargs="+", help="Pairs to analyze, the pair whitelist by default.")
+    parser.add_argument("--timerange", help="Candles to analyze, all stored ones by default.")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    config = Configuration(
+        {"config": args.config, "strategy": args.strategy, "datadir": args.datadir},
+        RunMode.UTIL_NO_EXCHANGE,
+    ).get_config()
+    strategy = StrategyResolver.load_strategy(config)
+    strategy.dp = DataProvider(config, None)
+    strategy.ft_bot_start()
+
+    pairs = args.pairs or config["exchange"]["pair_whitelist"]
+    data = load_data(
+        config["datadir"],
+        config["timeframe"],
+        pairs,
+        timerange=TimeRange.parse_timerange(args.timerange) if args.timerange else None,
+        data_format=config.get("dataformat_ohlcv", "feather"),
+        candle_type=config.get("candle_type_def", CandleType.SPOT),
+    )
+    if not data:
+        sys.exit(f"No candles found for {pairs} in {config['datadir']}.")
+
+    report: Dict[str, Any] = {"strategy": config["strategy"], "timeframe": config["timeframe"], "pairs": {}}
+    for pair, candles in data.items():
+        full = analyze(strategy, candles, pair, compact=False)
+        compact = analyze(strategy, candles, pair, compact=True)
+        report["pairs"][pair] = {
+            "candles": len(candles),
+            "full_mib": full.memory_usage(deep=True).sum() / MIB,
+            "compact_mib": compact.memory_usage(deep=True).sum() / MIB,
+            "columns": column_divergence(full, compact),
+            "signals": signal_divergence(strategy, pair, full, compact),
+        }
+
+    pair_reports = report["pairs"].values()
+    full_mib = sum(pair["full_mib"] for pair in pair_reports)
+    compact_mib = sum(pair["compact_mib"] for pair in pair_reports)
+    differing = {
+        side: sum(pair["signals"][side]["differing_candles"] for pair in pair_reports) for side, *_ in SIDES
+    }
+    report["summary"] = {"full_mib": full_mib, "compact_mib": compact_mib, "differing_candles": differing}
+
+    print(f"{'column':<20} {'max abs':>12} {'max rel':>12}")
+    columns = sorted({column for pair in pair_reports for column in pair["columns"]})
+    for column in columns:
+        max_abs = max(pair["columns"][column]["max_abs"] for pair in pair_reports if column in pair["columns"])
+        max_rel = max(pair["columns"][column]["max_rel"] for pair in pair_reports if column in pair["columns"])
+        print(f"{column:<20} {max_abs:>12.3g} {max_rel:>12.3g}")
+    for side, *_ in SIDES:
+        print(f"{side} signals differing: {differing[side]} candles over all parameter combinations")
+        for pair, pair_report in report["pairs"].items():
+            worst = pair_report["signals"][side]["worst"]
+            if worst["candles"]:
+                print(f"  {pair}: worst {worst}")
+    print(f"Memory: {full_mib:.1f} MiB full, {compact_mib:.1f} MiB compact ({compact_mib / full_mib:.0%})")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Report written to {args.output}")
+    if any(differing.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@
 import numpy as np  # noqa
 import pandas as pd  # noqa
 from pandas import DataFrame
-from typing import Optional, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from freqtrade.strategy import (
     BooleanParameter,
@@ -15,19 +15,55 @@ from freqtrade.strategy import (
     IntParameter,
     merge_informative_pair
 )
+from freqtrade.enums import CandleType
+from freqtrade.exceptions import OperationalException
 from freqtrade.persistence import Trade
+from freqtrade.exchange import timeframe_to_seconds
 
 # --------------------------------
 # Add your lib to import here
 import random
 from itertools import product, chain
 from datetime import datetime
-from functools import reduce
+from pathlib import Path
+from functools import partial, reduce
 import talib.abstract as ta
 import pandas_ta as pd_ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 from itertools import permutations
 
+from awesome_combination import (
+    BASE_COLUMNS,
+    CandleLookup,
+    CompiledROI,
+    ENTRY_BASE,
+    ENTRY_COLUMNS,
+    ENTRY_CONDITIONS,
+    EXIT_BASE,
+    EXIT_COLUMNS,
+    EXIT_CONDITIONS,
+    IncrementalIndicatorEngine,
+    IndicatorCache,
+    ParallelAnalysis,
+    RollingStats,
+    SIGNAL_COLUMNS,
+    StepProfiler,
+    VWAP,
+    code_fingerprint,
+    compact_indicators,
+    condition_columns,
+    ema_macd,
+    entry_condition_bits,
+    exit_condition_bits,
+    profile_conditions,
+    profile_mask,
+    profile_step,
+    rows_at_least,
+    rows_below,
+    signal,
+    threshold_order,
+)
+
 random.seed(18)
 # random.seed(datetime.now().timestamp())
 
@@ -63,6 +99,46 @@ class AwesomeCombinationStrategy(IStrategy):
     # Run "populate_indicators()" only for new candle.
     process_only_new_candles = True
 
+    # Live / dry-run only: keep per-pair indicator state and only step the new
+    # candles instead of recomputing the whole dataframe.
+    incremental_indicators = False
+    # Maximum relative divergence from a full recompute, checked every n updates.
+    incremental_tolerance = 1e-4
+    incremental_verify_every = 96
+
+    # Backtesting / hyperopt only: store computed indicators in
+    # user_data/indicator_cache and reuse them for identical candles and code.
+    use_indicator_cache = True
+
+    # Only compute the indicator columns the conditions of the selectable
+    # additional indicator profiles read (see awesome_combination.signals): those
+    # of the set profiles, in hyperopt those of every profile the parameters can
+    # take. Disable to get every column, e.g. for plotting.
+    prune_indicators = True
+
+    # Analyze the pairs in a pool of this many worker processes ("process") or
+    # threads ("thread") instead of one after the other, 0 disables it. Live /
+    # dry-run analyses all pairs with a new candle at once, backtesting and
+    # hyperopt the indicators of all pairs. Live / dry-run always use threads:
+    # forking the bot would copy its locks held by other threads, and forked
+    # workers would miss later parameter changes. Ignored with
+    # incremental_indicators, whose per-pair state has to stay in the bot process.
+    parallel_analysis_workers = 0
+    parallel_analysis_backend = "process"
+
+    # Store the analyzed dataframes compactly (see awesome_combination.compact):
+    # only the columns the signals read, as float32 / int32, with the squeeze
+    # flags packed into one byte. compact_keep adds columns, e.g. for plotting.
+    compact_storage = False
+    compact_keep = ()
+
+    # Set by user_data/scripts/profile_analysis.py to time the indicator blocks.
+    profiler: Optional[StepProfiler] = None
+
+    # VWAP session: None is cumulative over the whole dataframe, "D" / "W" reset
+    # every UTC day / week, an int rolls over that many candles.
+    vwap_anchor = None
+
     # These values can be overridden in the config.
     use_exit_signal = True
     exit_profit_only = False
@@ -87,6 +163,11 @@ class AwesomeCombinationStrategy(IStrategy):
         },
     }
 
+    ema_periods = (3, 5, 9, 10, 21, 50, 100, 200)
+    # ta.MACD only knows fastperiod/slowperiod/signalperiod, so the fast/slow/signal
+    # keywords it used to get from macd_profiles fell back to TA-Lib's defaults.
+    macd_periods = (12, 26, 9)
+
     buy_profiles    = ["MACD", "BB", "STOCH_OSC", "EMA", "TTM"]
     sell_profiles   = ["MACD", "STOCH_OSC", "TTM"]
     
@@ -117,8 +198,22 @@ class AwesomeCombinationStrategy(IStrategy):
     use_max_drawdown_protection = BooleanParameter(default=False, space="protection", optimize=True)
     use_stop_protection         = BooleanParameter(default=True, space="protection", optimize=True)
 
+    protection_parameters = (
+        "cooldown_lookback", "low_profit_trade_limit", "max_drawdown_trade_limit", "stop_duration",
+        "trade_limit", "use_low_profit", "use_max_drawdown_protection", "use_stop_protection",
+    )
+
     @property
     def protections(self):
+        # Backtesting reads the protections twice per run and the protection space
+        # hyperopt once per epoch, build them once per parameter combination.
+        key = tuple(getattr(self, name).value for name in self.protection_parameters)
+        cache = self.__dict__.setdefault("_protections", {})
+        if key not in cache:
+            cache[key] = self.build_protections()
+        return cache[key]
+
+    def build_protections(self) -> List[dict]:
         prot = []
 
         # Cooldown period to prevent over-trading
@@ -169,6 +264,12 @@ class AwesomeCombinationStrategy(IStrategy):
         "280": 0.055,
         "507": 0
     }
+    # Per-pair parameter overrides, e.g. {"BTC/USDT": {"minimal_roi": {"0": 0.2, "60": 0.05}}}.
+    # A pair's minimal_roi decides its ROI exits. Backtesting prices them through
+    # min_roi_reached_entry(), which freqtrade calls without the pair: scripts/pair_roi.py
+    # sets roi_pricing_pair around that call, backtests without it refuse pair tables.
+    custom_pair_params: Dict[str, dict] = {}
+    roi_pricing_pair: Optional[str] = None
 
     # Optimal stoploss designed for the strategy.
     # This attribute will be overridden if the config file contains "stoploss".
@@ -216,15 +317,135 @@ class AwesomeCombinationStrategy(IStrategy):
 
 
 
+    def bot_start(self, **kwargs) -> None:
+        # Chosen by select_indicators() on the first analysis, after ft_bot_start()
+        # has loaded the parameters
+        self.entry_conditions: Optional[Set[str]] = None
+        self.exit_conditions: Optional[Set[str]] = None
+        self.indicator_columns: Optional[Set[str]] = None
+        self.indicator_cache: Optional[IndicatorCache] = None
+
+        self.vwap = VWAP(self.vwap_anchor)
+        self.indicator_engine = IncrementalIndicatorEngine(
+            self.compute_indicators,
+            ema_periods=self.ema_periods,
+            macd_periods=self.macd_periods,
+            vwap=self.vwap,
+            tolerance=self.incremental_tolerance,
+            verify_every=self.incremental_verify_every,
+        )
+        # ATR per candle for custom_stoploss, refreshed with every analyzed dataframe
+        self.atr_lookup = CandleLookup("atr", timeframe_to_seconds(self.timeframe))
+        self.parallel_analysis = None
+        self._parallel_analyzed: Dict[str, DataFrame] = {}
+        if self.parallel_analysis_workers > 0:
+            self.parallel_analysis = ParallelAnalysis(
+                {"indicators": self.advise_indicators, "analysis": super().analyze_ticker},
+                workers=self.parallel_analysis_workers,
+                backend=self.parallel_analysis_mode(),
+            )
+
+    def parallel_analysis_mode(self) -> str:
+        # Process workers are forked, only backtesting / hyperopt are single threaded
+        if self.parallel_analysis_backend == "process" and self.dp.runmode.value in ("live", "dry_run"):
+            return "thread"
+        return self.parallel_analysis_backend
+
+    def analyze(self, pairs: List[str]) -> None:
+        # Live / dry-run: analyze the pairs with a new candle in the pool first,
+        # analyze_pair() then picks up the results in whitelist order.
+        if self.parallel_analysis is not None and not self.incremental_indicators:
+            # Before the threads start, so they do not all make the first choice
+            self.select_indicators()
+            self._parallel_analyzed = self.parallel_analysis.run(self._pending_candles(pairs), "analysis")
+        try:
+            super().analyze(pairs)
+        finally:
+            self._parallel_analyzed = {}
+
+    def _pending_candles(self, pairs: List[str]) -> Dict[str, DataFrame]:
+        """Candles of the pairs _analyze_ticker_internal() will analyze this round."""
+        candle_type = self.config.get("candle_type_def", CandleType.SPOT)
+        pending = {}
+        for pair in pairs:
+            dataframe = self.dp.ohlcv(pair, self.timeframe, candle_type=candle_type)
+            if not isinstance(dataframe, DataFrame) or dataframe.empty:
+                continue
+            if not self.process_only_new_candles or self._last_candle_seen_per_pair.get(pair) != dataframe.iloc[-1]["date"]:
+                pending[pair] = dataframe
+        return pending
+
+    def analyze_ticker(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        analyzed = self._parallel_analyzed.pop(metadata["pair"], None)
+        if (
+            analyzed is None
+            or len(analyzed) != len(dataframe)
+            or analyzed["date"].iloc[-1] != dataframe["date"].iloc[-1]
+        ):
+            return super().analyze_ticker(dataframe, metadata)
+        # populate_exit_trend ran in a worker
+        self.atr_lookup.update(metadata["pair"], analyzed)
+        return analyzed
+
+    def advise_all_indicators(self, data: Dict[str, DataFrame]) -> Dict[str, DataFrame]:
+        if self.parallel_analysis is None:
+            return super().advise_all_indicators(data)
+        # Backtesting / hyperopt analyze once, the workers are not needed afterwards
+        analyzed = self.parallel_analysis.run(data, "indicators")
+        self.parallel_analysis.shutdown()
+        return {
+            pair: analyzed[pair] if pair in analyzed else self.advise_indicators(pair_data.copy(), {"pair": pair}).copy()
+            for pair, pair_data in data.items()
+        }
+
+    def select_indicators(self) -> None:
+        """
+        Choose the conditions and indicator columns the additional indicator
+        profiles can select, and the indicator cache keyed on them. Only the
+        first call does anything.
+        """
+        if self.indicator_cache is not None:
+            return
+        if self.prune_indicators:
+            self.entry_conditions = profile_conditions(
+                self.selectable(self.buy_additional_indicator), ENTRY_CONDITIONS, ENTRY_BASE
+            )
+            self.exit_conditions = profile_conditions(
+                self.selectable(self.sell_additional_indicator), EXIT_CONDITIONS, EXIT_BASE
+            )
+            self.indicator_columns = {
+                *BASE_COLUMNS,
+                *condition_columns(self.entry_conditions, ENTRY_COLUMNS),
+                *condition_columns(self.exit_conditions, EXIT_COLUMNS),
+            }
+        self.indicator_cache = IndicatorCache(
+            Path(self.config["user_data_dir"]) / "indicator_cache",
+            code_fingerprint(
+                self.compute_indicators, self.ttm_squeeze, ema_macd, RollingStats, VWAP,
+                self.ema_periods, self.macd_periods, self.vwap_anchor,
+                sorted(self.indicator_columns or ()),
+            ),
+        )
+
+    def selectable(self, parameter) -> list:
+        # Hyperopt analyzes once for every epoch, whose values are any of the
+        # optimizable ones, also of parameters outside the optimized spaces
+        if self.dp.runmode.value == "hyperopt" and parameter.optimize:
+            return list(parameter.opt_range)
+        return [parameter.value]
+
     def custom_params(self, pair: str, param: str):
         return self.custom_pair_params.get(pair, {}).get(param, getattr(self, param).value)
 
-    def ttm_squeeze(self, dataframe: DataFrame, bollinger_period: int = 20, keltner_period: int = 20, momentum_period: int = 12) -> DataFrame:
+    def ttm_squeeze(self, dataframe: DataFrame, bollinger_period: int = 20, keltner_period: int = 20, momentum_period: int = 12, stats: Optional[RollingStats] = None) -> DataFrame:
+        # Rolling statistics already computed during this analysis, if any
+        stats = stats or RollingStats(dataframe)
+
         # Calculate Bollinger Bands
-        bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=bollinger_period, stds=2)
+        bollinger = stats.bollinger_bands(window=bollinger_period, stds=2)
 
         # Calculate Keltner Channels
-        keltner = qtpylib.keltner_channel(dataframe, window=keltner_period)
+        keltner = stats.keltner_channel(window=keltner_period)
 
         # Calculate Momentum Histogram
         momentum_hist = dataframe['close'] - dataframe['close'].shift(momentum_period)
@@ -240,55 +461,136 @@ class AwesomeCombinationStrategy(IStrategy):
         return dataframe
     
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        self.select_indicators()
+        if self.incremental_indicators and self.dp.runmode.value in ("live", "dry_run"):
+            dataframe = self.indicator_engine.populate(dataframe, metadata["pair"])
+        elif self.use_indicator_cache and self.dp.runmode.value in ("backtest", "hyperopt"):
+            dataframe = self.indicator_cache.populate(
+                dataframe, metadata["pair"], self.timeframe,
+                partial(self.compute_indicators, columns=self.indicator_columns),
+            )
+        else:
+            dataframe = self.compute_indicators(dataframe, self.indicator_columns)
+
+        with profile_step(self.profiler, "conditions"):
+            # Parameter independent entry / exit conditions, packed once per pair
+            dataframe["entry_conditions"] = entry_condition_bits(dataframe, self.entry_conditions)
+            dataframe["exit_conditions"] = exit_condition_bits(dataframe, self.exit_conditions)
+            # Row positions sorted by RSI for the buy_rsi / sell_rsi thresholds
+            dataframe["rsi_order"] = threshold_order(dataframe["rsi"].to_numpy())
+
+        if self.compact_storage:
+            with profile_step(self.profiler, "compact"):
+                dataframe = compact_indicators(dataframe, (*SIGNAL_COLUMNS, *self.compact_keep))
+        return dataframe
+
+    def compute_indicators(self, dataframe: DataFrame, columns: Optional[Set[str]] = None) -> DataFrame:
+        # Blocks whose columns are not wanted are skipped, None computes all of them
+        def wanted(*names: str) -> bool:
+            return columns is None or not columns.isdisjoint(names)
+
         # Stochastic RSI
-        stoch_rsi = ta.STOCHRSI(dataframe)
-        dataframe['fastd_rsi'] = stoch_rsi['fastd']
-        dataframe['fastk_rsi'] = stoch_rsi['fastk']
+        if wanted('fastd_rsi', 'fastk_rsi'):
+            with profile_step(self.profiler, "STOCHRSI"):
+                stoch_rsi = ta.STOCHRSI(dataframe)
+                dataframe['fastd_rsi'] = stoch_rsi['fastd']
+                dataframe['fastk_rsi'] = stoch_rsi['fastk']
 
         # Calculate ATR with a 14-period setting and rolling mean of the True Range
-        dataframe['atr'] = ta.ATR(dataframe, timeperiod=14)
+        if wanted('atr'):
+            with profile_step(self.profiler, "ATR"):
+                dataframe['atr'] = ta.ATR(dataframe, timeperiod=14)
 
         # Get the 14 day rsi
-        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
+        if wanted('rsi'):
+            with profile_step(self.profiler, "RSI"):
+                dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
         
-        # EMA - Exponential Moving Average
-        dataframe['ema3']   = ta.EMA(dataframe, timeperiod=3)
-        dataframe['ema5']   = ta.EMA(dataframe, timeperiod=5)
-        dataframe['ema9']   = ta.EMA(dataframe, timeperiod=9)
-        dataframe['ema10']  = ta.EMA(dataframe, timeperiod=10)
-        dataframe['ema21']  = ta.EMA(dataframe, timeperiod=21)
-        dataframe['ema50']  = ta.EMA(dataframe, timeperiod=50)
-        dataframe['ema100'] = ta.EMA(dataframe, timeperiod=100)
-        dataframe['ema200'] = ta.EMA(dataframe, timeperiod=200)
-
-        # MACD
-        macd = ta.MACD(dataframe, slow=self.macd_profiles[self.timeframe]["slow"], fast=self.macd_profiles[self.timeframe]["fast"], signal=self.macd_profiles[self.timeframe]["signal"])
-        dataframe["macd"]       = macd["macd"]
-        dataframe["macdsignal"] = macd["macdsignal"]
-        dataframe["macdhist"]   = macd["macdhist"]
+        # EMA - Exponential Moving Average, and MACD on the same close array
+        ema_periods = [period for period in self.ema_periods if wanted(f'ema{period}')]
+        macd_wanted = wanted("macd", "macdsignal", "macdhist")
+        if ema_periods or macd_wanted:
+            with profile_step(self.profiler, "EMA+MACD"):
+                emas, macd = ema_macd(
+                    dataframe['close'].to_numpy(dtype=float), ema_periods, self.macd_periods if macd_wanted else None
+                )
+                for i, period in enumerate(ema_periods):
+                    dataframe[f'ema{period}'] = emas[:, i]
+
+                # MACD
+                if macd_wanted:
+                    dataframe["macd"]       = macd[:, 0]
+                    dataframe["macdsignal"] = macd[:, 1]
+                    dataframe["macdhist"]   = macd[:, 2]
+
+        # Typical price / true range rolling windows, shared with the TTM squeeze
+        stats = RollingStats(dataframe)
 
         # Bollinger Bands
-        bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=20, stds=2)
-        dataframe['bb_lowerband']   = bollinger['lower']
-        dataframe['bb_middleband']  = bollinger['mid']
-        dataframe['bb_upperband']   = bollinger['upper']
+        if wanted('bb_lowerband', 'bb_middleband', 'bb_upperband'):
+            with profile_step(self.profiler, "BB"):
+                bollinger = stats.bollinger_bands(window=20, stds=2)
+                dataframe['bb_lowerband']   = bollinger['lower']
+                dataframe['bb_middleband']  = bollinger['mid']
+                dataframe['bb_upperband']   = bollinger['upper']
         
         # VWAP
         # dataframe['vwap'] = qtpylib.vwap(dataframe)
-        dataframe['vwap'] = (((dataframe['high'] + dataframe['low'] + dataframe['close']) / 3) * dataframe['volume']).cumsum() / dataframe['volume'].cumsum()
+        if wanted('vwap'):
+            with profile_step(self.profiler, "VWAP"):
+                dataframe['vwap'] = self.vwap.compute(dataframe, stats.typical_price())
 
         # TTM Squeeze
-        dataframe = self.ttm_squeeze(dataframe)
+        if wanted('squeeze_on', 'squeeze_off', 'momentum_hist'):
+            with profile_step(self.profiler, "TTM"):
+                dataframe = self.ttm_squeeze(dataframe, stats=stats)
 
         return dataframe
 
 
+    def roi_table(self, pair: Optional[str] = None) -> CompiledROI:
+        # Compiled once per minimal_roi, hyperopt assigns a new one every epoch
+        compiled = self.__dict__.get("_compiled_roi")
+        if compiled is None or compiled[0] is not self.minimal_roi:
+            overrides = {
+                name: CompiledROI(params["minimal_roi"])
+                for name, params in self.custom_pair_params.items() if "minimal_roi" in params
+            }
+            compiled = self.__dict__["_compiled_roi"] = (self.minimal_roi, CompiledROI(self.minimal_roi), overrides)
+        return compiled[2].get(pair, compiled[1])
+
+    def roi_table_pairs(self) -> List[str]:
+        # Pairs with their own minimal_roi
+        self.roi_table()
+        return list(self.__dict__["_compiled_roi"][2])
+
+    def roi_thresholds(self, pair: str, minutes: np.ndarray) -> np.ndarray:
+        # ROI of the pair per trade duration, used by the exit simulator
+        return self.roi_table(pair).thresholds_at(minutes)
+
+    def min_roi_reached_entry(self, trade_dur: int, pair: Optional[str] = None) -> Tuple[Optional[int], Optional[float]]:
+        # The pair's table, minimal_roi's without a pair (freqtrade passes none)
+        pair = pair or self.roi_pricing_pair
+        if pair is None and self.dp.runmode.value in ("backtest", "hyperopt") and self.roi_table_pairs():
+            raise OperationalException(
+                "Backtesting prices ROI exits from minimal_roi, not from the minimal_roi of custom_pair_params. "
+                "Run it through user_data/scripts (see pair_roi.py) or remove the pair tables."
+            )
+        return self.roi_table(pair).entry(trade_dur)
+
+    def min_roi_reached(self, trade: Trade, current_profit: float, current_time: datetime) -> bool:
+        trade_dur = int((current_time.timestamp() - trade.open_date_utc.timestamp()) // 60)
+        _, roi = self.min_roi_reached_entry(trade_dur, trade.pair)
+        return roi is not None and current_profit > roi
+
     use_custom_stoploss = True
     def custom_stoploss(self, pair: str, trade: Trade, current_time: 'datetime', current_rate: float, current_profit: float, **kwargs) -> float:
         # Calculate ATR-based stoploss
-        dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
-        last_candle = dataframe.iloc[-1]
-        atr_stoploss = last_candle['atr'] * self.atr_stoploss_multiplier.value
+        atr = self.atr_lookup.get(pair, current_time)
+        if atr is None:
+            dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
+            atr = dataframe.iloc[-1]['atr']
+        atr_stoploss = atr * self.atr_stoploss_multiplier.value
         
         # Set stoploss based on ATR
         stoploss_price = trade.open_rate - atr_stoploss
@@ -296,71 +598,33 @@ class AwesomeCombinationStrategy(IStrategy):
             return -1  # stop out
         return 1  # continue
 
-    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-       # Define the buy conditions
-        long_conditions = []
-        
-        ### Momentum Indicators ###
-        RSI         = (dataframe['rsi'] < self.buy_rsi.value)
-        MACD        = (dataframe["macd"] < dataframe["macdsignal"])
-        VWAP        = (dataframe['close'] > dataframe['vwap'])
-        STOCK_OSC   = (dataframe['fastk_rsi'] > dataframe['fastd_rsi']) #& (dataframe['fastk_rsi'] < self.buy_stoch_osc.value)
-        BB          = (dataframe["close"] <= dataframe["bb_lowerband"]) #& (dataframe["close"].shift(1) < dataframe["close"])
-        EMA         = (dataframe["ema10"] > dataframe["ema50"])
-        # EMA         = (dataframe[f"ema{self.buy_fast_ema.value}"] > dataframe[f"ema{self.buy_slow_ema.value}"])
-        
-        long_conditions.append(RSI)
-        long_conditions.append(VWAP)
-
-        if "MACD" in self.buy_additional_indicator.value:
-            long_conditions.append(MACD)
-        if "STOCK_OSC" in self.buy_additional_indicator.value:
-            long_conditions.append(STOCK_OSC)
-        if "BB" in self.buy_additional_indicator.value:
-            long_conditions.append(BB)
-        if "EMA" in self.buy_additional_indicator.value:
-            long_conditions.append(EMA)
-        
+    def custom_stoploss_vectorized(self, pair: str, trade: Trade, current_times: np.ndarray, current_rates: np.ndarray, current_profits: np.ndarray) -> Optional[np.ndarray]:
+        # custom_stoploss for an array of candle times (ns) and rates, used by the exit simulator
+        atr = self.atr_lookup.get_many(pair, current_times)
+        if atr is None:
+            return None
+        stoploss_price = trade.open_rate - atr * self.atr_stoploss_multiplier.value
+        return np.where(current_rates < stoploss_price, -1.0, 1.0)
 
-        # TTM Squeeze entry condition
-        squeeze_on = dataframe['squeeze_on']
-        momentum_positive = dataframe['momentum_hist'] > 0
-        if "TTM" in self.buy_additional_indicator.value:
-            long_conditions.append(squeeze_on & momentum_positive)
+    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        # Define the buy conditions: RSI, VWAP and the selected additional indicators
+        # (MACD, STOCK_OSC, BB, EMA, TTM squeeze), see awesome_combination.signals
+        mask = profile_mask(self.buy_additional_indicator.value, ENTRY_CONDITIONS, ENTRY_BASE)
+        RSI = rows_below(dataframe["rsi"].to_numpy(), dataframe["rsi_order"].to_numpy(), self.buy_rsi.value)
 
-        if long_conditions:
-            dataframe.loc[
-                reduce(lambda x, y: x & y, long_conditions),
-                'enter_long'] = 1
+        dataframe.loc[signal(dataframe["entry_conditions"].to_numpy(), mask, RSI), "enter_long"] = 1
 
         return dataframe
 
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        # Define the sell conditions
-        long_conditions = []
-
-        ### Momentum Indicators ###
-        RSI = (dataframe['rsi'] >= self.sell_rsi.value)
-        MACD = (dataframe["macd"] >= dataframe["macdsignal"])
-        STOCK_OSC = (dataframe['fastk_rsi'] <= dataframe['fastd_rsi']) #& (dataframe['fastk_rsi'] >= self.sell_stoch_osc.value)
-
-        long_conditions.append(RSI)
-
-        if "MACD" in self.sell_additional_indicator.value:
-            long_conditions.append(MACD)
-        if "STOCK_OSC" in self.sell_additional_indicator.value:
-            long_conditions.append(STOCK_OSC)
-
-        # TTM Squeeze exit condition
-        squeeze_off = dataframe['squeeze_off']
-        momentum_negative = dataframe['momentum_hist'] < 0
-        if "TTM" in self.sell_additional_indicator.value:
-            long_conditions.append(squeeze_off & momentum_negative)
-            
-        if long_conditions:
-            dataframe.loc[
-                reduce(lambda x, y: x & y, long_conditions),
-                'exit_long'] = 1
-            
+        # Define the sell conditions: RSI and the selected additional indicators
+        # (MACD, STOCK_OSC, TTM squeeze), see awesome_combination.signals
+        mask = profile_mask(self.sell_additional_indicator.value, EXIT_CONDITIONS, EXIT_BASE)
+        RSI = rows_at_least(dataframe["rsi"].to_numpy(), dataframe["rsi_order"].to_numpy(), self.sell_rsi.value)
+
+        dataframe.loc[signal(dataframe["exit_conditions"].to_numpy(), mask, RSI), "exit_long"] = 1
+
+        # Last hook before the dataframe is handed to the dataprovider
+        self.atr_lookup.update(metadata["pair"], dataframe)
         return dataframe
@@ -0,0 +1,78 @@
+"""
+Helpers for AwesomeCombinationStrategy.
+
+The strategy directory is only on sys.path while freqtrade imports the strategy
+module, so this package is registered to be pickled by value - the same trick
+freqtrade uses for inherited strategies - to keep hyperopt workers working
+without the directory on their path.
+"""
+
+import sys
+
+from joblib.externals import cloudpickle
+
+from .cache import IndicatorCache, code_fingerprint
+from .compact import SIGNAL_COLUMNS, compact_indicators, unpack_flags
+from .ema_macd import ema_macd
+from .incremental import IncrementalIndicatorEngine
+from .lookup import CandleLookup
+from .parallel import ParallelAnalysis
+from .profiling import StepProfiler, profile_step
+from .roi import CompiledROI
+from .rolling import RollingStats
+from .signals import (
+    BASE_COLUMNS,
+    ENTRY_BASE,
+    ENTRY_COLUMNS,
+    ENTRY_CONDITIONS,
+    EXIT_BASE,
+    EXIT_COLUMNS,
+    EXIT_CONDITIONS,
+    condition_columns,
+    entry_condition_bits,
+    exit_condition_bits,
+    profile_conditions,
+    profile_mask,
+    rows_at_least,
+    rows_below,
+    signal,
+    threshold_order,
+)
+from .vwap import VWAP
+
+
+cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+
+__all__ = [
+    "BASE_COLUMNS",
+    "CandleLookup",
+    "CompiledROI",
+    "ENTRY_BASE",
+    "ENTRY_COLUMNS",
+    "ENTRY_CONDITIONS",
+    "EXIT_BASE",
+    "EXIT_COLUMNS",
+    "EXIT_CONDITIONS",
+    "IncrementalIndicatorEngine",
+    "IndicatorCache",
+    "ParallelAnalysis",
+    "RollingStats",
+    "SIGNAL_COLUMNS",
+    "StepProfiler",
+    "VWAP",
+    "code_fingerprint",
+    "compact_indicators",
+    "condition_columns",
+    "ema_macd",
+    "entry_condition_bits",
+    "exit_condition_bits",
+    "profile_conditions",
+    "profile_mask",
+    "profile_step",
+    "rows_at_least",
+    "rows_below",
+    "signal",
+    "threshold_order",
+    "unpack_flags",
+]
@@ -0,0 +1,116 @@
+"""
+On-disk indicator cache for AwesomeCombinationStrategy.
+
+Backtesting and every hyperopt run compute the same indicators for the same
+candles. The computed indicator columns are stored as Feather files keyed by
+pair, timeframe, timerange, a hash of the candle data and a hash of the
+indicator code, so runs with identical inputs memory-map the stored columns
+instead of recomputing them.
+"""
+
+import hashlib
+import inspect
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+from pandas import DataFrame, concat
+from pandas.util import hash_pandas_object
+from pyarrow import feather
+
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+
+
+def code_fingerprint(*parts) -> str:
+    """
+    Hash of everything the indicator values depend on besides the candles.
+    Functions and classes contribute their source, anything else its repr.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if inspect.isroutine(part) or inspect.isclass(part) or inspect.ismodule(part):
+            part = inspect.getsource(part)
+        digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def data_fingerprint(dataframe: DataFrame) -> str:
+    """Hash of the candle data, independent of the dataframe index."""
+    hashes = hash_pandas_object(dataframe[OHLCV_COLUMNS], index=False)
+    return hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+
+
+class IndicatorCache:
+    """
+    Feather files with the indicator columns of one (pair, timeframe, timerange,
+    data, code) combination each. Files are written atomically, so concurrent
+    hyperopt runs sharing the directory never read a partial file.
+    """
+
+    def __init__(self, directory: Path, code_hash: str) -> None:
+        self.directory = Path(directory)
+        self.code_hash = code_hash
+
+    def path(self, dataframe: DataFrame, pair: str, timeframe: str) -> Path:
+        start = dataframe["date"].iloc[0].strftime("%Y%m%d%H%M")
+        end = dataframe["date"].iloc[-1].strftime("%Y%m%d%H%M")
+        name = "-".join([
+            pair.replace("/", "_").replace(":", "_"),
+            timeframe,
+            f"{start}_{end}",
+            data_fingerprint(dataframe)[:16],
+            self.code_hash[:16],
+        ])
+        return self.directory / f"{name}.feather"
+
+    def load(self, path: Path, dataframe: DataFrame) -> Optional[DataFrame]:
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, ValueError):
+            return None
+        if table.num_rows != len(dataframe):
+            return None
+        columns = table.to_pandas()
+        columns.index = dataframe.index
+        return concat([dataframe, columns], axis=1)
+
+    def store(self, path: Path, dataframe: DataFrame, columns: list) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            feather.write_feather(
+                dataframe[columns].reset_index(drop=True), tmp_path, compression="uncompressed"
+            )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write indicator cache {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def populate(
+        self,
+        dataframe: DataFrame,
+        pair: str,
+        timeframe: str,
+        compute: Callable[[DataFrame], DataFrame],
+    ) -> DataFrame:
+        """
+        Return ``compute(dataframe)``, from the cache if the same candles were
+        computed before with the same code.
+        """
+        if dataframe.empty:
+            return compute(dataframe)
+
+        path = self.path(dataframe, pair, timeframe)
+        cached = self.load(path, dataframe)
+        if cached is not None:
+            logger.debug(f"Loaded indicators for {pair} {timeframe} from {path.name}")
+            return cached
+
+        known_columns = set(dataframe.columns)
+        dataframe = compute(dataframe)
+        self.store(path, dataframe, [c for c in dataframe.columns if c not in known_columns])
+        return dataframe
@@ -0,0 +1,71 @@
+"""
+Compact storage of the analyzed AwesomeCombinationStrategy dataframe.
+
+Once the entry / exit conditions are packed into bits (see .signals), the
+signals only read RSI, its sort order and the condition bits, and
+custom_stoploss reads ATR. Every other indicator column only takes memory in
+the data provider and in hyperopt's preprocessed data. Compacting keeps the
+OHLCV columns unchanged, drops the indicator columns that are not kept, stores
+kept float64 columns as float32 and int64 columns as int32, and packs the
+boolean indicator flags into one bitset column of one byte per candle.
+"""
+
+from typing import Iterable
+
+import numpy as np
+from pandas import DataFrame
+
+from .cache import OHLCV_COLUMNS
+
+
+# Columns read after populate_indicators
+SIGNAL_COLUMNS = ("rsi", "rsi_order", "entry_conditions", "exit_conditions", "atr")
+# Boolean indicator columns stored as bits of FLAGS_COLUMN
+INDICATOR_FLAGS = {
+    "squeeze_on": 1 << 0,
+    "squeeze_off": 1 << 1,
+}
+FLAGS_COLUMN = "indicator_flags"
+
+INT32 = np.iinfo(np.int32)
+
+
+def _compact_values(values: np.ndarray) -> np.ndarray:
+    if values.dtype == np.float64:
+        return values.astype(np.float32)
+    if values.dtype.kind in "iu" and values.dtype.itemsize > 4 and values.size:
+        if INT32.min <= values.min() and values.max() <= INT32.max:
+            return values.astype(np.int32)
+    return values
+
+
+def compact_indicators(dataframe: DataFrame, keep: Iterable[str] = SIGNAL_COLUMNS) -> DataFrame:
+    """
+    The OHLCV columns, the ``keep`` columns and the flags of ``dataframe`` in
+    compact dtypes, as a new dataframe.
+    """
+    keep = set(keep)
+    columns = {}
+    flags = np.zeros(len(dataframe), dtype=np.uint8)
+    has_flags = False
+    for column in dataframe.columns:
+        if column in OHLCV_COLUMNS:
+            columns[column] = dataframe[column]
+        elif column in INDICATOR_FLAGS:
+            flags |= np.where(dataframe[column].to_numpy(dtype=bool), np.uint8(INDICATOR_FLAGS[column]), np.uint8(0))
+            has_flags = True
+        elif column in keep:
+            columns[column] = _compact_values(dataframe[column].to_numpy())
+    if has_flags:
+        columns[FLAGS_COLUMN] = flags
+    return DataFrame(columns, index=dataframe.index)
+
+
+def unpack_flags(dataframe: DataFrame) -> DataFrame:
+    """The boolean indicator columns packed by compact_indicators()."""
+    if FLAGS_COLUMN not in dataframe:
+        return DataFrame(index=dataframe.index)
+    flags = dataframe[FLAGS_COLUMN].to_numpy()
+    return DataFrame(
+        {column: (flags & bit) != 0 for column, bit in INDICATOR_FLAGS.items()}, index=dataframe.index
+    )
@@ -0,0 +1,351 @@
+"""
+Incremental indicator engine for AwesomeCombinationStrategy.
+
+Keeps the recursive state of every indicator per pair, so a new candle costs one
+update step per indicator instead of a recompute over the whole dataframe.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pandas import DataFrame, concat
+
+
+if TYPE_CHECKING:
+    from .vwap import VWAP
+
+
+logger = logging.getLogger(__name__)
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+STOCH_FASTK_PERIOD = 5
+STOCH_FASTD_PERIOD = 3
+BAND_STDS = 2
+KELTNER_ATRS = 2
+
+BOOLEAN_COLUMNS = ("squeeze_on", "squeeze_off")
+
+
+def _date_index(dataframe: DataFrame) -> np.ndarray:
+    return np.asarray(dataframe["date"].values, dtype="datetime64[ns]").view("int64")
+
+
+def _smoothed_last(values: np.ndarray, alpha: float, seed: float) -> float:
+    """
+    Closed form of the last value of ``y += alpha * (x - y)`` over ``values``.
+    Used to rebuild recursive state (Wilder averages, MACD EMAs) that TA-Lib
+    does not return.
+    """
+    decay = 1.0 - alpha
+    weights = decay ** np.arange(values.size - 1, -1, -1, dtype=float)
+    return decay**values.size * seed + alpha * float(np.dot(weights, values))
+
+
+def indicator_divergence(
+    result: DataFrame, reference: DataFrame, columns: Sequence[str], rows: int
+) -> Tuple[Optional[str], float]:
+    """
+    Largest divergence between two indicator frames over their last ``rows`` rows.
+    Float columns are compared relative to the magnitude of the whole reference
+    column, boolean columns count as fully diverged on any flip.
+    :return: Tuple of (worst column, divergence)
+    """
+    worst_column, worst = None, 0.0
+    for column in columns:
+        expected = reference[column].to_numpy(dtype=float)
+        scale = max(float(np.nanmax(np.abs(expected), initial=0.0)), 1e-12)
+        actual = result[column].to_numpy(dtype=float)[-rows:]
+        expected = expected[-rows:]
+        if (np.isnan(actual) != np.isnan(expected)).any():
+            return column, math.inf
+        diff = np.abs(np.nan_to_num(actual) - np.nan_to_num(expected))
+        divergence = float(diff.max(initial=0.0)) / scale
+        if divergence > worst:
+            worst_column, worst = column, divergence
+    return worst_column, worst
+
+
+class _PairState:
+    """Indicator rows computed so far for one pair, plus the recursive state to extend them."""
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray) -> None:
+        self.dates = dates
+        self.values = values
+        self.unverified = 0
+        self.updates = 0
+
+        self.prev_close = math.nan
+        self.atr = math.nan
+        self.avg_gain = math.nan
+        self.avg_loss = math.nan
+        self.emas: List[float] = []
+        self.macd_fast = math.nan
+        self.macd_slow = math.nan
+        self.macd_signal = math.nan
+        self.rsi_window: deque = deque()
+        self.fastk_window: deque = deque()
+        self.tp_bollinger: deque = deque()
+        self.tp_keltner: deque = deque()
+        self.tr_keltner: deque = deque()
+        self.closes: deque = deque()
+
+    def offset(self, dates: np.ndarray) -> Optional[int]:
+        """
+        Position of the last cached candle in ``dates``, or None if the cached
+        rows cannot serve every candle of ``dates`` up to that position.
+        """
+        pos = int(np.searchsorted(dates, self.dates[-1]))
+        if pos >= dates.size or dates[pos] != self.dates[-1] or pos >= self.dates.size:
+            return None
+        if self.dates[-1 - pos] != dates[0]:
+            return None
+        return pos
+
+    def append(self, dates: np.ndarray, rows: np.ndarray, keep: int) -> None:
+        self.dates = np.concatenate((self.dates[-keep:], dates))[-keep:]
+        self.values = np.concatenate((self.values[-keep:], rows))[-keep:]
+        self.unverified += len(dates)
+        self.updates += 1
+
+
+class IncrementalIndicatorEngine:
+    """
+    Per-pair incremental computation of the AwesomeCombinationStrategy indicators.
+
+    The first call for a pair - or any call whose candles the cached state cannot
+    continue - runs the full ``reference`` computation and primes the state from
+    it. Later calls only step the state over the candles appended since.
+    Every ``verify_every`` updates the stepped rows are compared with a full
+    recompute, and the pair is re-primed if they drift beyond ``tolerance``.
+    """
+
+    def __init__(
+        self,
+        reference: Callable[[DataFrame], DataFrame],
+        *,
+        ema_periods: Sequence[int],
+        macd_periods: Tuple[int, int, int],
+        vwap: "VWAP",
+        bollinger_window: int = 20,
+        keltner_window: int = 20,
+        momentum_period: int = 12,
+        tolerance: float = 1e-4,
+        verify_every: int = 0,
+        max_step_rows: int = 96,
+    ) -> None:
+        """
+        :param reference: Full indicator computation, used to prime and verify state
+        :param ema_periods: Periods of the ``ema<period>`` columns
+        :param macd_periods: Effective (fast, slow, signal) periods of the MACD columns
+        :param vwap: VWAP of the ``vwap`` column
+        :param tolerance: Maximum relative divergence from a full recompute
+        :param verify_every: Verify against a full recompute every n updates (0 disables)
+        :param max_step_rows: Re-prime instead of stepping when more candles are new
+        """
+        self._reference = reference
+        self._ema_periods = tuple(ema_periods)
+        self._macd_periods = macd_periods
+        self._vwap = vwap
+        self._bollinger_window = bollinger_window
+        self._keltner_window = keltner_window
+        self._momentum_period = momentum_period
+        self.tolerance = tolerance
+        self.verify_every = verify_every
+        self.max_step_rows = max_step_rows
+
+        self.columns: Tuple[str, ...] = (
+            "fastd_rsi",
+            "fastk_rsi",
+            "atr",
+            "rsi",
+            *(f"ema{period}" for period in self._ema_periods),
+            "macd",
+            "macdsignal",
+            "macdhist",
+            "bb_lowerband",
+            "bb_middleband",
+            "bb_upperband",
+            "squeeze_on",
+            "squeeze_off",
+            "momentum_hist",
+        )
+        # Candles needed before every recursive indicator has produced a value.
+        fast, slow, signal = macd_periods
+        self._min_rows = max(
+            max(self._ema_periods),
+            slow + signal,
+            RSI_PERIOD + STOCH_FASTK_PERIOD + STOCH_FASTD_PERIOD,
+            bollinger_window,
+            keltner_window,
+            momentum_period,
+        ) + 1
+        self._states: Dict[str, _PairState] = {}
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        """Drop cached state for ``pair``, or for all pairs."""
+        if pair is None:
+            self._states.clear()
+        else:
+            self._states.pop(pair, None)
+        self._vwap.reset(pair)
+
+    def populate(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        """
+        Add the indicator columns to ``dataframe``, stepping only candles that
+        are newer than the last call for ``pair``.
+        """
+        dates = _date_index(dataframe)
+        state = self._states.get(pair)
+        pos = state.offset(dates) if state is not None else None
+        if pos is None or dates.size - 1 - pos > self.max_step_rows:
+            return self._prime(pair, self._reference(dataframe))
+
+        new = dates.size - 1 - pos
+        if new:
+            ohlcv = dataframe[["high", "low", "close"]].to_numpy(dtype=float)[-new:]
+            rows = np.array([self._step(state, *candle) for candle in ohlcv], dtype=float)
+            state.append(dates[-new:], rows, keep=dates.size)
+
+        if self.verify_every and state.unverified and state.updates % self.verify_every == 0:
+            reference = self._reference(dataframe.copy())
+            dataframe = self._write(dataframe, pair, state)
+            column, divergence = indicator_divergence(
+                dataframe, reference, self.columns, state.unverified
+            )
+            if divergence > self.tolerance:
+                logger.warning(
+                    f"Incremental indicators for {pair} diverged on {column} "
+                    f"({divergence:.2e} > {self.tolerance:.2e}), re-priming."
+                )
+                return self._prime(pair, reference)
+            state.unverified = 0
+            return dataframe
+
+        return self._write(dataframe, pair, state)
+
+    def _write(self, dataframe: DataFrame, pair: str, state: _PairState) -> DataFrame:
+        block = state.values[-len(dataframe) :]
+        columns = {
+            column: block[:, i] > 0 if column in BOOLEAN_COLUMNS else block[:, i]
+            for i, column in enumerate(self.columns)
+        }
+        columns["vwap"] = self._vwap.update(dataframe, pair)
+        return concat([dataframe, DataFrame(columns, index=dataframe.index)], axis=1)
+
+    def _prime(self, pair: str, dataframe: DataFrame) -> DataFrame:
+        """Build the state for ``pair`` from a fully computed ``dataframe``."""
+        if len(dataframe) < self._min_rows:
+            self._states.pop(pair, None)
+            return dataframe
+
+        values = np.column_stack(
+            [dataframe[column].to_numpy(dtype=float) for column in self.columns]
+        )
+        state = _PairState(_date_index(dataframe), values)
+
+        high = dataframe["high"].to_numpy(dtype=float)
+        low = dataframe["low"].to_numpy(dtype=float)
+        close = dataframe["close"].to_numpy(dtype=float)
+        state.prev_close = close[-1]
+        state.atr = dataframe["atr"].iat[-1]
+
+        # TA-Lib only returns the RSI itself, rebuild its Wilder averages.
+        diff = np.diff(close)
+        gains = np.clip(diff, 0, None)
+        losses = np.clip(-diff, 0, None)
+        alpha = 1.0 / RSI_PERIOD
+        state.avg_gain = _smoothed_last(gains[RSI_PERIOD:], alpha, gains[:RSI_PERIOD].mean())
+        state.avg_loss = _smoothed_last(losses[RSI_PERIOD:], alpha, losses[:RSI_PERIOD].mean())
+
+        state.emas = [dataframe[f"ema{period}"].iat[-1] for period in self._ema_periods]
+
+        # TA-Lib seeds both MACD averages on the candle `slow - 1`,
+        # the fast one from the `fast` candles ending there.
+        fast, slow, _ = self._macd_periods
+        state.macd_fast = _smoothed_last(close[slow:], 2.0 / (fast + 1), close[slow - fast : slow].mean())
+        state.macd_slow = _smoothed_last(close[slow:], 2.0 / (slow + 1), close[:slow].mean())
+        state.macd_signal = dataframe["macdsignal"].iat[-1]
+
+        rsi = dataframe["rsi"].to_numpy(dtype=float)
+        fastk = dataframe["fastk_rsi"].to_numpy(dtype=float)
+        state.rsi_window = deque(rsi[-STOCH_FASTK_PERIOD:], maxlen=STOCH_FASTK_PERIOD)
+        state.fastk_window = deque(fastk[-STOCH_FASTD_PERIOD:], maxlen=STOCH_FASTD_PERIOD)
+
+        typical = (high + low + close) / 3
+        true_range = np.maximum.reduce(
+            [high[1:] - low[1:], np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])]
+        )
+        state.tp_bollinger = deque(typical[-self._bollinger_window :], maxlen=self._bollinger_window)
+        state.tp_keltner = deque(typical[-self._keltner_window :], maxlen=self._keltner_window)
+        state.tr_keltner = deque(true_range[-self._keltner_window :], maxlen=self._keltner_window)
+        state.closes = deque(close[-self._momentum_period - 1 :], maxlen=self._momentum_period + 1)
+
+        self._states[pair] = state
+        return dataframe
+
+    def _step(self, state: _PairState, high: float, low: float, close: float) -> List[float]:
+        """Advance every indicator of ``state`` by one candle and return its row."""
+        prev_close = state.prev_close
+        state.prev_close = close
+
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        state.atr = (state.atr * (ATR_PERIOD - 1) + true_range) / ATR_PERIOD
+
+        diff = close - prev_close
+        state.avg_gain = (state.avg_gain * (RSI_PERIOD - 1) + max(diff, 0.0)) / RSI_PERIOD
+        state.avg_loss = (state.avg_loss * (RSI_PERIOD - 1) + max(-diff, 0.0)) / RSI_PERIOD
+        total = state.avg_gain + state.avg_loss
+        rsi = 100.0 * state.avg_gain / total if abs(total) >= 1e-8 else 0.0
+
+        state.rsi_window.append(rsi)
+        lowest, highest = min(state.rsi_window), max(state.rsi_window)
+        fastk = 100.0 * (rsi - lowest) / (highest - lowest) if highest != lowest else 0.0
+        state.fastk_window.append(fastk)
+        fastd = sum(state.fastk_window) / STOCH_FASTD_PERIOD
+
+        emas = state.emas
+        for i, period in enumerate(self._ema_periods):
+            emas[i] += 2.0 / (period + 1) * (close - emas[i])
+
+        fast, slow, signal = self._macd_periods
+        state.macd_fast += 2.0 / (fast + 1) * (close - state.macd_fast)
+        state.macd_slow += 2.0 / (slow + 1) * (close - state.macd_slow)
+        macd = state.macd_fast - state.macd_slow
+        state.macd_signal += 2.0 / (signal + 1) * (macd - state.macd_signal)
+
+        typical = (high + low + close) / 3
+        window = state.tp_bollinger
+        window.append(typical)
+        bb_mid = sum(window) / len(window)
+        bb_std = math.sqrt(sum((x - bb_mid) ** 2 for x in window) / (len(window) - 1))
+        bb_lower = bb_mid - BAND_STDS * bb_std
+        bb_upper = bb_mid + BAND_STDS * bb_std
+
+        state.tp_keltner.append(typical)
+        state.tr_keltner.append(true_range)
+        kc_mid = sum(state.tp_keltner) / len(state.tp_keltner)
+        kc_atr = KELTNER_ATRS * sum(state.tr_keltner) / len(state.tr_keltner)
+        kc_lower, kc_upper = kc_mid - kc_atr, kc_mid + kc_atr
+
+        state.closes.append(close)
+
+        return [
+            fastd,
+            fastk,
+            state.atr,
+            rsi,
+            *emas,
+            macd,
+            state.macd_signal,
+            macd - state.macd_signal,
+            bb_lower,
+            bb_mid,
+            bb_upper,
+            float(bb_lower > kc_lower and bb_upper < kc_upper),
+            float(bb_lower < kc_lower and bb_upper > kc_upper),
+            close - state.closes[0],
+        ]
@@ -0,0 +1,69 @@
+"""
+Per-pair candle value lookup for AwesomeCombinationStrategy callbacks.
+
+Callbacks like custom_stoploss run for every open trade on every (detail)
+candle. Reading one value through dp.get_analyzed_dataframe() and iloc[-1]
+materializes a dataframe slice and a row each time; this keeps the analyzed
+column as an array indexed by candle open time instead, and returns the value
+of the last candle closed at the callback's time.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from .incremental import _date_index
+
+
+class CandleLookup:
+    """
+    Values of one analyzed column per pair, refreshed whenever a new analyzed
+    dataframe is available. ``get(pair, time)`` returns the value of the last
+    candle closed at or before ``time`` (open date + timeframe <= time) - the
+    candle get_analyzed_dataframe()'s iloc[-1] returns in backtesting (the one
+    before the candle being simulated, also for detail candles) and in live /
+    dry-run (the last analyzed one, as incomplete candles are dropped).
+    """
+
+    def __init__(self, column: str, timeframe_seconds: int) -> None:
+        self.column = column
+        self.step = timeframe_seconds * 1_000_000_000
+        self._pairs: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def update(self, pair: str, dataframe: DataFrame) -> None:
+        if dataframe.empty:
+            self._pairs.pop(pair, None)
+            return
+        self._pairs[pair] = (_date_index(dataframe), dataframe[self.column].to_numpy(dtype=float))
+
+    def get(self, pair: str, time: datetime) -> Optional[float]:
+        """:return: The value, or None if the pair has no candle closed at or before ``time``."""
+        entry = self._pairs.get(pair)
+        if entry is None:
+            return None
+        dates, values = entry
+        # Open date of the last candle that can have closed by ``time``
+        candle = (int(time.timestamp()) * 1_000_000_000 - self.step) // self.step * self.step
+
+        # Candles are contiguous in backtesting, so the position follows from the date.
+        position = (candle - dates[0]) // self.step
+        if 0 <= position < dates.size and dates[position] == candle:
+            return values[position]
+        if candle >= dates[-1]:
+            return values[-1]
+        position = int(np.searchsorted(dates, candle, side="right")) - 1
+        return values[position] if position >= 0 else None
+
+    def get_many(self, pair: str, times: np.ndarray) -> Optional[np.ndarray]:
+        """get() for an array of times in ns. None if the pair has no candle closed by one of them."""
+        entry = self._pairs.get(pair)
+        if entry is None:
+            return None
+        dates, values = entry
+        candles = (times // 1_000_000_000 * 1_000_000_000 - self.step) // self.step * self.step
+        positions = np.searchsorted(dates, candles, side="right") - 1
+        if positions.size and positions.min() < 0:
+            return None
+        return values[positions]
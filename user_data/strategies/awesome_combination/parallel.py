@@ -0,0 +1,272 @@
+"""
+Parallel per-pair analysis for AwesomeCombinationStrategy.
+
+freqtrade analyzes the pair whitelist one pair after the other. ``ParallelAnalysis``
+runs one analysis function (populate_indicators, or the whole indicator / entry /
+exit analysis) for all pairs in a pool of worker processes or threads and returns
+the analyzed dataframes in the order of the input.
+
+Process workers are forked once and keep the strategy as it was at that point,
+so the strategy only uses them in backtesting and hyperopt: forking the
+multi-threaded live bot can copy locks other threads hold, and its parameters
+can change after startup. Thread workers run the live strategy itself.
+Dataframes do not travel through pickles: the OHLCV columns of all pairs are
+packed into one shared memory block, the workers write the columns they add into
+a second one, and only (pair, row range) tasks and the labels of text columns
+(signal tags) cross the process boundary. The layout of the added columns is
+learned from the first analysis in the parent; a pair whose result does not fit
+it is analyzed in the parent instead.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame, factorize, to_datetime
+
+from .cache import OHLCV_COLUMNS
+
+
+logger = logging.getLogger(__name__)
+
+AnalysisFunction = Callable[[DataFrame, dict], DataFrame]
+# (column, dtype string) of the columns an analysis adds to the OHLCV columns.
+# Object columns are stored as int64 label codes.
+Schema = List[Tuple[str, str]]
+Labels = Dict[str, list]
+
+CELL = 8
+
+# Analysis functions of a forked worker process, inherited from the parent
+_functions: Dict[str, AnalysisFunction] = {}
+
+
+def _init_worker(functions: Dict[str, AnalysisFunction]) -> None:
+    global _functions
+    _functions = functions
+
+
+def _schema(dataframe: DataFrame) -> Optional[Schema]:
+    """The added columns, or None if one of them cannot be stored in a shared memory cell."""
+    schema = []
+    for column in dataframe.columns:
+        if column in OHLCV_COLUMNS:
+            continue
+        dtype = dataframe[column].dtype
+        if not isinstance(dtype, np.dtype) or dtype.kind not in "biufO" or dtype.itemsize > CELL:
+            return None
+        schema.append((column, dtype.str))
+    return schema
+
+
+def _shareable(dataframe: DataFrame) -> bool:
+    return list(dataframe.columns) == OHLCV_COLUMNS
+
+
+def _column(block: shared_memory.SharedMemory, index: int, rows: int, dtype: str) -> np.ndarray:
+    dtype = "int64" if dtype == "|O" else dtype
+    return np.ndarray(rows, dtype=dtype, buffer=block.buf, offset=index * rows * CELL)
+
+
+def _analyze_shared(
+    name: str, pair: str, start: int, stop: int, rows: int,
+    inputs: str, outputs: str, schema: Schema,
+) -> Optional[Labels]:
+    """
+    Worker process: analyze rows ``start:stop`` of the input block and write the
+    added columns to the output block.
+    :return: The labels of the object columns' codes, None if the result does not
+        match ``schema`` and nothing was written.
+    """
+    block = shared_memory.SharedMemory(name=inputs)
+    try:
+        dates = _column(block, 0, rows, "int64")[start:stop].copy()
+        dataframe = DataFrame({"date": to_datetime(dates, utc=True)})
+        for index, column in enumerate(OHLCV_COLUMNS[1:], start=1):
+            dataframe[column] = _column(block, index, rows, "float64")[start:stop].copy()
+    finally:
+        block.close()
+
+    dataframe = _functions[name](dataframe, {"pair": pair})
+    if _schema(dataframe) != schema:
+        return None
+
+    labels = {}
+    block = shared_memory.SharedMemory(name=outputs)
+    try:
+        for index, (column, dtype) in enumerate(schema):
+            values = dataframe[column].to_numpy()
+            if dtype == "|O":
+                # Missing values get code -1, the None appended to the labels
+                values, uniques = factorize(values)
+                labels[column] = [*uniques, None]
+            _column(block, index, rows, dtype)[start:stop] = values
+    finally:
+        block.close()
+    return labels
+
+
+class ParallelAnalysis:
+    """
+    Pool of ``workers`` processes ("process" backend) or threads ("thread") running
+    the analysis functions registered by name. Process workers need the fork start
+    method; without it the thread backend is used.
+    """
+
+    def __init__(self, functions: Dict[str, AnalysisFunction], workers: int, backend: str = "process") -> None:
+        if backend not in ("process", "thread"):
+            raise ValueError(f"Unknown parallel analysis backend {backend!r}.")
+        if backend == "process" and "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("Process workers need the fork start method, analyzing in threads.")
+            backend = "thread"
+        self.functions = functions
+        self.workers = workers
+        self.backend = backend
+        self._executor: Optional[Executor] = None
+        self._schemas: Dict[str, Schema] = {}
+
+    def __getstate__(self) -> dict:
+        # Hyperopt pickles the strategy for its workers, the pool stays here.
+        return {**self.__dict__, "_executor": None}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self, frames: Dict[str, DataFrame], name: str) -> Dict[str, DataFrame]:
+        """
+        Analyze every pair's dataframe with the function ``name``. The input
+        dataframes are not modified.
+        :return: The analyzed dataframes in the order of ``frames``. Pairs whose
+            analysis failed are left out, for the caller to analyze serially.
+        """
+        if not frames:
+            return {}
+        if self.workers < 1 or len(frames) < 2:
+            results = {pair: self._analyze_local(name, pair, frame) for pair, frame in frames.items()}
+        elif self.backend == "thread":
+            results = self._run_threads(frames, name)
+        else:
+            results = self._run_processes(frames, name)
+        return {pair: result for pair, result in results.items() if result is not None}
+
+    def _analyze_local(self, name: str, pair: str, frame: DataFrame) -> Optional[DataFrame]:
+        try:
+            return self.functions[name](frame.copy(), {"pair": pair})
+        except Exception as e:
+            logger.warning(f"Parallel analysis of {pair} failed, leaving it to the serial analysis: {e}")
+            return None
+
+    def _run_threads(self, frames: Dict[str, DataFrame], name: str) -> Dict[str, Optional[DataFrame]]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="analysis")
+        futures = {
+            pair: self._executor.submit(self._analyze_local, name, pair, frame) for pair, frame in frames.items()
+        }
+        return {pair: future.result() for pair, future in futures.items()}
+
+    def _process_executor(self) -> Executor:
+        if self._executor is None:
+            # Started before the fork, the workers share the parent's resource
+            # tracker instead of starting one that unlinks the blocks they attach.
+            resource_tracker.ensure_running()
+            self._executor = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+                initargs=(self.functions,),
+            )
+        return self._executor
+
+    def _run_processes(self, frames: Dict[str, DataFrame], name: str) -> Dict[str, Optional[DataFrame]]:
+        results: Dict[str, Optional[DataFrame]] = {}
+        pairs = list(frames)
+        # Learn the added columns from the first pair, analyzed here anyway
+        if name not in self._schemas:
+            first = pairs[0]
+            results[first] = self._analyze_local(name, first, frames[first])
+            schema = _schema(results[first]) if results[first] is not None else None
+            if schema is None:
+                if results[first] is not None:
+                    logger.warning(f"{name} adds columns that cannot be shared, analyzing serially.")
+                results.update({pair: self._analyze_local(name, pair, frames[pair]) for pair in pairs[1:]})
+                return results
+            self._schemas[name] = schema
+        schema = self._schemas[name]
+
+        shared = [pair for pair in pairs if pair not in results and _shareable(frames[pair])]
+        local = [pair for pair in pairs if pair not in results and pair not in shared]
+        # The parent analyzes one of the pairs while the workers run the others
+        if len(shared) > 1 and not local:
+            local.append(shared.pop(0))
+        offsets = np.cumsum([0, *(len(frames[pair]) for pair in shared)])
+        rows = int(offsets[-1])
+
+        inputs = outputs = None
+        try:
+            if rows and schema:
+                inputs = shared_memory.SharedMemory(create=True, size=len(OHLCV_COLUMNS) * rows * CELL)
+                outputs = shared_memory.SharedMemory(create=True, size=len(schema) * rows * CELL)
+                for pair, start, stop in zip(shared, offsets[:-1], offsets[1:]):
+                    self._pack(inputs, frames[pair], int(start), int(stop), rows)
+                futures = {
+                    pair: self._process_executor().submit(
+                        _analyze_shared, name, pair, int(start), int(stop), rows,
+                        inputs.name, outputs.name, schema,
+                    )
+                    for pair, start, stop in zip(shared, offsets[:-1], offsets[1:])
+                }
+            else:
+                local.extend(shared)
+                shared, futures = [], {}
+
+            for pair in local:
+                results[pair] = self._analyze_local(name, pair, frames[pair])
+            for pair, start, stop in zip(shared, offsets[:-1], offsets[1:]):
+                results[pair] = self._collect(
+                    futures[pair], name, pair, frames[pair], outputs, int(start), int(stop), rows, schema
+                )
+        finally:
+            for block in (inputs, outputs):
+                if block is not None:
+                    block.close()
+                    block.unlink()
+        return {pair: results[pair] for pair in pairs}
+
+    @staticmethod
+    def _pack(block: shared_memory.SharedMemory, frame: DataFrame, start: int, stop: int, rows: int) -> None:
+        _column(block, 0, rows, "int64")[start:stop] = frame["date"].values.astype("datetime64[ns]").view("int64")
+        for index, column in enumerate(OHLCV_COLUMNS[1:], start=1):
+            _column(block, index, rows, "float64")[start:stop] = frame[column].to_numpy(dtype=float)
+
+    def _collect(
+        self, future: Future, name: str, pair: str, frame: DataFrame,
+        outputs: shared_memory.SharedMemory, start: int, stop: int, rows: int, schema: Schema,
+    ) -> Optional[DataFrame]:
+        try:
+            labels = future.result()
+        except BrokenProcessPool as e:
+            logger.warning(f"Parallel analysis workers died, restarting them: {e}")
+            self._executor = None
+            return self._analyze_local(name, pair, frame)
+        except Exception as e:
+            logger.warning(f"Parallel analysis of {pair} failed, leaving it to the serial analysis: {e}")
+            return None
+        if labels is None:
+            logger.debug(f"Columns of {pair} do not match the shared layout, analyzing it here.")
+            return self._analyze_local(name, pair, frame)
+
+        # Added one by one like the analysis does, building a frame of them would
+        # consolidate (copy) the columns once more.
+        dataframe = frame.copy()
+        for index, (column, dtype) in enumerate(schema):
+            values = _column(outputs, index, rows, dtype)[start:stop]
+            if dtype == "|O":
+                values = np.array(labels[column], dtype=object)[values]
+            dataframe[column] = values.copy()
+        return dataframe
@@ -0,0 +1,87 @@
+"""
+Step profiler for the AwesomeCombinationStrategy analysis pipeline.
+
+The strategy wraps its populate_* steps and indicator blocks in
+``profile_step(profiler, name)``, which does nothing without a profiler. With one,
+every step records wall time and, if memory tracing is on, the net and peak
+tracemalloc allocations plus the process peak RSS. Nested steps are recorded
+under "outer/inner" names.
+"""
+
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, List, Optional
+
+
+MIB = 2**20
+# ru_maxrss is in kilobytes on Linux, bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class _Frame:
+    def __init__(self, name: str, allocated: int) -> None:
+        self.name = name
+        self.start_allocated = allocated
+        self.peak = allocated
+
+
+class StepProfiler:
+    """Accumulates the measurements of every named step over all its calls."""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.steps: Dict[str, Dict[str, float]] = {}
+        self._stack: List[_Frame] = []
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def step(self, name: str):
+        path = "/".join([*(frame.name for frame in self._stack), name])
+        frame = _Frame(name, self._enter_memory())
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            self._stack.pop()
+            record = self.steps.setdefault(path, {"calls": 0, "wall_s": 0.0})
+            record["calls"] += 1
+            record["wall_s"] += wall
+            if self.trace_memory:
+                self._exit_memory(frame, record)
+
+    def _enter_memory(self) -> int:
+        if not self.trace_memory:
+            return 0
+        allocated, peak = tracemalloc.get_traced_memory()
+        # The enclosing steps keep the peak so far, the new step measures from here.
+        for frame in self._stack:
+            frame.peak = max(frame.peak, peak)
+        tracemalloc.reset_peak()
+        return allocated
+
+    def _exit_memory(self, frame: _Frame, record: Dict[str, float]) -> None:
+        allocated, peak = tracemalloc.get_traced_memory()
+        frame.peak = max(frame.peak, peak)
+        for parent in self._stack:
+            parent.peak = max(parent.peak, frame.peak)
+        tracemalloc.reset_peak()
+        record["allocated_mib"] = record.get("allocated_mib", 0.0) + (allocated - frame.start_allocated) / MIB
+        record["peak_mib"] = max(record.get("peak_mib", 0.0), (frame.peak - frame.start_allocated) / MIB)
+        record["rss_peak_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT / MIB
+
+
+def profile_step(profiler: Optional[StepProfiler], name: str) -> ContextManager:
+    """``profiler.step(name)``, or a no-op without a profiler."""
+    return profiler.step(name) if profiler is not None else nullcontext()
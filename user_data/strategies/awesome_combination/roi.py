@@ -0,0 +1,45 @@
+"""
+Compiled minimal_roi tables for AwesomeCombinationStrategy.
+
+freqtrade looks the ROI up for every open trade on every (detail) candle by
+collecting the table's keys up to the trade duration and taking the largest.
+CompiledROI expands a table into one entry per minute up to its last key once,
+so a lookup is one index into a list, and an array of durations one take().
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class CompiledROI:
+    """
+    ``entry(minutes)`` returns what IStrategy.min_roi_reached_entry() returns
+    for ``table``: the largest key at or below ``minutes`` and its ROI, or
+    (None, None) if there is none. Durations past the last key use the last entry.
+    """
+
+    def __init__(self, table: Dict[int, float]) -> None:
+        self.table = {int(minutes): roi for minutes, roi in table.items()}
+        keys = sorted(self.table)
+        self.size = keys[-1] + 1 if keys else 0
+        self._keys: List[Optional[int]] = [None] * self.size
+        for start, end in zip(keys, [*keys[1:], self.size]):
+            self._keys[start:end] = [start] * (end - start)
+        self._rois: List[Optional[float]] = [None if key is None else self.table[key] for key in self._keys]
+        # NaN before the first key, which no profit is greater than
+        self.thresholds = np.array([np.nan if roi is None else roi for roi in self._rois], dtype=float)
+
+    def entry(self, minutes: int) -> Tuple[Optional[int], Optional[float]]:
+        if minutes < 0 or not self.size:
+            return None, None
+        if minutes >= self.size:
+            minutes = self.size - 1
+        return self._keys[minutes], self._rois[minutes]
+
+    def thresholds_at(self, minutes: np.ndarray) -> np.ndarray:
+        """ROI per duration in ``minutes``, NaN where no entry applies."""
+        if not self.size:
+            return np.full(len(minutes), np.nan)
+        positions = np.minimum(minutes, self.size - 1)
+        return np.where(positions >= 0, self.thresholds[np.maximum(positions, 0)], np.nan)
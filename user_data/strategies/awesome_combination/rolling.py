@@ -0,0 +1,89 @@
+"""
+Rolling window statistics shared by the band indicators of AwesomeCombinationStrategy.
+
+Bollinger bands, Keltner channels and the TTM squeeze all derive from the
+typical price, its rolling mean and std, and the rolling mean of the true
+range. RollingStats computes each of these once per (series, window) for one
+analysis call and serves the bands from the stored arrays.
+"""
+
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame, Series
+
+
+class RollingStats:
+    """
+    Memo of rolling statistics of one dataframe. Create one per analysis call;
+    it does not notice later changes to the dataframe.
+    Bands match freqtrade.vendor.qtpylib's bollinger_bands / keltner_channel.
+    """
+
+    def __init__(self, dataframe: DataFrame) -> None:
+        self.dataframe = dataframe
+        self._memo: Dict[Hashable, np.ndarray] = {}
+
+    def _cached(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def typical_price(self) -> np.ndarray:
+        def compute():
+            frame = self.dataframe
+            return ((frame["high"] + frame["low"] + frame["close"]) / 3.0).to_numpy()
+
+        return self._cached("typical_price", compute)
+
+    def true_range(self) -> np.ndarray:
+        def compute():
+            high = self.dataframe["high"].to_numpy()
+            low = self.dataframe["low"].to_numpy()
+            prev_close = np.r_[np.nan, self.dataframe["close"].to_numpy()[:-1]]
+            # fmax skips the missing previous close on the first row, like DataFrame.max()
+            return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        return self._cached("true_range", compute)
+
+    def _series(self, name: str) -> np.ndarray:
+        return getattr(self, name)()
+
+    def mean(self, name: str, window: int) -> np.ndarray:
+        """Rolling mean of ``typical_price`` or ``true_range``, valid from the first row."""
+        return self._cached(
+            ("mean", name, window),
+            lambda: Series(self._series(name)).rolling(window, min_periods=1).mean().to_numpy(),
+        )
+
+    def std(self, name: str, window: int) -> np.ndarray:
+        """Rolling sample std of ``typical_price`` or ``true_range``, valid from the second row."""
+        return self._cached(
+            ("std", name, window),
+            lambda: Series(self._series(name)).rolling(window, min_periods=1).std().to_numpy(),
+        )
+
+    def full_window_mean(self, name: str, window: int) -> np.ndarray:
+        """Rolling mean, NaN until the first full window, rounded like qtpylib's rolling_mean()."""
+        def compute():
+            values = self._series(name)
+            if len(values) <= window:
+                return Series(values).rolling(window, min_periods=window).mean().to_numpy()
+            # qtpylib averages every window, a running sum rounds differently
+            mean = np.full(len(values), np.nan)
+            mean[window - 1:] = sliding_window_view(values, window).mean(axis=-1)
+            return mean
+
+        return self._cached(("full_window_mean", name, window), compute)
+
+    def bollinger_bands(self, window: int = 20, stds: float = 2) -> Dict[str, np.ndarray]:
+        """Bollinger bands of the typical price."""
+        mid = self.mean("typical_price", window)
+        std = self.std("typical_price", window) * stds
+        return {"upper": mid + std, "mid": mid, "lower": mid - std}
+
+    def keltner_channel(self, window: int = 14, atrs: float = 2) -> Dict[str, np.ndarray]:
+        mid = self.full_window_mean("typical_price", window)
+        atr = self.full_window_mean("true_range", window) * atrs
+        return {"upper": mid + atr, "mid": mid, "lower": mid - atr}
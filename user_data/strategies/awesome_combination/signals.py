@@ -0,0 +1,159 @@
+"""
+Precomputed entry / exit condition bitmaps for AwesomeCombinationStrategy.
+
+Every condition besides the RSI threshold is independent of the hyperopt
+parameters, so they are evaluated once per pair and packed into one uint8 per
+candle. An epoch then only ANDs the bits of the selected additional indicator
+profile and compares RSI against its threshold. The RSI rows below / at least
+a threshold come from a per-pair sort order of the RSI column, so a threshold
+costs a binary search plus the matching rows instead of a full comparison.
+
+Every condition declares the indicator columns it reads, so the strategy only
+computes the columns of the conditions its additional indicator profiles can
+select.
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+
+# Keys are the tokens the strategy looks for in the additional indicator profiles.
+ENTRY_CONDITIONS = {
+    "VWAP": 1 << 0,
+    "MACD": 1 << 1,
+    "STOCK_OSC": 1 << 2,
+    "BB": 1 << 3,
+    "EMA": 1 << 4,
+    "TTM": 1 << 5,
+}
+EXIT_CONDITIONS = {
+    "MACD": 1 << 0,
+    "STOCK_OSC": 1 << 1,
+    "TTM": 1 << 2,
+}
+# Always required on top of the selected profile.
+ENTRY_BASE = ("VWAP",)
+EXIT_BASE = ()
+
+# Indicator columns each condition reads
+ENTRY_COLUMNS = {
+    "VWAP": ("vwap",),
+    "MACD": ("macd", "macdsignal"),
+    "STOCK_OSC": ("fastk_rsi", "fastd_rsi"),
+    "BB": ("bb_lowerband",),
+    "EMA": ("ema10", "ema50"),
+    "TTM": ("squeeze_on", "momentum_hist"),
+}
+EXIT_COLUMNS = {
+    "MACD": ("macd", "macdsignal"),
+    "STOCK_OSC": ("fastk_rsi", "fastd_rsi"),
+    "TTM": ("squeeze_off", "momentum_hist"),
+}
+# Read whatever the profiles: the RSI thresholds and custom_stoploss' ATR
+BASE_COLUMNS = ("rsi", "atr")
+
+
+def _pack(
+    dataframe: DataFrame,
+    rules: Dict[str, Callable[[DataFrame], np.ndarray]],
+    bits: Dict[str, int],
+    conditions: Optional[Iterable[str]],
+) -> np.ndarray:
+    packed = np.zeros(len(dataframe), dtype=np.uint8)
+    for name in bits if conditions is None else conditions:
+        packed |= np.where(rules[name](dataframe), np.uint8(bits[name]), np.uint8(0))
+    return packed
+
+
+_ENTRY_RULES: Dict[str, Callable[[DataFrame], np.ndarray]] = {
+    "MACD": lambda df: df["macd"].to_numpy() < df["macdsignal"].to_numpy(),
+    "VWAP": lambda df: df["close"].to_numpy() > df["vwap"].to_numpy(),
+    # & (fastk_rsi < buy_stoch_osc)
+    "STOCK_OSC": lambda df: df["fastk_rsi"].to_numpy() > df["fastd_rsi"].to_numpy(),
+    # & (close.shift(1) < close)
+    "BB": lambda df: df["close"].to_numpy() <= df["bb_lowerband"].to_numpy(),
+    "EMA": lambda df: df["ema10"].to_numpy() > df["ema50"].to_numpy(),
+    "TTM": lambda df: df["squeeze_on"].to_numpy(dtype=bool) & (df["momentum_hist"].to_numpy() > 0),
+}
+_EXIT_RULES: Dict[str, Callable[[DataFrame], np.ndarray]] = {
+    "MACD": lambda df: df["macd"].to_numpy() >= df["macdsignal"].to_numpy(),
+    # & (fastk_rsi >= sell_stoch_osc)
+    "STOCK_OSC": lambda df: df["fastk_rsi"].to_numpy() <= df["fastd_rsi"].to_numpy(),
+    "TTM": lambda df: df["squeeze_off"].to_numpy(dtype=bool) & (df["momentum_hist"].to_numpy() < 0),
+}
+
+
+def entry_condition_bits(dataframe: DataFrame, conditions: Optional[Iterable[str]] = None) -> np.ndarray:
+    """Entry condition bits, only of ``conditions`` if given - the other bits stay unset."""
+    return _pack(dataframe, _ENTRY_RULES, ENTRY_CONDITIONS, conditions)
+
+
+def exit_condition_bits(dataframe: DataFrame, conditions: Optional[Iterable[str]] = None) -> np.ndarray:
+    """Exit condition bits, only of ``conditions`` if given - the other bits stay unset."""
+    return _pack(dataframe, _EXIT_RULES, EXIT_CONDITIONS, conditions)
+
+
+def profile_conditions(profiles: Iterable[str], bits: Dict[str, int], base=()) -> Set[str]:
+    """Conditions any of the additional indicator ``profiles`` requires, matched like profile_mask()."""
+    profiles = list(profiles)
+    return {name for name in bits if name in base or any(name in profile for profile in profiles)}
+
+
+def condition_columns(conditions: Iterable[str], columns: Dict[str, Tuple[str, ...]]) -> Set[str]:
+    """Indicator columns the ``conditions`` read."""
+    return {column for name in conditions for column in columns[name]}
+
+
+def profile_mask(profile: str, bits: Dict[str, int], base=()) -> np.uint8:
+    """
+    Bits an additional indicator profile (e.g. "BB, MACD") requires. Tokens are
+    matched as substrings of the profile, like the ``"MACD" in value`` checks
+    they replace.
+    """
+    mask = 0
+    for name, bit in bits.items():
+        if name in base or name in profile:
+            mask |= bit
+    return np.uint8(mask)
+
+
+def threshold_order(values: np.ndarray) -> np.ndarray:
+    """
+    Row positions sorted by value, NaNs last. Any ``value < k`` / ``value >= k``
+    row set is a contiguous slice of it, found by binary search.
+    """
+    return np.argsort(values, kind="stable")
+
+
+def _partition_point(values: np.ndarray, order: np.ndarray, predicate) -> int:
+    """First index in ``order`` whose value fails ``predicate``, which holds for a prefix."""
+    low, high = 0, order.size
+    while low < high:
+        middle = (low + high) // 2
+        if predicate(values[order[middle]]):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def rows_below(values: np.ndarray, order: np.ndarray, threshold: float) -> np.ndarray:
+    """Row positions with ``value < threshold``, in O(log rows)."""
+    return order[:_partition_point(values, order, lambda value: value < threshold)]
+
+
+def rows_at_least(values: np.ndarray, order: np.ndarray, threshold: float) -> np.ndarray:
+    """Row positions with ``value >= threshold`` (NaNs excluded), in O(log rows)."""
+    start = _partition_point(values, order, lambda value: value < threshold)
+    end = _partition_point(values, order, lambda value: not np.isnan(value))
+    return order[start:end]
+
+
+def signal(condition_bits: np.ndarray, mask: np.uint8, rows: np.ndarray) -> np.ndarray:
+    """Boolean signal for the ``rows`` that have every bit of ``mask`` set."""
+    rows = rows[(condition_bits[rows] & mask) == mask]
+    result = np.zeros(condition_bits.size, dtype=bool)
+    result[rows] = True
+    return result
@@ -0,0 +1,217 @@
+"""
+Volume weighted average price for AwesomeCombinationStrategy.
+
+The strategy's VWAP used to be cumulative from the first loaded candle, so its
+values depend on how much history is loaded and shift whenever the live window
+slides. VWAP keeps that mode as the default, and adds anchored modes that reset
+every UTC day / week or roll over the last n candles. Those are deterministic
+for any dataframe length. ``update()`` keeps per-pair running sums, so a new
+candle costs O(1) instead of a pass over the whole dataframe.
+"""
+
+from collections import deque
+from typing import Dict, Optional, Union
+
+import numpy as np
+from pandas import DataFrame, Series
+
+from .incremental import _date_index
+
+
+DAY_NS = 86_400 * 1_000_000_000
+WEEK_NS = 7 * DAY_NS
+# 1970-01-01 was a Thursday, sessions of the "W" anchor start on Mondays.
+WEEK_OFFSET_NS = 3 * DAY_NS
+
+Anchor = Optional[Union[str, int]]
+
+
+def _typical_price_volume(dataframe: DataFrame):
+    high, low, close, volume = (
+        dataframe[column].to_numpy(dtype=float) for column in ("high", "low", "close", "volume")
+    )
+    return (high + low + close) / 3, volume
+
+
+class _PairState:
+    def __init__(self) -> None:
+        self.dates = np.empty(0, dtype="int64")
+        self.values = np.empty(0)
+        # anchor None: cumulative typical price * volume and volume per candle
+        self.cum_pv = np.empty(0)
+        self.cum_volume = np.empty(0)
+        # anchored: running sums of the current session / rolling window
+        self.session: Optional[int] = None
+        self.complete = False
+        self.pv = 0.0
+        self.volume = 0.0
+        self.window_pv: deque = deque()
+        self.window_volume: deque = deque()
+        self.steps = 0
+
+
+class VWAP:
+    """
+    :param anchor: None - cumulative from the first candle of the dataframe,
+        "D" / "W" - reset at every UTC day / week (Monday), rows of a session
+        that started before the first candle are NaN,
+        n - rolling over the last n candles, the first n - 1 rows are NaN.
+    """
+
+    def __init__(self, anchor: Anchor = None) -> None:
+        if not (anchor is None or anchor in ("D", "W") or (isinstance(anchor, int) and anchor > 0)):
+            raise ValueError(f"Invalid VWAP anchor {anchor!r}, expected None, 'D', 'W' or n > 0.")
+        self.anchor = anchor
+        self._states: Dict[str, _PairState] = {}
+
+    def _sessions(self, dates: np.ndarray) -> np.ndarray:
+        if self.anchor == "D":
+            return dates // DAY_NS
+        return (dates + WEEK_OFFSET_NS) // WEEK_NS
+
+    def _session_start(self, session: int) -> int:
+        if self.anchor == "D":
+            return session * DAY_NS
+        return session * WEEK_NS - WEEK_OFFSET_NS
+
+    def compute(self, dataframe: DataFrame, typical_price: Optional[np.ndarray] = None) -> np.ndarray:
+        """VWAP of every row of ``dataframe``, computed from scratch."""
+        typical, volume = _typical_price_volume(dataframe)
+        if typical_price is not None:
+            typical = typical_price
+        pv = typical * volume
+
+        if self.anchor is None:
+            return np.cumsum(pv) / np.cumsum(volume)
+        if isinstance(self.anchor, int):
+            return (
+                Series(pv).rolling(self.anchor).sum() / Series(volume).rolling(self.anchor).sum()
+            ).to_numpy()
+
+        dates = _date_index(dataframe)
+        sessions = self._sessions(dates)
+        values = (Series(pv).groupby(sessions).cumsum() / Series(volume).groupby(sessions).cumsum()).to_numpy()
+        return self._mask_incomplete(values, dates)
+
+    def _mask_incomplete(self, values: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """NaN for rows whose session or window starts before the first candle."""
+        if isinstance(self.anchor, int):
+            values[:self.anchor - 1] = np.nan
+        elif dates.size:
+            session = self._sessions(dates[0])
+            if dates[0] != self._session_start(session):
+                values[:np.searchsorted(dates, self._session_start(session + 1))] = np.nan
+        return values
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        """Drop running sums for ``pair``, or for all pairs."""
+        if pair is None:
+            self._states.clear()
+        else:
+            self._states.pop(pair, None)
+
+    def update(self, dataframe: DataFrame, pair: str) -> np.ndarray:
+        """
+        Same values as ``compute(dataframe)``, but only the candles newer than the
+        last call for ``pair`` are added to its running sums. Rows the window slid
+        past are masked again, so live values match a backtest of the same candles.
+        """
+        dates = _date_index(dataframe)
+        state = self._states.get(pair)
+        new = self._new_rows(state, dates)
+        if new is None:
+            return self._prime(pair, dataframe, dates)
+
+        if new:
+            typical, volume = _typical_price_volume(dataframe.iloc[-new:])
+            self._step(state, dates[-new:], typical, volume, keep=dates.size)
+
+        if self.anchor is None:
+            # Cumulative from the first loaded candle: the whole column moves with the window.
+            start = state.cum_pv.size - dates.size
+            base_pv = state.cum_pv[start - 1] if start else 0.0
+            base_volume = state.cum_volume[start - 1] if start else 0.0
+            return (state.cum_pv[start:] - base_pv) / (state.cum_volume[start:] - base_volume)
+        return self._mask_incomplete(state.values[-dates.size:].copy(), dates)
+
+    @staticmethod
+    def _new_rows(state: Optional[_PairState], dates: np.ndarray) -> Optional[int]:
+        """Number of candles after the last known one, None if the state cannot continue."""
+        if state is None or not dates.size or not state.dates.size:
+            return None
+        pos = int(np.searchsorted(dates, state.dates[-1]))
+        first = int(np.searchsorted(state.dates, dates[0]))
+        if (
+            pos >= dates.size
+            or dates[pos] != state.dates[-1]
+            or first >= state.dates.size
+            or state.dates[first] != dates[0]
+            or state.dates.size - first != pos + 1
+        ):
+            return None
+        return dates.size - 1 - pos
+
+    def _prime(self, pair: str, dataframe: DataFrame, dates: np.ndarray) -> np.ndarray:
+        values = self.compute(dataframe)
+        if not dates.size:
+            self._states.pop(pair, None)
+            return values
+
+        state = _PairState()
+        state.dates, state.values = dates, values
+        typical, volume = _typical_price_volume(dataframe)
+        pv = typical * volume
+        if self.anchor is None:
+            state.cum_pv, state.cum_volume = np.cumsum(pv), np.cumsum(volume)
+        elif isinstance(self.anchor, int):
+            state.window_pv = deque(pv[-self.anchor:], maxlen=self.anchor)
+            state.window_volume = deque(volume[-self.anchor:], maxlen=self.anchor)
+            state.pv, state.volume = sum(state.window_pv), sum(state.window_volume)
+        else:
+            sessions = self._sessions(dates)
+            current = sessions == sessions[-1]
+            state.session = sessions[-1]
+            state.complete = not np.isnan(values[-1])
+            state.pv, state.volume = pv[current].sum(), volume[current].sum()
+        self._states[pair] = state
+        return values
+
+    def _step(
+        self, state: _PairState, dates: np.ndarray, typical: np.ndarray, volume: np.ndarray, keep: int
+    ) -> None:
+        pv = typical * volume
+        state.dates = np.concatenate((state.dates, dates))[-keep:]
+        if self.anchor is None:
+            # One extra candle is kept as the base the window's sums start from.
+            state.cum_pv = np.concatenate((state.cum_pv, state.cum_pv[-1] + np.cumsum(pv)))[-keep - 1:]
+            state.cum_volume = np.concatenate(
+                (state.cum_volume, state.cum_volume[-1] + np.cumsum(volume))
+            )[-keep - 1:]
+            return
+
+        values = np.empty(dates.size)
+        for i in range(dates.size):
+            if isinstance(self.anchor, int):
+                full = len(state.window_pv) == self.anchor
+                if full:
+                    state.pv -= state.window_pv[0]
+                    state.volume -= state.window_volume[0]
+                state.window_pv.append(pv[i])
+                state.window_volume.append(volume[i])
+                state.pv += pv[i]
+                state.volume += volume[i]
+                # Re-sum once per window to keep the running sums from drifting.
+                state.steps += 1
+                if state.steps % self.anchor == 0:
+                    state.pv, state.volume = sum(state.window_pv), sum(state.window_volume)
+                complete = len(state.window_pv) == self.anchor
+            else:
+                session = self._sessions(dates[i])
+                if session != state.session:
+                    state.session, state.pv, state.volume = session, 0.0, 0.0
+                    state.complete = True
+                state.pv += pv[i]
+                state.volume += volume[i]
+                complete = state.complete
+            values[i] = state.pv / state.volume if complete else np.nan
+        state.values = np.concatenate((state.values, values))[-keep:]
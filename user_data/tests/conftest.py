@@ -0,0 +1,136 @@
+"""
+Shared fixtures. The strategy, hyperopt loss and script modules are imported
+from their user_data directories, like freqtrade and the scripts do.
+"""
+
+import copy
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+
+USER_DATA = Path(__file__).resolve().parent.parent
+for directory in ("strategies", "hyperopts", "scripts"):
+    sys.path.insert(0, str(USER_DATA / directory))
+
+PAIRS = ["AAA/USDT", "BBB/USDT", "CCC/USDT", "DDD/USDT"]
+
+
+def candles(n: int = 3000, seed: int = 1, start: str = "2024-01-01", freq: str = "15min") -> DataFrame:
+    """Random walk OHLCV candles."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=n, freq=freq, tz="UTC"),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, n)),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, n)),
+        "close": close,
+        "volume": rng.uniform(10, 1000, n),
+    })
+
+
+@pytest.fixture
+def make_candles():
+    return candles
+
+
+@pytest.fixture
+def pair_candles():
+    """15m candles of PAIRS, one of them starting later and one with a gap."""
+    data = {pair: candles(seed=i + 3) for i, pair in enumerate(PAIRS)}
+    data[PAIRS[1]] = data[PAIRS[1]].drop(data[PAIRS[1]].index[500:520]).reset_index(drop=True)
+    data[PAIRS[2]] = data[PAIRS[2]].iloc[200:].reset_index(drop=True)
+    return data
+
+
+@pytest.fixture
+def make_backtesting(tmp_path):
+    """Backtesting of a strategy against a stub exchange with the markets of PAIRS."""
+    from ccxt import TICK_SIZE
+    from freqtrade.enums import CandleType
+    from freqtrade.exchange import Exchange
+    from freqtrade.optimize.backtesting import Backtesting
+
+    def make(strategy: str = "AwesomeCombinationStrategy", **extra):
+        config = {
+            "exchange": {"name": "binance", "pair_whitelist": PAIRS, "key": "", "secret": ""},
+            "pairlists": [{"method": "StaticPairList"}],
+            "stake_currency": "USDT",
+            "stake_amount": 100,
+            "dry_run_wallet": 1000,
+            "dry_run": True,
+            "max_open_trades": 3,
+            "timeframe": "15m",
+            "strategy": strategy,
+            "strategy_path": USER_DATA / "strategies",
+            "user_data_dir": tmp_path,
+            "datadir": tmp_path / "data",
+            "fee": 0.001,
+            "runmode": "backtest",
+            "timerange": "20240103-20240130",
+            "entry_pricing": {"price_side": "same"},
+            "exit_pricing": {"price_side": "same"},
+            "export": "none",
+            "candle_type_def": CandleType.SPOT,
+            "stoploss_on_exchange": False,
+            "trading_mode": "spot",
+            "margin_mode": "",
+            **extra,
+        }
+        markets = {
+            pair: {
+                "symbol": pair, "base": pair.split("/")[0], "quote": "USDT", "active": True,
+                "spot": True, "type": "spot", "precision": {"price": 0.01, "amount": 0.001},
+                "limits": {
+                    "amount": {"min": 0.001, "max": None}, "cost": {"min": 1, "max": None},
+                    "price": {"min": None, "max": None}, "leverage": {"min": None, "max": None},
+                },
+                "contractSize": None, "linear": None, "swap": False, "future": False,
+                "option": False, "margin": False,
+            }
+            for pair in PAIRS
+        }
+        with patch.multiple(
+            "freqtrade.exchange.exchange.Exchange",
+            _init_ccxt=MagicMock(return_value=MagicMock()),
+            _load_async_markets=MagicMock(),
+            validate_config=MagicMock(),
+            reload_markets=MagicMock(),
+            validate_timeframes=MagicMock(),
+            _init_async_loop=MagicMock(),
+            fill_leverage_tiers=MagicMock(),
+        ):
+            exchange = Exchange(config, validate=False, load_leverage_tiers=False)
+        exchange._markets = markets
+        exchange._api.precisionMode = TICK_SIZE
+        exchange._api.markets = markets
+        exchange.validate_required_startup_candles = MagicMock()
+        with patch("freqtrade.optimize.backtesting.migrate_data"):
+            backtesting = Backtesting(config, exchange=exchange)
+        backtesting._set_strategy(backtesting.strategylist[0])
+        return backtesting
+
+    return make
+
+
+@pytest.fixture
+def run_backtest():
+    """Analyze ``data`` and backtest it the way `freqtrade backtesting` does."""
+    from freqtrade.data.converter import trim_dataframes
+    from freqtrade.data.history import get_timerange
+
+    def run(backtesting, data: Dict[str, DataFrame], detail: Optional[Dict[str, DataFrame]] = None) -> dict:
+        backtesting.detail_data = detail or {}
+        analyzed = backtesting.strategy.advise_all_indicators({pair: df.copy() for pair, df in data.items()})
+        start, end = get_timerange(trim_dataframes(analyzed, backtesting.timerange, backtesting.required_startup))
+        return backtesting.backtest(processed=copy.deepcopy(analyzed), start_date=start, end_date=end)
+
+    return run
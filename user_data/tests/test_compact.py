@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from freqtrade.enums import RunMode
+from pandas.testing import assert_frame_equal
+
+from awesome_combination import SIGNAL_COLUMNS, compact_indicators, unpack_flags
+from validate_compact import analyze, signal_divergence
+
+
+def test_compact_signals_match_full(make_backtesting, pair_candles):
+    strategy = make_backtesting(runmode=RunMode.HYPEROPT, spaces=["buy", "sell"]).strategy
+    for pair in ("AAA/USDT", "BBB/USDT"):
+        full = analyze(strategy, pair_candles[pair], pair, compact=False)
+        compact = analyze(strategy, pair_candles[pair], pair, compact=True)
+
+        assert set(compact.columns) - {"indicator_flags"} < set(full.columns)
+        assert compact.memory_usage(deep=True).sum() < full.memory_usage(deep=True).sum() / 2
+        # Every buy_rsi / sell_rsi and additional indicator combination
+        divergence = signal_divergence(strategy, pair, full, compact)
+        assert divergence["entry"]["differing_candles"] == 0, divergence["entry"]["worst"]
+        assert divergence["exit"]["differing_candles"] == 0, divergence["exit"]["worst"]
+
+
+def test_compact_backtest_matches_full(make_backtesting, run_backtest, pair_candles):
+    results = []
+    for compact in (False, True):
+        backtesting = make_backtesting()
+        backtesting.strategy.compact_storage = compact
+        results.append(run_backtest(backtesting, pair_candles)["results"])
+
+    assert len(results[0]) > 10
+    assert_frame_equal(results[1], results[0])
+
+
+def test_compact_dtypes_and_flags(make_candles):
+    dataframe = make_candles(50)
+    rng = np.random.default_rng(0)
+    dataframe["rsi"] = rng.uniform(0, 100, 50)
+    dataframe["rsi_order"] = np.arange(50, dtype=np.int64)
+    dataframe["entry_conditions"] = rng.integers(0, 2**20, 50, dtype=np.int64)
+    dataframe["ema_9"] = dataframe["close"]
+    dataframe["squeeze_on"] = rng.random(50) < 0.5
+    dataframe["squeeze_off"] = ~dataframe["squeeze_on"] & (rng.random(50) < 0.5)
+
+    compact = compact_indicators(dataframe, (*SIGNAL_COLUMNS, "ema_9"))
+
+    assert_frame_equal(compact[["date", "open", "high", "low", "close", "volume"]], dataframe[compact.columns[:6]])
+    assert compact["rsi"].dtype == np.float32 and compact["ema_9"].dtype == np.float32
+    assert compact["rsi_order"].dtype == np.int32 and compact["entry_conditions"].dtype == np.int32
+    np.testing.assert_array_equal(compact["entry_conditions"], dataframe["entry_conditions"])
+    assert "squeeze_on" not in compact
+    assert_frame_equal(unpack_flags(compact), dataframe[["squeeze_on", "squeeze_off"]])
+    assert unpack_flags(compact.drop(columns="indicator_flags")).empty
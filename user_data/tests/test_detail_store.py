@@ -0,0 +1,71 @@
+import pickle
+
+import numpy as np
+import pytest
+from freqtrade.data.history.datahandlers import get_datahandler
+from freqtrade.enums import CandleType
+from pandas.testing import assert_frame_equal
+
+import detail_store
+from detail_store import install_lazy_detail
+
+
+@pytest.fixture
+def detail_backtesting(tmp_path, make_backtesting, pair_candles, make_candles):
+    """Backtesting with 5m detail candles, one pair's with a gap."""
+    handler = get_datahandler(tmp_path / "data", "feather")
+    for i, (pair, candles) in enumerate(pair_candles.items()):
+        handler.ohlcv_store(pair, "15m", candles, CandleType.SPOT)
+        detail = make_candles(9000, seed=i + 30, freq="5min")
+        if i == 1:
+            detail = detail.drop(detail.index[3000:3100]).reset_index(drop=True)
+        handler.ohlcv_store(pair, "5m", detail, CandleType.SPOT)
+
+    def make():
+        return make_backtesting(timeframe_detail="5m", dataformat_ohlcv="feather")
+
+    return make
+
+
+def test_windows_match_the_detail_frames(detail_backtesting, monkeypatch):
+    monkeypatch.setattr(detail_store, "BLOCK_ROWS", 100)
+    backtesting = detail_backtesting()
+    backtesting.load_bt_data_detail()
+    expected = backtesting.detail_data
+
+    install_lazy_detail(backtesting)
+    backtesting.load_bt_data_detail()
+    lazy = backtesting.detail_data
+    assert list(lazy) == list(expected)
+
+    rng = np.random.default_rng(0)
+    for pair, frame in expected.items():
+        assert len(lazy[pair]) == len(frame)
+        dates = frame["date"]
+        # Single candles, spans over several blocks, and bounds off the data
+        for first, length in [*zip(rng.integers(-10, len(frame), 50), rng.integers(0, 400, 50)), (0, len(frame) + 5)]:
+            start = dates.iloc[0] + (dates.iloc[1] - dates.iloc[0]) * int(first)
+            end = start + (dates.iloc[1] - dates.iloc[0]) * int(length)
+            got = lazy[pair].loc[(lazy[pair]["date"] >= start) & (lazy[pair]["date"] < end)]
+            want = frame.loc[(frame["date"] >= start) & (frame["date"] < end)]
+            assert_frame_equal(got.reset_index(drop=True), want.reset_index(drop=True))
+    # The LRU holds at most BLOCKS blocks
+    assert len(lazy._blocks) <= detail_store.BLOCKS
+
+    restored = pickle.loads(pickle.dumps(lazy))
+    assert restored.files == lazy.files and not restored._blocks
+
+
+def test_backtest_with_lazy_detail(detail_backtesting, run_backtest):
+    backtesting = detail_backtesting()
+    data, _ = backtesting.load_bt_data()
+    backtesting.load_bt_data_detail()
+    expected = run_backtest(backtesting, data, backtesting.detail_data)["results"]
+
+    backtesting = detail_backtesting()
+    install_lazy_detail(backtesting)
+    backtesting.load_bt_data_detail()
+    got = run_backtest(backtesting, data, backtesting.detail_data)["results"]
+
+    assert len(expected) > 5
+    assert_frame_equal(got, expected)
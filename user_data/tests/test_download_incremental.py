@@ -0,0 +1,144 @@
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+from freqtrade.configuration import TimeRange
+from freqtrade.data.history import load_pair_history
+from freqtrade.data.history.datahandlers import get_datahandler
+from freqtrade.enums import CandleType
+from pandas import DataFrame
+from pandas.testing import assert_frame_equal
+
+from download_incremental import update_data
+from ohlcv_store import OHLCVStore
+
+
+STORED_UNTIL = pd.Timestamp("2024-01-15", tz="UTC")
+NOW = pd.Timestamp("2024-01-20", tz="UTC")
+TIMERANGE = TimeRange.parse_timerange("20240105-")
+
+
+class StubExchange:
+    """
+    Serves get_historic_ohlcv() from a fixed candle history up to ``now``,
+    without the incomplete last candle, like the exchange class does.
+    """
+
+    def __init__(self, history: Dict[Tuple[str, str], DataFrame], now: pd.Timestamp) -> None:
+        self.history = history
+        self.now = now
+        self.markets = {pair: {} for pair, _ in history}
+        self.requests = []
+
+    def get_historic_ohlcv(self, pair, timeframe, since_ms, candle_type, is_new_pair=False, until_ms=None):
+        self.requests.append((pair, timeframe, since_ms))
+        candles = self.history[(pair, timeframe)]
+        candles = candles[
+            (candles["date"] >= pd.Timestamp(since_ms, unit="ms", tz="UTC")) & (candles["date"] <= self.now)
+        ]
+        if until_ms is not None:
+            candles = candles[candles["date"] <= pd.Timestamp(until_ms, unit="ms", tz="UTC")]
+        return candles.iloc[:-1].reset_index(drop=True)
+
+
+@pytest.fixture
+def downloaded(tmp_path, make_candles):
+    """Exchange history of three pairs, the first two downloaded up to STORED_UNTIL."""
+    history = {
+        (pair, "15m"): make_candles(2500, seed=seed)
+        for seed, pair in enumerate(["AAA/USDT", "BBB/USDT", "CCC/USDT"])
+    }
+    datadir = tmp_path / "data"
+    handler = get_datahandler(datadir, "feather")
+    for (pair, timeframe), candles in history.items():
+        if pair != "CCC/USDT":
+            stored = candles[candles["date"] < STORED_UNTIL].reset_index(drop=True)
+            handler.ohlcv_store(pair, timeframe, stored, CandleType.SPOT)
+    store = OHLCVStore(tmp_path / "store", datadir, "feather")
+    return store, StubExchange(history, NOW)
+
+
+def served(tmp_path, exchange, pair, **kwargs) -> DataFrame:
+    """What load_pair_history() loads from a download of everything the exchange serves."""
+    candles = exchange.history[(pair, "15m")]
+    candles = candles[candles["date"] <= exchange.now].iloc[:-1].reset_index(drop=True)
+    datadir = tmp_path / "reference"
+    get_datahandler(datadir, "feather").ohlcv_store(pair, "15m", candles, CandleType.SPOT)
+    return load_pair_history(pair, "15m", datadir, timerange=TIMERANGE, data_format="feather", **kwargs)
+
+
+def test_appends_in_place(tmp_path, downloaded):
+    store, exchange = downloaded
+    path = store.build("AAA/USDT", "15m")
+    dates_file = path.with_name(f"{path.name}.dates.npy")
+    source = store.source("AAA/USDT", "15m", CandleType.SPOT)
+    inode, source_mtime = dates_file.stat().st_ino, source.stat().st_mtime_ns
+
+    counts = update_data(store, exchange, ["AAA/USDT"], ["15m"], TIMERANGE)
+
+    assert counts == {"pairs": 1, "candles": 5 * 96, "full": 0}
+    # Only the candles since the last stored one were requested and written
+    assert exchange.requests == [("AAA/USDT", "15m", int((STORED_UNTIL - pd.Timedelta("15min")).timestamp()) * 1000)]
+    assert store.build("AAA/USDT", "15m") == path
+    assert dates_file.stat().st_ino == inode
+    assert source.stat().st_mtime_ns == source_mtime
+    assert_frame_equal(store.load("AAA/USDT", "15m", timerange=TIMERANGE), served(tmp_path, exchange, "AAA/USDT"))
+
+
+def test_overlap_is_not_duplicated(tmp_path, downloaded):
+    store, exchange = downloaded
+    update_data(store, exchange, ["AAA/USDT"], ["15m"], TIMERANGE)
+    # Same candles again: the exchange serves the last stored one and nothing after it
+    assert update_data(store, exchange, ["AAA/USDT"], ["15m"], TIMERANGE)["candles"] == 0
+
+    # Candles overlapping the stored ones by more than one
+    path = store.build("AAA/USDT", "15m")
+    exchange.now = NOW + pd.Timedelta("1h")
+    history = exchange.history[("AAA/USDT", "15m")]
+    overlapping = history[(history["date"] > NOW - pd.Timedelta("5h")) & (history["date"] < exchange.now)]
+    assert store.append(path, overlapping, "15m") == 4
+
+    dates, _ = store.arrays(path)
+    assert (np.diff(dates) == 15 * 60 * 10**9).all()
+    assert_frame_equal(store.load("AAA/USDT", "15m", timerange=TIMERANGE), served(tmp_path, exchange, "AAA/USDT"))
+
+
+def test_gap_is_appended_and_filled_up(tmp_path, downloaded, caplog):
+    store, exchange = downloaded
+    history = exchange.history[("BBB/USDT", "15m")]
+    exchange.history[("BBB/USDT", "15m")] = history[
+        ~history["date"].between(STORED_UNTIL + pd.Timedelta("1h"), STORED_UNTIL + pd.Timedelta("3h"))
+    ].reset_index(drop=True)
+
+    with caplog.at_level(logging.WARNING):
+        counts = update_data(store, exchange, ["BBB/USDT"], ["15m"], TIMERANGE)
+
+    assert counts == {"pairs": 1, "candles": 5 * 96 - 9, "full": 0}
+    assert "9 candles missing" in caplog.text
+    for fill_up_missing in (True, False):
+        assert_frame_equal(
+            store.load("BBB/USDT", "15m", timerange=TIMERANGE, fill_up_missing=fill_up_missing),
+            served(tmp_path, exchange, "BBB/USDT", fill_up_missing=fill_up_missing),
+        )
+
+
+def test_downloads_in_full(tmp_path, downloaded):
+    store, exchange = downloaded
+    # Candles off the 15m grid after the stored ones, and a pair without downloaded data
+    history = exchange.history[("AAA/USDT", "15m")]
+    shifted = history["date"] > STORED_UNTIL + pd.Timedelta("1D")
+    history.loc[shifted, "date"] += pd.Timedelta("5min")
+    old_path = store.build("AAA/USDT", "15m")
+
+    counts = update_data(store, exchange, ["AAA/USDT", "CCC/USDT"], ["15m"], TIMERANGE)
+
+    assert counts == {"pairs": 0, "candles": 0, "full": 2}
+    assert store.build("AAA/USDT", "15m") != old_path
+    assert not list(store.directory.glob(f"{old_path.name}.*"))
+    for pair in ("AAA/USDT", "CCC/USDT"):
+        assert_frame_equal(
+            store.load(pair, "15m", timerange=TIMERANGE, fill_up_missing=False),
+            load_pair_history(pair, "15m", store.datadir, timerange=TIMERANGE, fill_up_missing=False, data_format="feather"),
+        )
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import talib.abstract as ta
+from freqtrade.enums import RunMode
+
+from awesome_combination import ema_macd
+
+
+EMA_PERIODS = (3, 5, 9, 10, 21, 50, 100, 200)
+
+
+@pytest.mark.parametrize("rows", [0, 5, 150, 3000])
+def test_ema_macd_matches_talib(make_candles, rows):
+    candles = make_candles(max(rows, 1)).iloc[:rows]
+    emas, macd = ema_macd(candles["close"].to_numpy(), EMA_PERIODS)
+
+    for i, period in enumerate(EMA_PERIODS):
+        np.testing.assert_array_equal(emas[:, i], ta.EMA(candles, timeperiod=period))
+    expected = ta.MACD(candles)
+    for i, column in enumerate(["macd", "macdsignal", "macdhist"]):
+        np.testing.assert_array_equal(macd[:, i], expected[column])
+
+
+def test_ema_macd_without_macd(make_candles):
+    candles = make_candles(300)
+    emas, macd = ema_macd(candles["close"].to_numpy(), [50], None)
+    assert macd.shape == (300, 0)
+    np.testing.assert_array_equal(emas[:, 0], ta.EMA(candles, timeperiod=50))
+
+
+def test_strategy_matches_baseline_calls(make_backtesting, pair_candles):
+    strategy = make_backtesting(runmode=RunMode.HYPEROPT, spaces=["buy", "sell"]).strategy
+    strategy.prune_indicators = False
+    candles = pair_candles["BBB/USDT"]
+    analyzed = strategy.advise_indicators(candles.copy(), {"pair": "BBB/USDT"})
+
+    for period in EMA_PERIODS:
+        np.testing.assert_array_equal(analyzed[f"ema{period}"], ta.EMA(candles, timeperiod=period))
+    # The keywords the strategy used to pass are no ta.MACD parameters, its defaults applied
+    profile = strategy.macd_profiles[strategy.timeframe]
+    expected = ta.MACD(candles, slow=profile["slow"], fast=profile["fast"], signal=profile["signal"])
+    for column in ["macd", "macdsignal", "macdhist"]:
+        np.testing.assert_array_equal(analyzed[column], expected[column])
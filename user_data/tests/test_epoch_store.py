@@ -0,0 +1,155 @@
+import json
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from epoch_store import ADDED_COLUMNS, METRICS, EpochStore, install_epoch_store
+from query_epochs import import_results
+
+
+def epochs(count, seed=1, start=1):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "current_epoch": epoch,
+            "loss": float(rng.normal()),
+            "is_best": epoch % 7 == 0,
+            "pruned": epoch % 11 == 0,
+            "results_metrics": {
+                "strategy_name": "AwesomeCombinationStrategy",
+                "profit_total": float(rng.normal(0.1, 0.3)),
+                "max_drawdown_account": float(rng.uniform(0, 0.3)),
+                "sharpe": float(rng.normal(1, 2)),
+                "total_trades": int(rng.integers(0, 3000)),
+                "loss_components": {"sharpe": {"weighted": 0.5, "seconds": 0.001}},
+            },
+            "params_dict": {"buy_rsi": int(rng.integers(20, 40))},
+            "epoch_timing": {"epoch_s": 1.0, "backtest_s": 0.8, "stats_s": 0.1, "loss_s": 0.05},
+        }
+        for epoch in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EpochStore(tmp_path / "epochs.sqlite")
+    yield store
+    store.close()
+
+
+def test_append_replaces_same_epoch(store):
+    store.add_run("run", {"strategy": "AwesomeCombinationStrategy", "spaces": ["buy"]})
+    assert store.append("run", epochs(50)) == 50
+    replaced = epochs(10, seed=2)
+    store.append("run", replaced)
+
+    assert store.epoch_count("run") == 50
+    rows = {row["epoch"]: row for row in store.query(runs=["run"], limit=None)}
+    assert [rows[epoch["current_epoch"]]["loss"] for epoch in replaced] == [epoch["loss"] for epoch in replaced]
+    row = rows[1]
+    assert json.loads(row["params"]) == replaced[0]["params_dict"]
+    assert json.loads(row["components"]) == replaced[0]["results_metrics"]["loss_components"]
+    assert row["epoch_s"] == 1.0 and row["spaces"] == "buy"
+    assert [(run["run"], run["epochs"]) for run in store.list_runs()] == [("run", 50)]
+
+
+@pytest.mark.parametrize("order_by,descending", [("loss", False), ("sharpe", True), ("trades", False)])
+def test_query_matches_filter(store, order_by, descending):
+    stored = {"a": epochs(200, seed=3), "b": epochs(200, seed=4)}
+    for run, run_epochs in stored.items():
+        store.append(run, run_epochs)
+
+    rows = store.query(
+        [("max_drawdown <", 0.1), ("trades >", 1000)], runs=["a"], where="NOT pruned",
+        order_by=order_by, descending=descending, limit=20,
+    )
+
+    column = {"loss": "loss", **METRICS}[order_by]
+    expected = sorted(
+        (
+            epoch for epoch in stored["a"]
+            if epoch["results_metrics"]["max_drawdown_account"] < 0.1
+            and epoch["results_metrics"]["total_trades"] > 1000 and not epoch["pruned"]
+        ),
+        key=lambda epoch: epoch[column] if column == "loss" else epoch["results_metrics"][column],
+        reverse=descending,
+    )[:20]
+    assert len(expected) > 5
+    assert [(row["run"], row["epoch"]) for row in rows] == [("a", epoch["current_epoch"]) for epoch in expected]
+
+
+def test_query_rejects_unknown_order(store):
+    with pytest.raises(ValueError, match="Cannot order by"):
+        store.query(order_by="loss; DROP TABLE epochs")
+
+
+@pytest.mark.parametrize("condition", ["loss; DROP TABLE epochs <", "trades LIKE", "loss <= 0 OR 1 =", "loss"])
+def test_query_rejects_unknown_condition(store, condition):
+    with pytest.raises(ValueError, match="Cannot filter on"):
+        store.query([(condition, 0)])
+
+
+def test_query_cannot_write(store):
+    store.append("run", epochs(20))
+    with pytest.raises(sqlite3.Error):
+        store.query(where="1); DELETE FROM epochs; --")
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        store.read_only_connection.execute("DELETE FROM epochs")
+    assert store.epoch_count("run") == 20
+
+
+def test_adds_new_columns_to_old_table(tmp_path):
+    path = tmp_path / "epochs.sqlite"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            f"CREATE TABLE epochs (run TEXT NOT NULL, epoch INTEGER NOT NULL, loss REAL, is_best INTEGER, "
+            f"pruned INTEGER, {', '.join(f'{column} REAL' for column in METRICS)}, params TEXT, "
+            f"PRIMARY KEY (run, epoch))"
+        )
+        connection.execute("INSERT INTO epochs (run, epoch, loss, params) VALUES ('old', 1, 0.5, '{}')")
+    connection.close()
+
+    store = EpochStore(path)
+    store.append("new", epochs(3))
+    rows = {row["run"]: row for row in store.query(limit=None)}
+    store.close()
+
+    assert set(ADDED_COLUMNS) <= set(rows["old"].keys())
+    assert rows["old"]["components"] is None and rows["old"]["loss"] == 0.5
+    assert rows["new"]["epoch_s"] == 1.0
+
+
+def test_import_adds_only_new_epochs(store, tmp_path):
+    results_file = tmp_path / "strategy_AwesomeCombinationStrategy_2024-01-01_00-00-00.fthypt"
+    first, more = epochs(600), epochs(100, seed=5, start=601)
+    results_file.write_text("".join(json.dumps(epoch) + "\n" for epoch in first))
+    assert import_results(store, results_file) == 600
+
+    with results_file.open("a") as f:
+        f.writelines(json.dumps(epoch) + "\n" for epoch in more)
+    assert import_results(store, results_file) == 100
+    assert import_results(store, results_file) == 0
+
+    run = results_file.stem
+    assert store.epoch_count(run) == 700
+    rows = store.query(runs=[run], order_by="epoch", limit=None)
+    assert [row["loss"] for row in rows] == [epoch["loss"] for epoch in first + more]
+    assert store.list_runs()[0]["strategy"] == "AwesomeCombinationStrategy"
+
+
+def test_install_appends_saved_epochs(store, tmp_path):
+    saved = []
+    hyperopt = SimpleNamespace(
+        _save_result=saved.append,
+        results_file=tmp_path / "strategy_run.fthypt",
+        config={"strategy": "AwesomeCombinationStrategy", "hyperopt_loss": "SharpeHyperOptLoss"},
+    )
+    install_epoch_store(hyperopt, store)
+    for epoch in epochs(5):
+        hyperopt._save_result(epoch)
+
+    assert len(saved) == 5
+    assert store.epoch_count("strategy_run") == 5
+    assert store.list_runs()[0]["hyperopt_loss"] == "SharpeHyperOptLoss"
@@ -0,0 +1,58 @@
+import copy
+
+import pytest
+from freqtrade.data.converter import trim_dataframes
+from freqtrade.data.history import get_timerange
+
+from exit_simulator import EpochSimulation, build_paths, compare
+
+
+# Values of the roi, stoploss and trailing spaces, as hyperopt assigns them to the strategy
+EPOCHS = [
+    {},
+    {"stoploss": -0.02, "minimal_roi": {0: 0.015, 40: 0.008, 120: 0}},
+    {"stoploss": -0.05, "minimal_roi": {0: 0.3}, "trailing_stop": False, "use_custom_stoploss": False},
+    {
+        "stoploss": -0.03, "minimal_roi": {0: 0.05, 200: 0.01}, "trailing_stop": True,
+        "trailing_stop_positive": 0.005, "trailing_stop_positive_offset": 0.012,
+        "trailing_only_offset_is_reached": True, "use_custom_stoploss": False,
+    },
+]
+
+
+@pytest.mark.parametrize("detail", [None, "5m"])
+def test_simulated_epochs_match_the_backtest(make_backtesting, pair_candles, make_candles, detail):
+    extra = {"timeframe_detail": detail} if detail else {}
+    backtesting = make_backtesting(**extra)
+    strategy = backtesting.strategy
+    if detail:
+        backtesting.detail_data = {
+            pair: make_candles(9000, seed=i + 30, freq="5min") for i, pair in enumerate(pair_candles)
+        }
+    processed = strategy.advise_all_indicators({pair: df.copy() for pair, df in pair_candles.items()})
+    start, end = get_timerange(trim_dataframes(processed, backtesting.timerange, backtesting.required_startup))
+    paths = build_paths(backtesting, copy.deepcopy(processed), start, end)
+
+    for epoch in EPOCHS:
+        for name, value in epoch.items():
+            setattr(strategy, name, value)
+        regular = backtesting.backtest(processed=copy.deepcopy(processed), start_date=start, end_date=end)
+        assert len(regular["results"]) > 5
+        assert compare(EpochSimulation(backtesting, paths).run(), regular) is None, epoch
+        # Strategies without per-pair tables are searched with minimal_roi
+        strategy.roi_thresholds = None
+        assert compare(EpochSimulation(backtesting, paths).run(), regular) is None, epoch
+        del strategy.roi_thresholds
+
+
+def test_compare_reports_differences(make_backtesting, run_backtest, pair_candles):
+    backtesting = make_backtesting()
+    regular = run_backtest(backtesting, pair_candles)
+    changed = {**regular, "results": regular["results"].copy()}
+    changed["results"].loc[3, "close_rate"] += 0.01
+
+    assert compare(regular, regular) is None
+    assert compare(changed, regular).startswith("trade 3 close_rate")
+    trades = len(regular["results"])
+    fewer = {**regular, "results": regular["results"].iloc[1:]}
+    assert compare(fewer, regular) == f"{trades - 1} trades instead of {trades}"
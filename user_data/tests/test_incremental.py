@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from awesome_combination import IncrementalIndicatorEngine, VWAP
+from awesome_combination.incremental import indicator_divergence
+
+
+@pytest.fixture
+def make_engine(make_backtesting):
+    strategy = make_backtesting().strategy
+
+    def make(**kwargs):
+        return IncrementalIndicatorEngine(
+            strategy.compute_indicators,
+            ema_periods=strategy.ema_periods,
+            macd_periods=strategy.macd_periods,
+            vwap=VWAP(),
+            **kwargs,
+        ), strategy.compute_indicators
+
+    return make
+
+
+def assert_matches(result, reference, columns, rtol):
+    for column in columns:
+        expected = reference[column].to_numpy(dtype=float)
+        scale = np.nanmax(np.abs(expected))
+        np.testing.assert_allclose(
+            result[column].to_numpy(dtype=float), expected, rtol=0, atol=rtol * scale, err_msg=column
+        )
+
+
+def test_stepped_candles_match_full_compute(make_engine, make_candles):
+    engine, compute = make_engine()
+    candles = make_candles(1000)
+    for end in range(400, 1000, 3):
+        # Growing like the live dataframe until its candle limit, one or more new candles at a time
+        live = candles.iloc[:end].reset_index(drop=True)
+        result = engine.populate(live.copy(), "AAA/USDT")
+        reference = compute(live.copy())
+        assert_matches(result, reference, [*engine.columns, "vwap"], rtol=1e-9)
+
+    # Every candle after the first call was stepped, not recomputed
+    assert engine._states["AAA/USDT"].updates == len(range(403, 1000, 3))
+
+
+def test_reprimes_what_it_cannot_step(make_engine, make_candles):
+    engine, compute = make_engine(max_step_rows=10)
+    candles = make_candles(1000)
+    engine.populate(candles.iloc[:500].copy(), "AAA/USDT")
+    # Missing candles are stepped over, like the full compute ignores the dates
+    live = candles.drop(candles.index[505:507]).iloc[:510].reset_index(drop=True)
+    result = engine.populate(live.copy(), "AAA/USDT")
+    assert_matches(result, compute(live.copy()), [*engine.columns, "vwap"], rtol=1e-9)
+    assert engine._states["AAA/USDT"].updates == 1
+
+    for live in (
+        candles.iloc[:600],  # more new candles than max_step_rows
+        candles.iloc[650:1000],  # none of the cached candles
+    ):
+        live = live.reset_index(drop=True)
+        result = engine.populate(live.copy(), "AAA/USDT")
+        assert engine._states["AAA/USDT"].updates == 0
+        assert_matches(result, compute(live.copy()), [*engine.columns, "vwap"], rtol=0)
+
+
+def test_verification_bounds_sliding_window_drift(make_engine, make_candles):
+    engine, compute = make_engine(verify_every=1, tolerance=1e-4)
+    candles = make_candles(1000)
+    for end in range(500, 1000):
+        # Sliding like the live dataframe at its candle limit: full recomputes restart every average
+        live = candles.iloc[end - 500:end].reset_index(drop=True)
+        result = engine.populate(live.copy(), "AAA/USDT")
+        reference = compute(live.copy())
+        _, divergence = indicator_divergence(result, reference, engine.columns, 1)
+        assert divergence <= 1e-4
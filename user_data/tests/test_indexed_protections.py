@@ -0,0 +1,45 @@
+import pytest
+from pandas.testing import assert_frame_equal
+
+from indexed_protections import IndexedProtectionManager, install_indexed_protections
+
+
+PROTECTIONS = [
+    {"method": "CooldownPeriod", "stop_duration_candles": 4},
+    {"method": "StoplossGuard", "lookback_period_candles": 96, "trade_limit": 1, "stop_duration_candles": 8},
+    {
+        "method": "StoplossGuard", "lookback_period_candles": 48, "trade_limit": 1,
+        "stop_duration_candles": 12, "only_per_pair": True,
+    },
+    {
+        "method": "MaxDrawdown", "lookback_period_candles": 96, "trade_limit": 2,
+        "max_allowed_drawdown": 0.005, "stop_duration_candles": 6,
+    },
+    {
+        "method": "LowProfitPairs", "lookback_period_candles": 96, "trade_limit": 1,
+        "stop_duration": 60, "required_profit": 0.005,
+    },
+    {
+        "method": "LowProfitPairs", "lookback_period_candles": 48, "trade_limit": 2,
+        "stop_duration_candles": 4, "required_profit": 0.01, "only_per_pair": True,
+    },
+]
+
+
+@pytest.mark.parametrize("protections", [PROTECTIONS, PROTECTIONS[:1], PROTECTIONS[3:4], PROTECTIONS[4:5], PROTECTIONS[5:]])
+def test_indexed_protections_match_freqtrade(make_backtesting, run_backtest, pair_candles, protections):
+    results = []
+    for indexed in (False, True):
+        backtesting = make_backtesting(enable_protections=True, stoploss=-0.01)
+        strategy = backtesting.strategy
+        strategy.__dict__.pop("_protections", None)
+        strategy.build_protections = lambda: protections
+        if indexed:
+            install_indexed_protections(backtesting)
+        results.append(run_backtest(backtesting, pair_candles))
+        assert isinstance(backtesting.protections, IndexedProtectionManager) == indexed
+
+    expected, got = results
+    assert expected["locks"], "the protections should lock"
+    assert_frame_equal(got["results"], expected["results"])
+    assert [lock.to_json() for lock in got["locks"]] == [lock.to_json() for lock in expected["locks"]]
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from awesome_combination import IndicatorCache
+
+
+def test_cached_indicators_match_computed(make_backtesting, pair_candles):
+    strategy = make_backtesting().strategy
+    computed = {}
+    strategy.use_indicator_cache = False
+    for pair, candles in pair_candles.items():
+        computed[pair] = strategy.advise_indicators(candles.copy(), {"pair": pair})
+
+    strategy.use_indicator_cache = True
+    for pair, candles in pair_candles.items():
+        stored = strategy.advise_indicators(candles.copy(), {"pair": pair})
+        assert strategy.indicator_cache.path(candles, pair, "15m").exists()
+        strategy.compute_indicators = MagicMock(side_effect=AssertionError("computed instead of loaded"))
+        loaded = strategy.advise_indicators(candles.copy(), {"pair": pair})
+        del strategy.compute_indicators
+
+        assert_frame_equal(stored, computed[pair])
+        assert_frame_equal(loaded, computed[pair])
+
+
+def test_cache_keyed_on_candles_and_code(tmp_path, make_candles):
+    cache = IndicatorCache(tmp_path, "code")
+    candles = make_candles(100)
+
+    def compute(dataframe):
+        return dataframe.assign(double=dataframe["close"] * 2)
+
+    expected = compute(candles)
+    assert_frame_equal(cache.populate(candles.copy(), "AAA/USDT", "15m", compute), expected)
+    assert_frame_equal(cache.populate(candles.copy(), "AAA/USDT", "15m", MagicMock()), expected)
+
+    # Other candles, code or pair are computed again
+    changed = candles.copy()
+    changed.loc[50, "close"] += 1
+    assert cache.path(changed, "AAA/USDT", "15m") != cache.path(candles, "AAA/USDT", "15m")
+    assert IndicatorCache(tmp_path, "other").path(candles, "AAA/USDT", "15m") != cache.path(candles, "AAA/USDT", "15m")
+    assert_frame_equal(cache.populate(changed.copy(), "AAA/USDT", "15m", compute), compute(changed))
+    # A shifted index is the same candles
+    shifted = candles.set_axis(candles.index + 7)
+    assert_frame_equal(cache.populate(shifted.copy(), "AAA/USDT", "15m", MagicMock()), compute(shifted))
+
+
+@pytest.mark.parametrize("content", [b"", b"not a feather file"])
+def test_unreadable_cache_file_is_recomputed(tmp_path, make_candles, content):
+    cache = IndicatorCache(tmp_path, "code")
+    candles = make_candles(100)
+    cache.path(candles, "AAA/USDT", "15m").write_bytes(content)
+
+    compute = MagicMock(side_effect=lambda dataframe: dataframe.assign(double=dataframe["close"] * 2))
+    result = cache.populate(candles.copy(), "AAA/USDT", "15m", compute)
+
+    assert compute.call_count == 1
+    assert_frame_equal(cache.populate(candles.copy(), "AAA/USDT", "15m", MagicMock()), result)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from freqtrade.enums import RunMode
+
+
+def signals(strategy, analyzed, pair):
+    entries = strategy.populate_entry_trend(analyzed.copy(), {"pair": pair})["enter_long"]
+    exits = strategy.populate_exit_trend(analyzed.copy(), {"pair": pair})["exit_long"]
+    return entries.fillna(0).to_numpy(), exits.fillna(0).to_numpy()
+
+
+@pytest.mark.parametrize("spaces", [["buy"], ["sell"], ["roi"]])
+def test_hyperopt_selects_every_profile(make_backtesting, pair_candles, spaces):
+    pair = "AAA/USDT"
+    strategies = {
+        prune: make_backtesting(runmode=RunMode.HYPEROPT, spaces=spaces).strategy for prune in (True, False)
+    }
+    strategies[False].prune_indicators = False
+    analyzed = {
+        prune: strategy.advise_indicators(pair_candles[pair].copy(), {"pair": pair})
+        for prune, strategy in strategies.items()
+    }
+    # Every value of either parameter, whichever space is optimized
+    buy_profiles = list(strategies[True].buy_additional_indicator.opt_range)
+    sell_profiles = list(strategies[True].sell_additional_indicator.opt_range)
+    assert strategies[True].entry_conditions == {"VWAP", "MACD", "BB", "EMA", "TTM"}
+    for buy, sell in zip(buy_profiles, sell_profiles * len(buy_profiles)):
+        for strategy in strategies.values():
+            strategy.buy_additional_indicator.value = buy
+            strategy.sell_additional_indicator.value = sell
+        pruned, full = (signals(strategy, analyzed[prune], pair) for prune, strategy in strategies.items())
+        np.testing.assert_array_equal(pruned[0], full[0], err_msg=buy)
+        np.testing.assert_array_equal(pruned[1], full[1], err_msg=sell)
+
+
+def test_backtest_uses_loaded_parameters(make_backtesting, run_backtest, pair_candles):
+    results = []
+    for prune in (True, False):
+        backtesting = make_backtesting()
+        strategy = backtesting.strategy
+        strategy.prune_indicators = prune
+        # Like a parameter file: loaded by ft_bot_start() after bot_start()
+        strategy.buy_params = {"buy_additional_indicator": "MACD", "buy_rsi": 40}
+        strategy.sell_params = {"sell_additional_indicator": "TTM", "sell_rsi": 75}
+        strategy.ft_bot_start()
+        results.append(run_backtest(backtesting, pair_candles)["results"])
+
+    assert len(results[1]) > 10
+    assert results[0].equals(results[1])
+
+
+def test_cache_keyed_on_columns(make_backtesting, pair_candles):
+    pair = "AAA/USDT"
+    strategy = make_backtesting().strategy
+    strategy.buy_params = {"buy_additional_indicator": "BB"}
+    strategy.ft_bot_start()
+    strategy.advise_indicators(pair_candles[pair].copy(), {"pair": pair})
+    bb = strategy.indicator_cache
+
+    strategy.buy_params = {"buy_additional_indicator": "EMA"}
+    strategy.ft_bot_start()
+    analyzed = strategy.advise_indicators(pair_candles[pair].copy(), {"pair": pair})
+
+    assert strategy.indicator_cache.code_hash != bb.code_hash
+    assert "ema50" in analyzed and "bb_lowerband" not in analyzed
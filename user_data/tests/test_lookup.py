@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from awesome_combination import CandleLookup
+
+
+@pytest.mark.parametrize("detail", [None, "5m"])
+def test_lookup_matches_dataprovider(make_backtesting, run_backtest, pair_candles, make_candles, detail):
+    extra = {"timeframe_detail": detail} if detail else {}
+    backtesting = make_backtesting(**extra)
+    strategy = backtesting.strategy
+    calls = []
+
+    def custom_stoploss(pair, trade, current_time, current_rate, current_profit, **kwargs):
+        dataframe, _ = strategy.dp.get_analyzed_dataframe(pair, strategy.timeframe)
+        times = np.array([int(current_time.timestamp()) * 10**9])
+        calls.append((
+            dataframe.iloc[-1]["atr"],
+            strategy.atr_lookup.get(pair, current_time),
+            strategy.atr_lookup.get_many(pair, times)[0],
+        ))
+        return 1
+
+    strategy.custom_stoploss = custom_stoploss
+    detail_data = None
+    if detail:
+        detail_data = {pair: make_candles(9000, seed=i + 30, freq="5min") for i, pair in enumerate(pair_candles)}
+    run_backtest(backtesting, pair_candles, detail_data)
+
+    assert len(calls) > 100
+    expected, got, got_many = np.array(calls).T
+    np.testing.assert_array_equal(got, expected)
+    np.testing.assert_array_equal(got_many, expected)
+
+
+def test_lookup_closed_candles(make_candles):
+    dataframe = make_candles(10)
+    dataframe["atr"] = np.arange(10.0)
+    lookup = CandleLookup("atr", 900)
+    lookup.update("AAA/USDT", dataframe)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    # The first candle closes at 00:15
+    assert lookup.get("AAA/USDT", start + timedelta(minutes=14)) is None
+    assert lookup.get("AAA/USDT", start + timedelta(minutes=15)) == 0
+    assert lookup.get("AAA/USDT", start + timedelta(minutes=44)) == 1
+    # Live: the last analyzed candle, however late
+    assert lookup.get("AAA/USDT", start + timedelta(days=1)) == 9
+    assert lookup.get("BBB/USDT", start + timedelta(days=1)) is None
+
+    times = np.array([15, 29, 30, 150, 1000]) * 60 * 10**9 + np.int64(start.timestamp()) * 10**9
+    np.testing.assert_array_equal(lookup.get_many("AAA/USDT", times), [0, 0, 1, 9, 9])
+    assert lookup.get_many("AAA/USDT", times - 60 * 10**9) is None
+
+    # Missing candles fall back to the last one closed before
+    lookup.update("AAA/USDT", dataframe.drop(index=[4, 5]))
+    assert lookup.get("AAA/USDT", start + timedelta(minutes=6 * 15 + 1)) == 3
+    np.testing.assert_array_equal(lookup.get_many("AAA/USDT", times[2:4]), [1, 9])
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from freqtrade.data.metrics import (
+    calculate_calmar,
+    calculate_max_drawdown,
+    calculate_sharpe,
+    calculate_sortino,
+    calculate_underwater,
+)
+
+from loss_metrics import LossAccumulator, LossMetrics
+
+
+STARTING_BALANCE = 1000
+
+
+def trades(count: int, dates: int, seed: int) -> pd.DataFrame:
+    """Trades closing on ``dates`` distinct dates, so many of them at the same time."""
+    rng = np.random.default_rng(seed)
+    close_date = pd.Timestamp("2024-01-02", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, dates, count) * 15, unit="min"
+    )
+    profit_abs = rng.normal(0.5, 8, count)
+    return pd.DataFrame({
+        "pair": rng.choice(["AAA/USDT", "BBB/USDT", "CCC/USDT"], count),
+        "close_date": close_date,
+        "profit_abs": profit_abs,
+        "profit_ratio": profit_abs / 100,
+        "trade_duration": rng.integers(15, 900, count),
+    })
+
+
+@pytest.mark.parametrize("starting_balance", [STARTING_BALANCE, 0])
+@pytest.mark.parametrize("count,dates,seed", [(20, 3, 1), (500, 40, 2), (3000, 200, 3), (3000, 3000, 4)])
+def test_metrics_match_freqtrade(count, dates, seed, starting_balance):
+    results = trades(count, dates, seed)
+    min_date, max_date = pd.Timestamp("2024-01-01", tz="UTC"), pd.Timestamp("2024-03-01", tz="UTC")
+    metrics = LossMetrics(results, starting_balance, min_date, max_date)
+
+    underwater = calculate_underwater(results, value_col="profit_abs", starting_balance=starting_balance)
+    assert metrics.max_drawdown == abs(underwater["drawdown"].min())
+    assert metrics.max_relative_drawdown == underwater["drawdown_relative"].max()
+
+    drawdown = calculate_max_drawdown(results, starting_balance=starting_balance, value_col="profit_abs")
+    assert metrics.has_drawdown
+    assert metrics.drawdown_abs == drawdown.drawdown_abs
+    assert metrics.relative_account_drawdown == drawdown.relative_account_drawdown
+
+    if starting_balance:
+        for value, expected in (
+            (metrics.sharpe, calculate_sharpe(results, min_date, max_date, starting_balance)),
+            (metrics.sortino, calculate_sortino(results, min_date, max_date, starting_balance)),
+            (metrics.calmar, calculate_calmar(results, min_date, max_date, starting_balance)),
+        ):
+            assert value == expected
+
+
+def test_no_drawdown_matches_freqtrade():
+    results = trades(50, 10, 5)
+    results["profit_abs"] = results["profit_abs"].abs()
+    with pytest.raises(ValueError):
+        calculate_max_drawdown(results, starting_balance=STARTING_BALANCE, value_col="profit_abs")
+    metrics = LossMetrics(results, STARTING_BALANCE)
+    assert not metrics.has_drawdown
+    assert metrics.drawdown_abs == 0
+    assert metrics.relative_account_drawdown == 0
+
+
+def test_batches_match_one_batch():
+    # Distinct close dates: batches split anywhere give the values of one batch
+    results = trades(1000, 1000, 6).drop_duplicates("close_date").sort_values("close_date")
+    whole = LossAccumulator(STARTING_BALANCE, results["close_date"].min(), results["close_date"].max())
+    whole.update(results)
+    batched = LossAccumulator(STARTING_BALANCE, results["close_date"].min(), results["close_date"].max())
+    for batch in np.array_split(np.arange(len(results)), [1, 2, 50, 51, 400]):
+        batched.update(results.iloc[batch])
+    for name in ("max_drawdown", "max_relative_drawdown", "drawdown_abs", "relative_account_drawdown",
+                 "sharpe", "sortino", "calmar", "total_profit", "trade_distribution_penalty"):
+        assert getattr(batched, name) == getattr(whole, name), name
+
+    with pytest.raises(ValueError):
+        batched.update(results.iloc[:1])
+
+
+def test_accumulator_approximates_metrics():
+    results = trades(3000, 200, 7)
+    min_date, max_date = pd.Timestamp("2024-01-01", tz="UTC"), pd.Timestamp("2024-03-01", tz="UTC")
+    metrics = LossMetrics(results, STARTING_BALANCE, min_date, max_date)
+    accumulator = LossAccumulator(STARTING_BALANCE, min_date, max_date).update(results)
+    for name in ("max_drawdown", "max_relative_drawdown", "drawdown_abs", "relative_account_drawdown",
+                 "sharpe", "sortino", "calmar", "total_profit", "total_profit_ratio",
+                 "mean_trade_duration", "trade_distribution_penalty"):
+        assert getattr(accumulator, name) == pytest.approx(getattr(metrics, name), rel=1e-9), name
+
+    with pytest.raises(TypeError):
+        metrics.update(results)
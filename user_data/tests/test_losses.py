@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from benchmark_losses import REFERENCE_FILE, load_losses, loss_kwargs, same_value, synthetic_results
+
+
+REFERENCE = json.loads(REFERENCE_FILE.read_text())
+LOSSES = load_losses()
+
+
+def test_reference_covers_losses():
+    assert sorted(LOSSES) == sorted(REFERENCE)
+
+
+@pytest.mark.parametrize("trades", [1000, 10000])
+@pytest.mark.parametrize("name", sorted(LOSSES))
+def test_loss_matches_original(name, trades):
+    # The reference holds the values of the original loss implementations
+    value = float(LOSSES[name](**loss_kwargs(synthetic_results(trades))))
+    assert same_value(value, REFERENCE[name][str(trades)], 1e-9)
+
+
+@pytest.mark.parametrize("name", sorted(LOSSES))
+def test_components_leave_loss_unchanged(name):
+    kwargs = loss_kwargs(synthetic_results(1000))
+    published = float(LOSSES[name](**kwargs))
+    assert published == float(LOSSES[name](**{**kwargs, "backtest_stats": None}))
+    for component in kwargs["backtest_stats"].get("loss_components", {}).values():
+        assert set(component) <= {"value", "weight", "weighted", "seconds"}
+        if "weighted" in component:
+            assert component["weighted"] == component["weight"] * component["value"]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from freqtrade.configuration import TimeRange
+from freqtrade.data.history import load_data, load_pair_history
+from freqtrade.data.history.datahandlers import get_datahandler
+from freqtrade.enums import CandleType
+from pandas.testing import assert_frame_equal
+
+from ohlcv_store import OHLCVStore, install_ohlcv_store
+
+
+@pytest.fixture
+def store(tmp_path, pair_candles):
+    datadir = tmp_path / "data"
+    handler = get_datahandler(datadir, "feather")
+    for pair, candles in pair_candles.items():
+        handler.ohlcv_store(pair, "15m", candles, CandleType.SPOT)
+    return OHLCVStore(tmp_path / "store", datadir, "feather")
+
+
+@pytest.mark.parametrize("timerange", [None, "20240103-20240120", "20231220-20240105", "20240110-", "20240301-"])
+@pytest.mark.parametrize("fill_up_missing", [True, False])
+@pytest.mark.parametrize("drop_incomplete", [True, False])
+@pytest.mark.parametrize("startup_candles", [0, 50])
+def test_load_matches_load_pair_history(store, timerange, fill_up_missing, drop_incomplete, startup_candles):
+    kwargs = dict(
+        timerange=TimeRange.parse_timerange(timerange) if timerange else None,
+        fill_up_missing=fill_up_missing,
+        drop_incomplete=drop_incomplete,
+        startup_candles=startup_candles,
+    )
+    for pair in ["AAA/USDT", "BBB/USDT", "CCC/USDT", "EEE/USDT"]:
+        expected = load_pair_history(pair, "15m", store.datadir, data_format="feather", **kwargs)
+        got = store.load(pair, "15m", **kwargs)
+        if expected.empty:
+            assert got.empty
+        else:
+            assert_frame_equal(got, expected)
+
+
+def test_load_is_a_read_only_view(store):
+    candles = store.load("AAA/USDT", "15m")
+    path = store.build("AAA/USDT", "15m")
+    candles["close"] *= 2
+    candles.loc[0, "open"] = -1
+    _, prices = store.arrays(path)
+    expected = load_pair_history("AAA/USDT", "15m", store.datadir, data_format="feather")
+    np.testing.assert_array_equal(prices["close"], expected["close"])
+    np.testing.assert_array_equal(prices["open"], expected["open"])
+
+
+def test_rebuilds_when_the_data_file_changes(store, make_candles):
+    old_path = store.build("AAA/USDT", "15m")
+    get_datahandler(store.datadir, "feather").ohlcv_store("AAA/USDT", "15m", make_candles(500, seed=99), CandleType.SPOT)
+    assert store.build("AAA/USDT", "15m") != old_path
+    assert_frame_equal(
+        store.load("AAA/USDT", "15m"), load_pair_history("AAA/USDT", "15m", store.datadir, data_format="feather")
+    )
+
+
+def test_load_data_matches(store, pair_candles):
+    timerange = TimeRange.parse_timerange("20240103-20240120")
+    pairs = [*pair_candles, "EEE/USDT"]
+    expected = load_data(store.datadir, "15m", pairs, timerange=timerange, startup_candles=100, data_format="feather")
+    got = store.load_data("15m", pairs, timerange=timerange, startup_candles=100)
+    assert list(got) == list(expected)
+    for pair in expected:
+        assert_frame_equal(got[pair], expected[pair])
+
+
+def test_backtest_from_the_store(make_backtesting, store):
+    backtesting = make_backtesting(datadir=store.datadir, dataformat_ohlcv="feather")
+    expected, expected_timerange = backtesting.load_bt_data()
+
+    backtesting = make_backtesting(datadir=store.datadir, dataformat_ohlcv="feather")
+    install_ohlcv_store(backtesting, store)
+    got, timerange = backtesting.load_bt_data()
+
+    assert timerange.startts == expected_timerange.startts
+    assert list(got) == list(expected)
+    for pair in expected:
+        assert_frame_equal(got[pair], expected[pair])
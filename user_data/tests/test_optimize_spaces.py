@@ -0,0 +1,90 @@
+import json
+import logging
+from concurrent.futures import Future
+
+import pytest
+from freqtrade.optimize.hyperopt_tools import HyperoptTools
+
+from optimize_spaces import SPACES, collect_results, core_budget, export_merged_params
+
+
+@pytest.mark.parametrize("spaces,cores,jobs,expected", [
+    (list(SPACES), 16, [], {space: 2 for space in SPACES}),
+    (list(SPACES), 4, [], {space: 1 for space in SPACES}),
+    (["buy", "sell"], 1, [], {"buy": 1, "sell": 1}),
+    (["buy", "sell", "roi"], 64, [], {"buy": 21, "sell": 21, "roi": 21}),
+    (["buy", "sell", "roi"], 16, ["buy=10"], {"buy": 10, "sell": 3, "roi": 3}),
+    (["buy", "sell", "roi"], 8, ["buy=32"], {"buy": 32, "sell": 1, "roi": 1}),
+    (["buy", "sell"], 8, ["buy=1", "sell=2"], {"buy": 1, "sell": 2}),
+])
+def test_core_budget(spaces, cores, jobs, expected):
+    assert core_budget(spaces, cores, jobs) == expected
+
+
+@pytest.mark.parametrize("jobs", [["roi=2"], ["buy"], ["buy=x"], ["buy=-1"]])
+def test_core_budget_rejects_jobs(jobs):
+    with pytest.raises(ValueError, match="Invalid --jobs entry"):
+        core_budget(["buy", "sell"], 8, jobs)
+
+
+def space_result(loss, details, not_optimized):
+    return {
+        "loss": loss,
+        "results_file": "results.fthypt",
+        "params_details": details,
+        "params_not_optimized": not_optimized,
+    }
+
+
+STARTING = {
+    "buy": {"buy_rsi": 25, "buy_additional_indicator": "NONE"},
+    "sell": {"sell_rsi": 89, "sell_additional_indicator": "NONE"},
+    "roi": {"0": 0.298, "115": 0.144, "280": 0.055, "507": 0},
+    "stoploss": {"stoploss": -0.327},
+}
+
+
+def not_optimized(space):
+    return {name: dict(values) for name, values in STARTING.items() if name != space}
+
+
+def test_export_merges_spaces(tmp_path, monkeypatch):
+    strategy_file = tmp_path / "AwesomeCombinationStrategy.py"
+    monkeypatch.setattr(HyperoptTools, "get_strategy_filename", lambda config, name: strategy_file)
+    results = {
+        "buy": space_result(-1.0, {"buy": {"buy_rsi": 31, "buy_additional_indicator": "MACD"}}, not_optimized("buy")),
+        "roi": space_result(-2.0, {"roi": {"0": 0.1, "37": 0.02, "90": 0}}, not_optimized("roi")),
+        "stoploss": space_result(-0.5, {"stoploss": {"stoploss": -0.1}}, not_optimized("stoploss")),
+    }
+
+    export_merged_params({"strategy": "AwesomeCombinationStrategy"}, results)
+
+    params = json.loads(strategy_file.with_suffix(".json").read_text())["params"]
+    assert params == {
+        "buy": {"buy_rsi": 31, "buy_additional_indicator": "MACD"},
+        "sell": STARTING["sell"],
+        "roi": {"0": 0.1, "37": 0.02, "90": 0},
+        "stoploss": {"stoploss": -0.1},
+    }
+
+
+def test_export_without_results(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(HyperoptTools, "export_params", pytest.fail)
+    export_merged_params({"strategy": "AwesomeCombinationStrategy"}, {})
+    assert "No space found a result" in caplog.text
+
+
+def test_failed_and_empty_spaces_are_reported(caplog):
+    futures = {Future(): space for space in ("buy", "sell", "roi")}
+    buy, sell, roi = futures
+    buy.set_result(space_result(-1.0, {"buy": {"buy_rsi": 31}}, {}))
+    sell.set_exception(RuntimeError("worker died"))
+    roi.set_result(None)
+
+    with caplog.at_level(logging.INFO):
+        results = collect_results(futures)
+
+    assert list(results) == ["buy"]
+    assert "Hyperopt of space 'sell' failed." in caplog.text
+    assert "worker died" in caplog.text
+    assert "Hyperopt of space 'roi' found no result." in caplog.text
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from freqtrade.enums import RunMode
+from pandas.testing import assert_frame_equal
+
+from awesome_combination import ParallelAnalysis
+
+
+@pytest.fixture
+def strategy(make_backtesting):
+    strategy = make_backtesting().strategy
+    strategy.use_indicator_cache = False
+    return strategy
+
+
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_parallel_indicators_match_serial(strategy, pair_candles, backend):
+    expected = {pair: strategy.advise_indicators(df.copy(), {"pair": pair}) for pair, df in pair_candles.items()}
+
+    strategy.parallel_analysis = ParallelAnalysis(
+        {"indicators": strategy.advise_indicators}, workers=2, backend=backend
+    )
+    inputs = {pair: df.copy() for pair, df in pair_candles.items()}
+    analyzed = strategy.advise_all_indicators(inputs)
+
+    assert list(analyzed) == list(pair_candles)
+    for pair, dataframe in analyzed.items():
+        assert_frame_equal(dataframe, expected[pair])
+        # The inputs are not modified
+        assert_frame_equal(inputs[pair], pair_candles[pair])
+
+
+def analysis(dataframe, metadata):
+    if metadata["pair"] == "DDD/USDT":
+        raise ValueError("broken pair")
+    dataframe["double"] = dataframe["close"] * 2
+    dataframe["enter_tag"] = np.where(dataframe["close"] > dataframe["open"], "up", None)
+    if metadata["pair"] == "CCC/USDT":
+        dataframe["extra"] = 1.0
+    return dataframe
+
+
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_parallel_analysis_falls_back(pair_candles, backend):
+    pool = ParallelAnalysis({"analysis": analysis}, workers=2, backend=backend)
+    try:
+        for _ in range(2):
+            # Text columns, a pair with other columns, and a failing pair left to the caller
+            results = pool.run(pair_candles, "analysis")
+            assert list(results) == ["AAA/USDT", "BBB/USDT", "CCC/USDT"]
+            for pair, dataframe in results.items():
+                assert_frame_equal(dataframe, analysis(pair_candles[pair].copy(), {"pair": pair}))
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("runmode,backend,expected", [
+    ("backtest", "process", "process"),
+    ("hyperopt", "process", "process"),
+    ("dry_run", "process", "thread"),
+    ("live", "process", "thread"),
+    ("live", "thread", "thread"),
+])
+def test_live_analysis_never_forks(make_backtesting, runmode, backend, expected):
+    strategy = make_backtesting().strategy
+    strategy.parallel_analysis_workers = 2
+    strategy.parallel_analysis_backend = backend
+    strategy.dp._config["runmode"] = RunMode(runmode)
+    strategy.bot_start()
+
+    assert strategy.parallel_analysis.backend == expected
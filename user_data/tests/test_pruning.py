@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from ComprehensiveTradeOptimizationLoss import ComprehensiveTradeOptimizationLoss
+from freqtrade.data.converter import trim_dataframes
+from freqtrade.data.history import get_timerange
+
+from pruning import EpochPruned, EpochPruner
+
+
+def pruner_for(backtesting, data):
+    start, end = get_timerange(trim_dataframes(data, backtesting.timerange, backtesting.required_startup))
+    hyperopt = SimpleNamespace(
+        backtesting=backtesting,
+        config=backtesting.config,
+        custom_hyperoptloss=ComprehensiveTradeOptimizationLoss,
+        min_date=start,
+        max_date=end,
+        generate_optimizer=None,
+        evaluate_result=None,
+    )
+    return EpochPruner(hyperopt, check_every=96)
+
+
+def test_pruner_counts_backtest_candles(make_backtesting, run_backtest, pair_candles):
+    backtesting = make_backtesting()
+    pruner = pruner_for(backtesting, pair_candles)
+    pruner._generate_optimizer = lambda raw_params: run_backtest(backtesting, pair_candles)
+
+    pruner.generate_optimizer([])
+
+    # One check per candle of the timerange, none for the pairs while preparing the data
+    assert pruner._steps == pruner._total_steps == 2584
+
+
+def test_pruner_aborts_hopeless_epoch(make_backtesting, run_backtest, pair_candles):
+    backtesting = make_backtesting()
+    pruner = pruner_for(backtesting, pair_candles)
+    pruner._generate_optimizer = lambda raw_params: run_backtest(backtesting, pair_candles)
+    pruner._pruned_result = lambda raw_params, pruned: pruned
+    pruner.threshold = float("-inf")
+
+    pruned = pruner.generate_optimizer([])
+
+    assert isinstance(pruned, EpochPruned)
+    assert pruner._steps == pruner.check_every
+    assert pruned.progress == pytest.approx(pruner.check_every / pruner._total_steps)
+
+
+def final_loss(pruner, result):
+    hyperopt = pruner.hyperopt
+    results = result["results"]
+    return ComprehensiveTradeOptimizationLoss.hyperopt_loss_function(
+        results, len(results), hyperopt.min_date, hyperopt.max_date, hyperopt.config, {}, {}
+    )
+
+
+def bounded_epoch(make_backtesting, run_backtest, pair_candles, buy_rsi, threshold):
+    """Backtest of one epoch with a bound check every candle, and its bounds."""
+    backtesting = make_backtesting()
+    backtesting.strategy.buy_rsi.value = buy_rsi
+    pruner = pruner_for(backtesting, pair_candles)
+    pruner.check_every = 1
+    pruner.threshold = threshold
+    pruner._generate_optimizer = lambda raw_params: run_backtest(backtesting, pair_candles)
+    pruner._pruned_result = lambda raw_params, pruned: pruned
+    bounds, max_profits, bound = [], [], pruner.bound
+
+    def record(metrics, max_profit, config):
+        max_profits.append(max_profit)
+        bounds.append(bound(metrics, max_profit, config))
+        return bounds[-1]
+
+    pruner.bound = record
+    return pruner, pruner.generate_optimizer([]), bounds, max_profits
+
+
+@pytest.mark.parametrize("buy_rsi", [25, 35, 45])
+def test_bound_never_exceeds_final_loss(make_backtesting, run_backtest, pair_candles, buy_rsi):
+    pruner, result, bounds, max_profits = bounded_epoch(
+        make_backtesting, run_backtest, pair_candles, buy_rsi, threshold=float("1e18")
+    )
+
+    assert len(bounds) == pruner._total_steps
+    assert len(result["results"]) > 5
+    assert min(max_profits) >= result["results"]["profit_abs"].sum()
+    assert max(bounds) <= final_loss(pruner, result)
+
+
+def test_pruned_epochs_cannot_beat_top(make_backtesting, run_backtest, pair_candles):
+    epochs = {}
+    for buy_rsi in (25, 30, 35, 40, 45):
+        pruner, result, bounds, _ = bounded_epoch(
+            make_backtesting, run_backtest, pair_candles, buy_rsi, threshold=float("1e18")
+        )
+        epochs[buy_rsi] = final_loss(pruner, result), max(bounds)
+    # The 2nd best loss, or the best bound if no epoch could ever be pruned at that threshold
+    threshold = min(sorted(loss for loss, _ in epochs.values())[1], max(bound for _, bound in epochs.values()))
+
+    pruned = []
+    for buy_rsi, (loss, _) in epochs.items():
+        result = bounded_epoch(make_backtesting, run_backtest, pair_candles, buy_rsi, threshold)[1]
+        if isinstance(result, EpochPruned):
+            pruned.append(buy_rsi)
+            assert loss >= threshold
+    assert pruned
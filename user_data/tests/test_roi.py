@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from freqtrade.exceptions import OperationalException
+from freqtrade.strategy import IStrategy
+
+from awesome_combination import CompiledROI
+from pair_roi import install_pair_roi
+
+
+TABLES = [
+    {0: 0.298, 115: 0.144, 280: 0.055, 507: 0},
+    {30: 0.05, 10: 0.1, 90: -1},
+    {0: 0.01},
+    {},
+]
+
+
+@pytest.mark.parametrize("table", TABLES)
+def test_compiled_roi_matches_freqtrade(table):
+    compiled = CompiledROI({str(minutes): roi for minutes, roi in table.items()})
+    strategy = SimpleNamespace(minimal_roi=table)
+    minutes = np.arange(-5, 600)
+    for duration in minutes:
+        assert compiled.entry(int(duration)) == IStrategy.min_roi_reached_entry(strategy, int(duration))
+    expected = [IStrategy.min_roi_reached_entry(strategy, int(duration))[1] for duration in minutes]
+    np.testing.assert_array_equal(compiled.thresholds_at(minutes), np.array(expected, dtype=float))
+
+
+def test_roi_exits_match_freqtrade(make_backtesting, run_backtest, pair_candles):
+    results = []
+    for compiled in (True, False):
+        backtesting = make_backtesting(minimal_roi={"0": 0.01, "30": 0.005, "90": 0})
+        strategy = backtesting.strategy
+        if not compiled:
+            strategy.min_roi_reached = partial(IStrategy.min_roi_reached, strategy)
+            strategy.min_roi_reached_entry = partial(IStrategy.min_roi_reached_entry, strategy)
+        results.append(run_backtest(backtesting, pair_candles)["results"])
+
+    assert (results[1]["exit_reason"] == "roi").sum() > 10
+    assert results[0].equals(results[1])
+
+
+def test_pair_tables(make_backtesting):
+    strategy = make_backtesting().strategy
+    strategy.custom_pair_params = {"AAA/USDT": {"minimal_roi": {"0": 0.5, "10": 0.2}}}
+
+    assert strategy.min_roi_reached_entry(20, "AAA/USDT") == (10, 0.2)
+    assert strategy.min_roi_reached_entry(20, "BBB/USDT") == (0, 0.298)
+    # freqtrade asks without a pair, also right after min_roi_reached() checked one
+    opened = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    trade = SimpleNamespace(pair="AAA/USDT", open_date_utc=opened)
+    assert strategy.min_roi_reached(trade, 0.25, opened + timedelta(minutes=20))
+    assert not strategy.min_roi_reached(trade, 0.25, opened + timedelta(minutes=5))
+    with pytest.raises(OperationalException):
+        strategy.min_roi_reached_entry(20)
+    strategy.roi_pricing_pair = "AAA/USDT"
+    assert strategy.min_roi_reached_entry(20) == (10, 0.2)
+
+
+PAIR_TABLE = {"0": 0.02, "45": 0.008, "120": 0}
+
+
+def test_pair_table_prices_roi_exits(make_backtesting, run_backtest, pair_candles):
+    # The table as minimal_roi, and as every pair's own table next to another minimal_roi
+    reference = make_backtesting(minimal_roi=PAIR_TABLE)
+    expected = run_backtest(reference, pair_candles)["results"]
+    backtesting = make_backtesting(minimal_roi={"0": 0.01, "30": 0.005, "90": 0})
+    backtesting.strategy.custom_pair_params = {pair: {"minimal_roi": PAIR_TABLE} for pair in pair_candles}
+    install_pair_roi(backtesting)
+    results = run_backtest(backtesting, pair_candles)["results"]
+
+    assert (expected["exit_reason"] == "roi").sum() > 10
+    assert results.equals(expected)
+
+
+def test_pair_table_needs_pair_pricing(make_backtesting, run_backtest, pair_candles):
+    backtesting = make_backtesting(minimal_roi={"0": 0.01, "30": 0.005, "90": 0})
+    backtesting.strategy.custom_pair_params = {"AAA/USDT": {"minimal_roi": PAIR_TABLE}}
+
+    with pytest.raises(OperationalException, match="custom_pair_params"):
+        run_backtest(backtesting, pair_candles)
@@ -0,0 +1,49 @@
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+import numpy as np
+import pytest
+from freqtrade.enums import RunMode
+
+from awesome_combination import RollingStats
+
+
+def baseline_ttm_squeeze(dataframe, bollinger_period=20, keltner_period=20, momentum_period=12):
+    """AwesomeCombinationStrategy.ttm_squeeze() before RollingStats."""
+    bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(dataframe), window=bollinger_period, stds=2)
+    keltner = qtpylib.keltner_channel(dataframe, window=keltner_period)
+    dataframe['squeeze_on'] = (bollinger['lower'] > keltner["lower"]) & (bollinger['upper'] < keltner["upper"])
+    dataframe['squeeze_off'] = (bollinger['lower'] < keltner["lower"]) & (bollinger['upper'] > keltner["upper"])
+    dataframe['momentum_hist'] = dataframe['close'] - dataframe['close'].shift(momentum_period)
+    return dataframe
+
+
+@pytest.mark.parametrize("rows", [1, 10, 20, 21, 3000])
+@pytest.mark.parametrize("window", [14, 20])
+def test_bands_match_qtpylib(make_candles, rows, window):
+    candles = make_candles(rows)
+    stats = RollingStats(candles)
+
+    expected = qtpylib.bollinger_bands(qtpylib.typical_price(candles), window=window, stds=2)
+    for band, values in stats.bollinger_bands(window=window, stds=2).items():
+        np.testing.assert_array_equal(values, expected[band], err_msg=band)
+    expected = qtpylib.keltner_channel(candles, window=window)
+    for band, values in stats.keltner_channel(window=window).items():
+        np.testing.assert_array_equal(values, expected[band], err_msg=band)
+    np.testing.assert_array_equal(stats.typical_price(), qtpylib.typical_price(candles))
+
+
+def test_squeeze_matches_baseline(make_backtesting, pair_candles):
+    strategy = make_backtesting(runmode=RunMode.HYPEROPT, spaces=["buy", "sell"]).strategy
+    strategy.prune_indicators = False
+    candles = pair_candles["BBB/USDT"]
+    expected = baseline_ttm_squeeze(candles.copy())
+
+    analyzed = strategy.advise_indicators(candles.copy(), {"pair": "BBB/USDT"})
+    standalone = strategy.ttm_squeeze(candles.copy())
+    bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(candles), window=20, stds=2)
+
+    assert expected["squeeze_on"].any() and expected["squeeze_off"].any()
+    for dataframe in (analyzed, standalone):
+        for column in ["squeeze_on", "squeeze_off", "momentum_hist"]:
+            np.testing.assert_array_equal(dataframe[column], expected[column], err_msg=column)
+    for band, column in [("lower", "bb_lowerband"), ("mid", "bb_middleband"), ("upper", "bb_upperband")]:
+        np.testing.assert_array_equal(analyzed[column], bollinger[band], err_msg=column)
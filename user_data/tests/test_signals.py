@@ -0,0 +1,85 @@
+from functools import reduce
+
+import numpy as np
+import pytest
+from freqtrade.enums import RunMode
+from pandas import DataFrame
+
+from awesome_combination import rows_at_least, rows_below, threshold_order
+
+
+# populate_entry_trend / populate_exit_trend before the conditions were packed into bits
+def baseline_entry(dataframe: DataFrame, buy_rsi: int, profile: str) -> np.ndarray:
+    conditions = [dataframe['rsi'] < buy_rsi, dataframe['close'] > dataframe['vwap']]
+    if "MACD" in profile:
+        conditions.append(dataframe["macd"] < dataframe["macdsignal"])
+    if "STOCK_OSC" in profile:
+        conditions.append(dataframe['fastk_rsi'] > dataframe['fastd_rsi'])
+    if "BB" in profile:
+        conditions.append(dataframe["close"] <= dataframe["bb_lowerband"])
+    if "EMA" in profile:
+        conditions.append(dataframe["ema10"] > dataframe["ema50"])
+    if "TTM" in profile:
+        conditions.append(dataframe['squeeze_on'] & (dataframe['momentum_hist'] > 0))
+    return reduce(lambda x, y: x & y, conditions).to_numpy()
+
+
+def baseline_exit(dataframe: DataFrame, sell_rsi: int, profile: str) -> np.ndarray:
+    conditions = [dataframe['rsi'] >= sell_rsi]
+    if "MACD" in profile:
+        conditions.append(dataframe["macd"] >= dataframe["macdsignal"])
+    if "STOCK_OSC" in profile:
+        conditions.append(dataframe['fastk_rsi'] <= dataframe['fastd_rsi'])
+    if "TTM" in profile:
+        conditions.append(dataframe['squeeze_off'] & (dataframe['momentum_hist'] < 0))
+    return reduce(lambda x, y: x & y, conditions).to_numpy()
+
+
+@pytest.mark.parametrize("side", ["entry", "exit"])
+def test_signals_match_baseline(make_backtesting, pair_candles, side):
+    strategy = make_backtesting(runmode=RunMode.HYPEROPT, spaces=["buy", "sell"]).strategy
+    strategy.prune_indicators = False
+    pair = "BBB/USDT"
+    analyzed = strategy.advise_indicators(pair_candles[pair].copy(), {"pair": pair})
+    rsi, additional, populate, column, baseline = {
+        "entry": (strategy.buy_rsi, strategy.buy_additional_indicator, strategy.populate_entry_trend,
+                  "enter_long", baseline_entry),
+        "exit": (strategy.sell_rsi, strategy.sell_additional_indicator, strategy.populate_exit_trend,
+                 "exit_long", baseline_exit),
+    }[side]
+
+    signals = 0
+    # Every profile and every threshold, the ends of the range included
+    for profile in additional.opt_range:
+        for threshold in range(rsi.low, rsi.high + 1):
+            rsi.value, additional.value = threshold, profile
+            got = populate(analyzed.copy(), {"pair": pair}).get(column)
+            got = np.zeros(len(analyzed), dtype=bool) if got is None else got.to_numpy() == 1
+            expected = baseline(analyzed, threshold, profile)
+            np.testing.assert_array_equal(got, expected, err_msg=f"{profile} {threshold}")
+            signals += int(expected.sum())
+    assert signals > 100
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_threshold_rows_match_comparisons(seed):
+    rng = np.random.default_rng(seed)
+    # Ties, leading NaNs like RSI's startup and NaNs inside
+    values = rng.integers(0, 100, 500).astype(float)
+    values[:14] = np.nan
+    values[rng.integers(0, 500, 10)] = np.nan
+    order = threshold_order(values)
+    for threshold in [-1, 0, 0.5, 30, 42.0, 99, 100, 101, np.inf]:
+        np.testing.assert_array_equal(
+            np.sort(rows_below(values, order, threshold)), np.flatnonzero(values < threshold)
+        )
+        np.testing.assert_array_equal(
+            np.sort(rows_at_least(values, order, threshold)), np.flatnonzero(values >= threshold)
+        )
+
+
+def test_threshold_rows_without_values():
+    for values in (np.empty(0), np.full(5, np.nan)):
+        order = threshold_order(values)
+        assert rows_below(values, order, 50).size == 0
+        assert rows_at_least(values, order, 50).size == 0
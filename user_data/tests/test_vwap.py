@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from awesome_combination import VWAP
+
+
+ANCHORS = [None, "D", "W", 96]
+
+
+def test_cumulative_matches_baseline(make_candles):
+    candles = make_candles(3000)
+    expected = (
+        ((candles['high'] + candles['low'] + candles['close']) / 3) * candles['volume']
+    ).cumsum() / candles['volume'].cumsum()
+    np.testing.assert_array_equal(VWAP().compute(candles), expected)
+
+
+@pytest.mark.parametrize("anchor", ["D", "W"])
+def test_sessions_match_reference(make_candles, anchor):
+    # Starts on a Monday at 05:00, so the first day and week are incomplete
+    candles = make_candles(3000, start="2024-01-01 05:00")
+    typical = (candles["high"] + candles["low"] + candles["close"]) / 3
+    sessions = candles["date"].dt.floor("D")
+    if anchor == "W":
+        sessions -= pd.to_timedelta(sessions.dt.weekday, unit="D")
+    expected = ((typical * candles["volume"]).groupby(sessions).cumsum()
+                / candles["volume"].groupby(sessions).cumsum()).to_numpy()
+    expected[sessions == sessions.iloc[0]] = np.nan
+
+    values = VWAP(anchor).compute(candles)
+    assert np.isnan(values[0]) and not np.isnan(values[-1])
+    np.testing.assert_array_equal(values, expected)
+
+
+@pytest.mark.parametrize("anchor", ["D", "W", 96])
+def test_anchored_values_do_not_depend_on_history(make_candles, anchor):
+    candles = make_candles(3000)
+    full = VWAP(anchor).compute(candles)
+    for start in (1, 500, 1234):
+        tail = VWAP(anchor).compute(candles.iloc[start:].reset_index(drop=True))
+        known = ~np.isnan(tail)
+        assert known.sum() > 1000
+        np.testing.assert_allclose(tail[known], full[start:][known], rtol=1e-12)
+
+
+@pytest.mark.parametrize("anchor", ANCHORS)
+def test_update_matches_compute(make_candles, anchor):
+    candles = make_candles(3000)
+    vwap, rng = VWAP(anchor), np.random.default_rng(0)
+    end, window = 600, 500
+    while end < len(candles):
+        # A live window sliding by a few candles, sometimes none, and once over a gap
+        live = candles.iloc[max(0, end - window):end].reset_index(drop=True)
+        np.testing.assert_allclose(vwap.update(live, "AAA/USDT"), VWAP(anchor).compute(live), rtol=1e-10)
+        end += int(rng.integers(0, 4)) if end != 2000 else 700